@@ -20,8 +20,8 @@ def build_graph_paths(movies):
             paths.append(f"{name} —[:RATED]→ {movie}")
     return "\n".join(paths)
 
-def generate_response(answer, query):
-    """Generates a precise and structured response using a local LLM via Ollama."""
+def build_messages(answer, query):
+    """Builds the system and user messages for the LLM from the retrieved movies."""
 
     system_msg = """
         You are an expert AI assistant for a movie knowledge graph. Your goal is to provide **precise, relevant, and structured answers**.
@@ -91,12 +91,19 @@ def generate_response(answer, query):
     - Use structured formatting.
     """
 
-    response = ollama.chat(
-        model='llama3',
-        messages=[
-            {"role": "system", "content": system_msg},
-            {"role": "user", "content": prompt}
-        ]
-    )
+    return [
+        {"role": "system", "content": system_msg},
+        {"role": "user", "content": prompt}
+    ]
 
+def generate_response(answer, query):
+    """Generates a precise and structured response using a local LLM via Ollama."""
+    response = ollama.chat(model='llama3', messages=build_messages(answer, query))
     return response['message']['content']
+
+def generate_response_stream(answer, query):
+    """Same as generate_response, but yields the answer in chunks as Ollama produces them."""
+    for part in ollama.chat(model='llama3', messages=build_messages(answer, query), stream=True):
+        content = part['message']['content']
+        if content:
+            yield content
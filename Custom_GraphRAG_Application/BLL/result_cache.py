@@ -0,0 +1,121 @@
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_query(query):
+    """Lower-cases, trims surrounding punctuation and collapses whitespace."""
+    return re.sub(r"\s+", " ", query.lower()).strip(" \t\n?!.,;:")
+
+
+class InMemoryBackend:
+    """Per-process LRU with a TTL on every entry."""
+
+    def __init__(self, max_items=1000):
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._items[key] = (time.monotonic() + ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+class RedisBackend:
+    """Shared cache for several workers or hosts.
+
+    Works with any redis-py compatible client (a local redis-server, or
+    fakeredis as an in-process stand-in). Redis evicts by TTL; configure
+    maxmemory-policy allkeys-lru on the server for the size bound.
+    """
+
+    def __init__(self, client, prefix="graphrag:context:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, json.dumps(value), ex=max(1, int(ttl)))
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+
+class ResultCache:
+    """Caches retrieval results keyed on the index generation, k and the normalised query.
+
+    generation_fn returns the current index generation; entries written for
+    an older generation are never returned again, so a rebuild invalidates
+    the cache without any coordination between workers. Take the key once,
+    before retrieving, and use it for both get and set: a result is then
+    stored under the generation read before it was computed, never a newer one.
+    """
+
+    def __init__(self, backend, generation_fn, ttl=300):
+        self.backend = backend
+        self.generation_fn = generation_fn
+        self.ttl = ttl
+        self._generation = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+    def key(self, query, k):
+        """Cache key of a query under the current index generation."""
+        generation = self.generation_fn()
+        if generation != self._generation:
+            # Old entries can never match again; free the memory they hold
+            if self._generation is not None and isinstance(self.backend, InMemoryBackend):
+                self.backend.clear()
+            self._generation = generation
+        return f"{generation}:{k}:{normalize_query(query)}"
+
+    def get(self, key):
+        entry = self.backend.get(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.saved_seconds += entry["seconds"]
+        return entry["result"]
+
+    def set(self, key, result, seconds):
+        """Stores a result along with how long it took to compute (counted as saved on every hit)."""
+        self.backend.set(key, {"result": result, "seconds": seconds}, self.ttl)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "latency_saved_seconds": self.saved_seconds,
+            "generation": self._generation,
+        }
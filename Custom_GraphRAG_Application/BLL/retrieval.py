@@ -1,10 +1,63 @@
-from DAL.neo4j_handler import get_movie_info
-from DAL.faiss_handler import find_similar_movies
+import asyncio
+import time
+import config.settings as settings
+from DAL.neo4j_handler import get_movie_info, get_movie_info_many_async
+from DAL.faiss_handler import find_similar_movies, find_similar_movies_batch, index_generation
+from query_batcher import QueryBatcher
+from BLL.result_cache import InMemoryBackend, RedisBackend, ResultCache
 
-def retrieve_context(query, limit=10):
-    movie_ids = find_similar_movies(query, k=20)
+def create_result_cache():
+    if settings.RESULT_CACHE_BACKEND == "redis":
+        import redis
+        backend = RedisBackend(redis.Redis.from_url(settings.REDIS_URL))
+    else:
+        backend = InMemoryBackend(max_items=settings.RESULT_CACHE_MAX_ITEMS)
+    return ResultCache(backend, index_generation, ttl=settings.RESULT_CACHE_TTL)
+
+result_cache = create_result_cache()
+
+# Number of FAISS neighbours looked up per query
+SIMILAR_MOVIES_K = 20
+
+def sort_by_rating(movie_data):
+    return sorted(movie_data, key=lambda m: m.get("avg_rating", 0), reverse=True)
+
+def retrieve_context(query, limit=10, k=SIMILAR_MOVIES_K):
+    key = result_cache.key(query, k)
+    cached = result_cache.get(key)
+    if cached is not None:
+        return cached
+
+    start = time.perf_counter()
+    movie_ids = find_similar_movies(query, k=k)
     movie_data = get_movie_info(movie_ids)
 
-    movie_data_sorted = sorted(movie_data, key=lambda m: m.get("avg_rating", 0), reverse=True)
+    movie_data_sorted = sort_by_rating(movie_data)
+
+    result_cache.set(key, movie_data_sorted, time.perf_counter() - start)
+    return movie_data_sorted
+
+async def _retrieve_context_batch(queries):
+    """One encode batch + FAISS search, then one Neo4j round trip for the whole batch."""
+    id_lists = await asyncio.to_thread(find_similar_movies_batch, queries, SIMILAR_MOVIES_K)
+    movie_lists = await get_movie_info_many_async(id_lists)
+    return [sort_by_rating(movie_data) for movie_data in movie_lists]
+
+# Coalesces concurrent /ask queries into shared FAISS and Neo4j calls
+context_batcher = QueryBatcher(
+    _retrieve_context_batch,
+    window_ms=settings.ASK_BATCH_WINDOW_MS,
+    max_batch_size=settings.ASK_BATCH_MAX_SIZE,
+)
+
+async def retrieve_context_async(query, limit=10):
+    """Async variant of retrieve_context that batches with concurrent queries."""
+    key = result_cache.key(query, SIMILAR_MOVIES_K)
+    cached = result_cache.get(key)
+    if cached is not None:
+        return cached
 
-    return movie_data_sorted
\ No newline at end of file
+    start = time.perf_counter()
+    movie_data_sorted = await context_batcher.submit(query)
+    result_cache.set(key, movie_data_sorted, time.perf_counter() - start)
+    return movie_data_sorted
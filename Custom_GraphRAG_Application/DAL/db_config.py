@@ -1,10 +1,45 @@
-from neo4j import GraphDatabase
-import config.settings as settings  
+from neo4j import AsyncGraphDatabase, GraphDatabase
+from neo4j_session_metrics import SessionMetrics
+import config.settings as settings
 
 # Neo4j Connection
 NEO4J_URI = settings.NEO4J_URI
 NEO4J_USER = settings.NEO4J_USER
 NEO4J_PASSWORD = settings.NEO4J_PASSWORD
 
+POOL_CONFIG = {
+    "max_connection_pool_size": settings.NEO4J_MAX_POOL_SIZE,
+    "max_connection_lifetime": settings.NEO4J_MAX_CONNECTION_LIFETIME,
+    "connection_acquisition_timeout": settings.NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+}
+
 # Create the Neo4j driver
-driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD), **POOL_CONFIG)
+
+# The async driver is created on first use, inside the event loop that serves the API
+_async_driver = None
+
+
+def get_async_driver():
+    global _async_driver
+    if _async_driver is None:
+        _async_driver = AsyncGraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD), **POOL_CONFIG)
+    return _async_driver
+
+
+# Sessions this process has open at once (not the driver's pool itself), reported by /metrics
+session_metrics = SessionMetrics(settings.NEO4J_MAX_POOL_SIZE)
+
+
+def execute_read(work, **params):
+    """Runs work(tx, **params) in a managed read transaction (routed to a reader in a cluster)."""
+    with session_metrics.track("sync"):
+        with driver.session() as session:
+            return session.execute_read(work, **params)
+
+
+async def execute_read_async(work, **params):
+    """Async variant of execute_read; work must be a coroutine function taking (tx, **params)."""
+    with session_metrics.track("async"):
+        async with get_async_driver().session() as session:
+            return await session.execute_read(work, **params)
@@ -1,44 +1,128 @@
 import os
+import threading
 import faiss
-import pickle
 import numpy as np
 from sentence_transformers import SentenceTransformer
-from config.rebuild_faiss import rebuild_faiss
+import config.settings as settings
+from DAL.movie_store import MovieStore, convert_pickle_store
+from faiss_index_factory import set_search_params
+from embedding_cache import EmbeddingCache
+
+# The index, movie store and encoder are loaded on first use rather than at
+# import time, so workers start immediately and only pay for what they touch.
+_lock = threading.Lock()
+_index = None
+_index_version = None
+_model = None
+_embedding_cache = None
+movies = MovieStore(settings.MOVIE_STORE_PATH)
+
+
+def _index_read_flags():
+    """Read flags that let FAISS map the index file instead of copying it into memory."""
+    if not settings.FAISS_USE_MMAP:
+        return 0
+    # IO_FLAG_MMAP_IFC (FAISS >= 1.9) maps codes in place for every index type;
+    # older versions only support IO_FLAG_MMAP, which maps IVF inverted lists.
+    return getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+
+def _read_index(path):
+    try:
+        return faiss.read_index(path, _index_read_flags())
+    except RuntimeError as e:
+        print(f"Could not memory-map {path} ({e}); loading it into memory instead.")
+        return faiss.read_index(path)
+
+
+def ensure_artifacts():
+    """Rebuilds the FAISS index and movie store if they are missing."""
+    if not os.path.exists(settings.FAISS_INDEX_PATH):
+        print("FAISS index missing! Rebuilding...")
+        from config.rebuild_faiss import rebuild_faiss
+        rebuild_faiss()
+    if not movies.exists():
+        print("Movie store missing! Converting movies_list.pkl...")
+        # Store keys must be the ids the index returns: movieIds for IndexIDMap, positions otherwise
+        keyed = isinstance(_read_index(settings.FAISS_INDEX_PATH), faiss.IndexIDMap)
+        convert_pickle_store(settings.MOVIES_PICKLE_PATH, settings.MOVIE_STORE_PATH, keyed=keyed)
 
-FAISS_INDEX_PATH = "movie_index.faiss"
 
 # Load FAISS index & movie data
 def load_faiss_index():
-    if not os.path.exists(FAISS_INDEX_PATH):  
-        print("FAISS index missing! Rebuilding...")
-        rebuild_faiss()  
-    return faiss.read_index(FAISS_INDEX_PATH)
+    """Returns the shared FAISS index, reloading it when a rebuild replaced the file."""
+    global _index, _index_version
 
-# Ensure FAISS index is rebuilt during initialization if missing
-if not os.path.exists(FAISS_INDEX_PATH):
-    print("FAISS index missing at startup! Rebuilding...")
-    rebuild_faiss()
+    if not os.path.exists(settings.FAISS_INDEX_PATH) or not movies.exists():
+        with _lock:
+            ensure_artifacts()
 
-index = load_faiss_index()
-model = SentenceTransformer("all-MiniLM-L6-v2")
+    st = os.stat(settings.FAISS_INDEX_PATH)
+    version = (st.st_ino, st.st_mtime_ns)
+    if _index is None or version != _index_version:
+        with _lock:
+            if _index is None or version != _index_version:
+                _index = _read_index(settings.FAISS_INDEX_PATH)
+                set_search_params(_index, nprobe=settings.FAISS_NPROBE, ef_search=settings.FAISS_EF_SEARCH)
+                _index_version = version
+    return _index
+
+
+def index_generation():
+    """Identifies the index build currently on disk; changes with every rebuild."""
+    try:
+        with open(settings.INDEX_GENERATION_PATH, encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        # Index built before generations were recorded
+        try:
+            return str(os.stat(settings.FAISS_INDEX_PATH).st_mtime_ns)
+        except FileNotFoundError:
+            return "none"
+
+
+def get_model():
+    global _model
+    if _model is None:
+        with _lock:
+            if _model is None:
+                _model = SentenceTransformer("all-MiniLM-L6-v2")
+    return _model
+
+
+def get_embedding_cache():
+    global _embedding_cache
+    if _embedding_cache is None:
+        with _lock:
+            if _embedding_cache is None:
+                _embedding_cache = EmbeddingCache(
+                    settings.EMBEDDING_CACHE_PATH, "all-MiniLM-L6-v2", settings.EMBEDDING_CACHE_MEMORY_ITEMS
+                )
+    return _embedding_cache
 
-# Load movie list with IDs
-with open("movies_list.pkl", "rb") as f:
-    movies = pickle.load(f)
 
 def find_similar_movies(query, k=50, min_similarity=0.3):
     """Find similar movies using FAISS & return their Neo4j IDs with better filtering."""
-    query_embedding = model.encode([query]).astype('float32')
+    return find_similar_movies_batch([query], k=k, min_similarity=min_similarity)[0]
+
+
+def find_similar_movies_batch(queries, k=50, min_similarity=0.3):
+    """Same as find_similar_movies for several queries: one encode batch, one FAISS search."""
+    index = load_faiss_index()
+    query_embeddings = get_embedding_cache().encode(get_model(), queries)
 
-    D, I = index.search(query_embedding, k=k)  # D = distances, I = indexes
+    D, I = index.search(query_embeddings, k=k)  # D = distances, I = movie keys (movieId)
 
-    relevant_movies = []
-    for dist, idx in zip(D[0], I[0]):
-        if idx == -1:  # FAISS returns -1 if no match is found
-            continue
-        if dist < min_similarity:  # Filter out weak matches
-            continue
+    results = []
+    for distances, found in zip(D, I):
+        keys = []
+        for dist, key in zip(distances, found):
+            if key == -1:  # FAISS returns -1 if no match is found
+                continue
+            if dist < min_similarity:  # Filter out weak matches
+                continue
 
-        relevant_movies.append(movies[idx]["id"])
+            keys.append(key)
 
-    return relevant_movies
\ No newline at end of file
+        results.append([m["id"] for m in movies.get_by_keys(keys)])
+    return results
@@ -0,0 +1,52 @@
+# Each collection is computed in its own subquery, so a movie yields
+# actors + directors + genres + ratings intermediate rows instead of their
+# product, and ratings are averaged server-side.
+MOVIE_INFO_QUERY = """
+    UNWIND $movie_ids AS movie_id
+    MATCH (m:Movie {movieId: movie_id})
+
+    CALL {
+        WITH m
+        OPTIONAL MATCH (m)<-[:ACTED_IN]-(a:Actor)
+        RETURN COLLECT(DISTINCT COALESCE(a.name, "")) AS actors
+    }
+    CALL {
+        WITH m
+        OPTIONAL MATCH (m)<-[:DIRECTED]-(d:Director)
+        RETURN COLLECT(DISTINCT COALESCE(d.name, "")) AS directors
+    }
+    CALL {
+        WITH m
+        OPTIONAL MATCH (m)-[:IN_GENRE]->(g:Genre)
+        RETURN COLLECT(DISTINCT COALESCE(g.name, "")) AS genres
+    }
+    CALL {
+        WITH m
+        OPTIONAL MATCH (u:User)-[r:RATED]->(m)
+        RETURN AVG(toFloat(r.rating)) AS avg_rating,
+               COUNT(r) AS rating_count%s
+    }
+
+    RETURN
+        m.movieId AS id,
+        COALESCE(m.title, "Unknown") AS title,
+        COALESCE(m.year, "Unknown") AS year,
+        COALESCE(m.plot, "No plot available") AS plot,
+        COALESCE(m.languages, "Unknown") AS languages,
+        COALESCE(m.countries, "Unknown") AS countries,
+        actors,
+        directors,
+        genres,
+        %s AS user_ratings,
+        avg_rating,
+        rating_count
+    """
+
+USER_RATINGS_COLLECTION = """,
+               COLLECT(DISTINCT {id: u.userId, name: u.name}) AS user_ratings"""
+
+def movie_info_query(include_user_ratings=True):
+    """The movie query, with or without the (potentially large) list of users who rated it."""
+    if include_user_ratings:
+        return MOVIE_INFO_QUERY % (USER_RATINGS_COLLECTION, "user_ratings")
+    return MOVIE_INFO_QUERY % ("", "[]")
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import threading
+import numpy as np
+
+# On-disk layout of a movie store (a single file, so it can be swapped atomically):
+#   [record 0][record 1]...[record n-1]   UTF-8 JSON, one record per movie
+#   [offsets]                             n+1 little-endian int64 byte offsets
+#   [keys]                                n little-endian int64 FAISS ids, ascending
+#   [n]                                   little-endian int64 record count
+# The file is opened with mmap, so every worker on the machine shares the same
+# pages through the OS cache and only decodes the records it actually returns.
+
+_INT64 = np.dtype("<i8")
+
+
+def movie_key(movie_id):
+    """Maps a Neo4j movieId to the int64 id used in the FAISS index."""
+    try:
+        return int(movie_id)
+    except (TypeError, ValueError):
+        digest = hashlib.blake2b(str(movie_id).encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "little") & 0x7FFFFFFFFFFFFFFF
+
+
+def write_movie_store(movies, path, keys=None):
+    """Writes movies to an offset-indexed store, replacing any previous one atomically.
+
+    keys are the FAISS ids of the movies; when omitted, a movie's key is its
+    position in the list (the layout of an index built without IndexIDMap).
+    """
+    keys = np.arange(len(movies), dtype=_INT64) if keys is None else np.asarray(keys, dtype=_INT64)
+    order = np.argsort(keys, kind="stable")
+    offsets = np.zeros(len(movies) + 1, dtype=_INT64)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        for i, pos in enumerate(order):
+            record = json.dumps(movies[pos], ensure_ascii=False, default=str).encode("utf-8")
+            f.write(record)
+            offsets[i + 1] = offsets[i] + len(record)
+        f.write(offsets.tobytes())
+        f.write(keys[order].tobytes())
+        f.write(np.array([len(movies)], dtype=_INT64).tobytes())
+
+    os.replace(tmp_path, path)
+
+
+def convert_pickle_store(pickle_path, path, keyed=True):
+    """Builds the movie store from a movies_list.pkl.
+
+    keyed=True keys the records by movieId, matching an IndexIDMap built by
+    rebuild_faiss; keyed=False keys them by position, for an older index
+    without ids.
+    """
+    with open(pickle_path, "rb") as f:
+        movies = pickle.load(f)
+    keys = [movie_key(m["id"]) for m in movies] if keyed else None
+    write_movie_store(movies, path, keys=keys)
+    return len(movies)
+
+
+class MovieStore:
+    """Read-only, memory-mapped view of a movie store; records are decoded on demand."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+        self._data = None
+        self._offsets = None
+        self._keys = None
+        self._version = None
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def _open(self):
+        """Maps the store, re-mapping it if the file was replaced by a rebuild."""
+        st = os.stat(self.path)
+        version = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if version == self._version:
+            return
+
+        with self._lock:
+            if version == self._version:
+                return
+            f = open(self.path, "rb")
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            n = int(np.frombuffer(data, dtype=_INT64, count=1, offset=len(data) - 8)[0])
+            keys_start = len(data) - 8 - n * 8
+            offsets_start = keys_start - (n + 1) * 8
+
+            # Older mappings stay valid for readers still holding them; they are
+            # released once the last reference goes away.
+            self._file, self._data = f, data
+            self._offsets = np.frombuffer(data, dtype=_INT64, count=n + 1, offset=offsets_start)
+            self._keys = np.frombuffer(data, dtype=_INT64, count=n, offset=keys_start)
+            self._version = version
+
+    def _read(self, data, offsets, idx):
+        if idx < 0 or idx >= len(offsets) - 1:
+            raise IndexError(f"Movie index {idx} out of range")
+        start, end = int(offsets[idx]), int(offsets[idx + 1])
+        return json.loads(data[start:end].decode("utf-8"))
+
+    def __len__(self):
+        self._open()
+        return len(self._offsets) - 1
+
+    def __getitem__(self, idx):
+        self._open()
+        return self._read(self._data, self._offsets, idx)
+
+    def get_many(self, indices):
+        """Returns the records for the given row positions, in order."""
+        self._open()
+        data, offsets = self._data, self._offsets
+        return [self._read(data, offsets, int(i)) for i in indices]
+
+    def get_by_keys(self, keys):
+        """Returns the records for the given FAISS ids, in order, skipping unknown ids."""
+        self._open()
+        data, offsets, store_keys = self._data, self._offsets, self._keys
+        keys = np.asarray(keys, dtype=_INT64)
+        positions = np.searchsorted(store_keys, keys)
+        return [
+            self._read(data, offsets, int(pos))
+            for key, pos in zip(keys, positions)
+            if pos < len(store_keys) and store_keys[pos] == key
+        ]
+
+    def keys(self):
+        self._open()
+        return self._keys
+
+    def __iter__(self):
+        self._open()
+        data, offsets = self._data, self._offsets
+        for i in range(len(offsets) - 1):
+            yield self._read(data, offsets, i)
@@ -1,45 +1,68 @@
-from DAL.db_config import driver  
-
-def get_movie_info(movie_ids):
-    """Retrieve movie details efficiently using Neo4j."""
-    query = """
-    MATCH (m:Movie)
-    WHERE m.movieId IN $movie_ids
-
-    OPTIONAL MATCH (m)<-[:ACTED_IN]-(a:Actor)
-    OPTIONAL MATCH (m)<-[:DIRECTED]-(d:Director)
-    OPTIONAL MATCH (m)-[:IN_GENRE]->(g:Genre)
-    OPTIONAL MATCH (u:User)-[r:RATED]->(m)
-
-    RETURN 
-        m.movieId AS id,
-        COALESCE(m.title, "Unknown") AS title,
-        COALESCE(m.year, "Unknown") AS year,
-        COALESCE(m.plot, "No plot available") AS plot,
-        COALESCE(m.languages, "Unknown") AS languages,
-        COALESCE(m.countries, "Unknown") AS countries,
-        COLLECT(DISTINCT COALESCE(a.name, "")) AS actors,
-        COLLECT(DISTINCT COALESCE(d.name, "")) AS directors,
-        COLLECT(DISTINCT COALESCE(g.name, "")) AS genres,
-        COLLECT(DISTINCT {id: u.userId, name: u.name}) AS user_ratings,
-        AVG(toFloat(r.rating)) AS avg_rating
+import config.settings as settings
+from DAL.db_config import execute_read, execute_read_async
+from DAL.movie_queries import movie_info_query
+
+def _to_movie(record):
+    return {
+        "id": record["id"],
+        "title": record["title"],
+        "year": record["year"],
+        "plot": record["plot"],
+        "languages": record["languages"],
+        "countries": record["countries"],
+        "actors": record["actors"],
+        "directors": record["directors"],
+        "genres": record["genres"],
+        "user_ratings": record["user_ratings"],
+        "avg_rating": record["avg_rating"] if record["avg_rating"] else 0.0,
+        "rating_count": record["rating_count"]
+    }
+
+def _fetch_movies(tx, movie_ids, include_user_ratings):
+    query = movie_info_query(include_user_ratings)
+    return [_to_movie(record) for record in tx.run(query, movie_ids=movie_ids)]
+
+async def _fetch_movies_async(tx, movie_ids, include_user_ratings):
+    result = await tx.run(movie_info_query(include_user_ratings), movie_ids=movie_ids)
+    return [_to_movie(record) async for record in result]
+
+def _split_by_query(list_of_id_lists, movies):
+    by_id = {m["id"]: m for m in movies}
+    return [[by_id[i] for i in ids if i in by_id] for ids in list_of_id_lists]
+
+def _union(list_of_id_lists):
+    return list(dict.fromkeys(i for ids in list_of_id_lists for i in ids))
+
+def get_movie_info(movie_ids, include_user_ratings=settings.INCLUDE_USER_RATINGS):
+    """Retrieve movie details efficiently using Neo4j.
+
+    With include_user_ratings=False the per-user rating list is skipped
+    (user_ratings is empty); avg_rating and rating_count are always returned.
     """
+    return execute_read(
+        _fetch_movies, movie_ids=_union([movie_ids]), include_user_ratings=include_user_ratings
+    )
+
+def get_movie_info_many(list_of_id_lists, include_user_ratings=settings.INCLUDE_USER_RATINGS):
+    """Retrieve movie details for several queries in one round trip.
+
+    Movies shared between queries are fetched once; the result has one list
+    per input list, in the same order.
+    """
+    movies = execute_read(
+        _fetch_movies, movie_ids=_union(list_of_id_lists), include_user_ratings=include_user_ratings
+    )
+    return _split_by_query(list_of_id_lists, movies)
+
+async def get_movie_info_async(movie_ids, include_user_ratings=settings.INCLUDE_USER_RATINGS):
+    """Async variant of get_movie_info for the FastAPI handlers."""
+    return await execute_read_async(
+        _fetch_movies_async, movie_ids=_union([movie_ids]), include_user_ratings=include_user_ratings
+    )
 
-    with driver.session() as session:
-        result = session.run(query, movie_ids=movie_ids)
-        return [
-            {
-                "id": record["id"],
-                "title": record["title"],
-                "year": record["year"],
-                "plot": record["plot"],
-                "languages": record["languages"],
-                "countries": record["countries"],
-                "actors": record["actors"],
-                "directors": record["directors"],
-                "genres": record["genres"],
-                "user_ratings": record["user_ratings"],
-                "avg_rating": record["avg_rating"] if record["avg_rating"] else 0.0 
-            }
-            for record in result
-        ]
+async def get_movie_info_many_async(list_of_id_lists, include_user_ratings=settings.INCLUDE_USER_RATINGS):
+    """Async variant of get_movie_info_many."""
+    movies = await execute_read_async(
+        _fetch_movies_async, movie_ids=_union(list_of_id_lists), include_user_ratings=include_user_ratings
+    )
+    return _split_by_query(list_of_id_lists, movies)
@@ -4,12 +4,10 @@ import matplotlib.pyplot as plt
 from pyvis.network import Network
 import streamlit.components.v1 as components
 import tempfile
-import sys
+import json
 import os
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from BLL.ai_processor import generate_response
 
-API_URL = "http://127.0.0.1:8000/ask"
+API_URL = "http://127.0.0.1:8000/ask/stream"
 
 # Track chat history
 if "chat_history" not in st.session_state:
@@ -19,83 +17,108 @@ if "chat_history" not in st.session_state:
 st.set_page_config(page_title="🎬 MovieGraphRAG", layout="wide")
 st.title("🧠 GraphRAG: Ask anything about movies")
 
+def iter_sse(response):
+    """Yields (event, data) pairs from a server-sent events response as they arrive."""
+    event, data = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data.append(line[len("data:"):].strip())
+
+def render_graph(movies):
+    """Draws the movies with their actors and directors as an interactive network."""
+    st.markdown("### 🌐 Graph View of Relationships")
+
+    # Create and configure network
+    net = Network(height="500px", width="100%", bgcolor="#222222", 
+                font_color="white", directed=True)
+
+    # Add nodes and edges
+    added_nodes = set() 
+
+    # Ensure edges are always added, even if nodes already exist
+    for m in movies:
+        movie_id = m["title"].replace(" ", "_")  
+        net.add_node(movie_id, label=m["title"], title="Movie", color="#00ff1e", size=25)
+
+        # Add actors & edges
+        for actor in m.get("actors", []):
+            actor_id = actor.replace(" ", "_")
+            if actor_id not in added_nodes:
+                net.add_node(actor_id, label=actor, title="Actor", color="#ffa500", size=20)
+                added_nodes.add(actor_id)
+            net.add_edge(actor_id, movie_id, title="ACTED_IN") 
+
+        # Add directors & edges
+        for director in m.get("directors", []):
+            dir_id = director.replace(" ", "_")
+            if dir_id not in added_nodes:
+                net.add_node(dir_id, label=director, title="Director", color="#ff0000", size=20)
+                added_nodes.add(dir_id)
+            net.add_edge(dir_id, movie_id, title="DIRECTED")  
+
+    # Save and display the graph
+    try:
+        # Save graph
+        tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.html')
+        net.save_graph(tmp_file.name)
+        tmp_file.close()  # Close before reading
+
+        # Read & render
+        with open(tmp_file.name, 'r', encoding='utf-8') as f:
+            html = f.read()
+        st.components.v1.html(html, height=500)
+
+        # Cleanup
+        os.remove(tmp_file.name)
+    except Exception as e:
+        st.warning(f"⚠️ Graph visualization failed: {str(e)}")
+
 query = st.text_input("What would you like to know?", placeholder="e.g. What is the plot of Inception?")
 
 if st.button("Ask"):
     if not query:
         st.warning("⚠️ Please enter a question!")
     else:
+        response = {"movies": []}
+        answer = ""
+        placeholder = None
         with st.spinner("Thinking..."):
-            response = requests.get(API_URL, params={"query": query}).json()
-            answer = generate_response(response, query)
-            
-            # Visual flags
-            show_graph = "<SHOW_GRAPH>" in answer or len(response.get("movies", [])) > 0
-            print(show_graph)
-                                    
-            if show_graph:
-                st.markdown("### 🌐 Graph View of Relationships")
-                
-                # Create and configure network
-                net = Network(height="500px", width="100%", bgcolor="#222222", 
-                            font_color="white", directed=True)
-                
-                # Add nodes and edges
-                added_nodes = set() 
-
-                # Ensure edges are always added, even if nodes already exist
-                for m in response["movies"]:
-                    movie_id = m["title"].replace(" ", "_")  
-                    net.add_node(movie_id, label=m["title"], title="Movie", color="#00ff1e", size=25)
-
-                    # Add actors & edges
-                    for actor in m.get("actors", []):
-                        actor_id = actor.replace(" ", "_")
-                        if actor_id not in added_nodes:
-                            net.add_node(actor_id, label=actor, title="Actor", color="#ffa500", size=20)
-                            added_nodes.add(actor_id)
-                        net.add_edge(actor_id, movie_id, title="ACTED_IN") 
-
-                    # Add directors & edges
-                    for director in m.get("directors", []):
-                        dir_id = director.replace(" ", "_")
-                        if dir_id not in added_nodes:
-                            net.add_node(dir_id, label=director, title="Director", color="#ff0000", size=20)
-                            added_nodes.add(dir_id)
-                        net.add_edge(dir_id, movie_id, title="DIRECTED")  
-
-                # Save and display the graph
-                try:
-                    # Save graph
-                    tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.html')
-                    net.save_graph(tmp_file.name)
-                    tmp_file.close()  # Close before reading
-
-                    # Read & render
-                    with open(tmp_file.name, 'r', encoding='utf-8') as f:
-                        html = f.read()
-                    st.components.v1.html(html, height=500)
-
-                    # Cleanup
-                    os.remove(tmp_file.name)
-                except Exception as e:
-                    st.warning(f"⚠️ Graph visualization failed: {str(e)}")
-            
-            # Display the answer without visualization tags
-            clean_answer = answer.replace("<SHOW_GRAPH>", "")
-
-            st.markdown("### 🤖 AI Response:")
-            st.write(clean_answer)
-
-            # Optional: Show raw structured data
-            with st.expander("🔎 Show Structured Graph Data"):
-                st.json(response)
-
-            # Save to history
-            st.session_state.chat_history.append({
-                "query": query,
-                "answer": answer
-            })
+            with requests.get(API_URL, params={"query": query}, stream=True) as stream:
+                stream.raise_for_status()
+                for event, data in iter_sse(stream):
+                    if event == "context":
+                        # The movies arrive before the first token: draw the graph right away
+                        response = data
+                        if response.get("movies"):
+                            render_graph(response["movies"])
+                        st.markdown("### 🤖 AI Response:")
+                        placeholder = st.empty()
+                    elif event == "token":
+                        answer += data["text"]
+                        placeholder.markdown(answer.replace("<SHOW_GRAPH>", "") + " ▌")
+                    elif event == "error":
+                        st.error(f"⚠️ Answer generation failed: {data['detail']}")
+
+        # Display the answer without visualization tags
+        clean_answer = answer.replace("<SHOW_GRAPH>", "")
+        if placeholder is not None:
+            placeholder.markdown(clean_answer)
+
+        # Optional: Show raw structured data
+        with st.expander("🔎 Show Structured Graph Data"):
+            st.json(response)
+
+        # Save to history
+        st.session_state.chat_history.append({
+            "query": query,
+            "answer": answer
+        })
 
 # Show chat history
 with st.expander("🗂️ Chat History"):
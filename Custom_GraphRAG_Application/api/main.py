@@ -1,10 +1,54 @@
+import json
 from fastapi import FastAPI
-from BLL.retrieval import retrieve_context
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
+from BLL.ai_processor import generate_response_stream
+from BLL.retrieval import context_batcher, result_cache, retrieve_context_async
+from DAL.db_config import session_metrics
 
 app = FastAPI()
 
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def _answer_events(query):
+    # Everything after the 200 response has started is reported in the stream:
+    # a failed retrieval or generation sends `error`, and `done` always ends it
+    try:
+        movies = await retrieve_context_async(query)
+        yield _sse("context", {"movies": movies})
+        # Ollama's client is synchronous; pull each chunk in a worker thread
+        async for chunk in iterate_in_threadpool(generate_response_stream({"movies": movies}, query)):
+            yield _sse("token", {"text": chunk})
+    except Exception as e:
+        yield _sse("error", {"detail": str(e)})
+    yield _sse("done", {})
+
 @app.get("/ask")
-def ask_question(query: str):
+async def ask_question(query: str):
     """Handles user queries & fetches relevant information in a structured format."""
-    response = retrieve_context(query)
+    response = await retrieve_context_async(query)
     return {"movies": response}
+
+@app.get("/ask/stream")
+async def ask_question_stream(query: str):
+    """Streams the retrieved movies, then the LLM answer token by token, as server-sent events.
+
+    Events: `context` ({"movies": [...]}), any number of `token` ({"text": ...}),
+    then `done`. If retrieval or generation fails, `error` ({"detail": ...})
+    is sent before `done`.
+    """
+    return StreamingResponse(
+        _answer_events(query),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/metrics")
+def metrics():
+    """Neo4j session concurrency, /ask batching and result cache statistics."""
+    return {
+        "neo4j_sessions": session_metrics.snapshot(),
+        "ask_batching": context_batcher.stats(),
+        "result_cache": result_cache.stats(),
+    }
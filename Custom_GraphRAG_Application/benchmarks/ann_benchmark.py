@@ -0,0 +1,135 @@
+"""Offline benchmark of the FAISS index types used by rebuild_faiss.
+
+Builds each index type over synthetic, clustered, L2-normalised vectors and
+reports recall@k against the exact flat index plus p50/p99 single-query
+search latency. No Neo4j, model download or network access is needed.
+
+Usage (from the Custom_GraphRAG_Application folder):
+    python -m benchmarks.ann_benchmark --rows 50000,500000
+    python -m benchmarks.ann_benchmark --rows 5000000 --types ivf_pq,hnsw --nlist 4096
+
+5M rows of 384-d float32 need about 7.7 GB per uncompressed index
+(flat, IVF-Flat, HNSW); IVF-PQ with pq_m=48 needs about 0.3 GB.
+"""
+import argparse
+import time
+import faiss
+import numpy as np
+from faiss_index_factory import INDEX_TYPES, create_index, set_search_params
+
+DIMENSION = 384  # all-MiniLM-L6-v2
+CHUNK_ROWS = 100_000
+
+
+def _centers(n_clusters, dimension, seed):
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((n_clusters, dimension)).astype("float32")
+
+
+def synthetic_chunks(n_rows, centers, seed, noise=0.6):
+    """Yields the dataset in chunks; the same seed always yields the same rows."""
+    for start in range(0, n_rows, CHUNK_ROWS):
+        rows = min(CHUNK_ROWS, n_rows - start)
+        rng = np.random.default_rng((seed, start))
+        labels = rng.integers(0, len(centers), size=rows)
+        x = centers[labels] + noise * rng.standard_normal((rows, centers.shape[1]), dtype="float32")
+        x /= np.linalg.norm(x, axis=1, keepdims=True)
+        yield x
+
+
+def training_sample(n_rows, centers, seed, train_sample):
+    """Draws the training sample from the first chunks of the dataset."""
+    parts, taken = [], 0
+    for chunk in synthetic_chunks(n_rows, centers, seed):
+        parts.append(chunk[: train_sample - taken])
+        taken += len(parts[-1])
+        if taken >= train_sample:
+            break
+    return np.concatenate(parts)
+
+
+def build(index_type, n_rows, centers, seed, args):
+    index = create_index(
+        DIMENSION, index_type, "ip", n_train=min(n_rows, args.train_sample),
+        nlist=args.nlist, pq_m=args.pq_m, pq_nbits=args.pq_nbits,
+        hnsw_m=args.hnsw_m, ef_construction=args.ef_construction,
+    )
+    start = time.perf_counter()
+    if not index.is_trained:
+        index.train(training_sample(n_rows, centers, seed, args.train_sample))
+    for chunk in synthetic_chunks(n_rows, centers, seed):
+        index.add(chunk)
+    set_search_params(index, nprobe=args.nprobe, ef_search=args.ef_search)
+    return index, time.perf_counter() - start
+
+
+def search_latencies(index, queries, k):
+    """Runs one query at a time, as the API does, and returns results and latencies in ms."""
+    results = np.empty((len(queries), k), dtype="int64")
+    latencies = np.empty(len(queries))
+    for i in range(len(queries)):
+        start = time.perf_counter()
+        _, I = index.search(queries[i:i + 1], k)
+        latencies[i] = (time.perf_counter() - start) * 1000
+        results[i] = I[0]
+    return results, latencies
+
+
+def recall_at_k(found, truth):
+    hits = sum(len(np.intersect1d(f[f >= 0], t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def run(n_rows, args):
+    centers = _centers(args.clusters, DIMENSION, args.seed)
+    queries = next(synthetic_chunks(args.queries, centers, args.seed + 1))
+
+    flat, build_s = build("flat", n_rows, centers, args.seed, args)
+    truth, latencies = search_latencies(flat, queries, args.k)
+    rows = [("flat", build_s, 1.0, latencies)]
+    del flat
+
+    for index_type in args.types:
+        if index_type == "flat":
+            continue
+        index, build_s = build(index_type, n_rows, centers, args.seed, args)
+        found, latencies = search_latencies(index, queries, args.k)
+        rows.append((index_type, build_s, recall_at_k(found, truth), latencies))
+        del index
+
+    print(f"\n{n_rows:,} rows, {args.queries} queries, k={args.k}, "
+          f"nlist={args.nlist}, nprobe={args.nprobe}, efSearch={args.ef_search}")
+    print(f"{'index':<10}{'build s':>10}{'recall@k':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for index_type, build_s, recall, latencies in rows:
+        print(f"{index_type:<10}{build_s:>10.1f}{recall:>10.3f}"
+              f"{np.percentile(latencies, 50):>10.3f}{np.percentile(latencies, 99):>10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", default="50000,500000", help="comma-separated dataset sizes")
+    parser.add_argument("--types", default=",".join(INDEX_TYPES), help="comma-separated index types")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--clusters", type=int, default=2000)
+    parser.add_argument("--train-sample", type=int, default=100_000)
+    parser.add_argument("--nlist", type=int, default=1024)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--pq-m", type=int, default=48)
+    parser.add_argument("--pq-nbits", type=int, default=8)
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--ef-construction", type=int, default=200)
+    parser.add_argument("--ef-search", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=0, help="OpenMP threads (0 = FAISS default)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    args.types = [t.strip() for t in args.types.split(",") if t.strip()]
+
+    if args.threads:
+        faiss.omp_set_num_threads(args.threads)
+    for n_rows in (int(r) for r in args.rows.split(",")):
+        run(n_rows, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Stand-in for the Ollama chat API, for measuring streaming latency offline.
+
+Answers every POST /api/chat with a canned reply, streamed as Ollama's
+newline-delimited JSON chunks (or as one response when "stream" is false).
+The delay before the first token and between tokens is configurable, so the
+time-to-first-token of /ask/stream can be measured without a GPU or model.
+
+    python -m benchmarks.fake_ollama_server --port 11435 --first-token-ms 400 --token-ms 25
+    OLLAMA_HOST=http://127.0.0.1:11435 uvicorn api.main:app
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_ANSWER = (
+    "<SHOW_GRAPH> Here is what I found in the movie graph. "
+    "1. *Inception* (2010) was directed by Christopher Nolan and stars Leonardo DiCaprio. "
+    "It follows a thief who steals secrets by entering the dreams of his targets. "
+    "2. *Interstellar* (2014), also by Christopher Nolan, is a science fiction film about "
+    "a team of explorers travelling through a wormhole in search of a new home for humanity."
+)
+
+
+def tokens(text, n_tokens):
+    """Splits text into word-sized chunks (keeping the spaces), repeated up to n_tokens."""
+    words = [w + " " for w in text.split(" ")]
+    return [words[i % len(words)] for i in range(n_tokens or len(words))]
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # otherwise small token writes wait for delayed ACKs
+    config = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _chunk(self, content, done):
+        return {
+            "model": self.model,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "message": {"role": "assistant", "content": content},
+            "done": done,
+        }
+
+    def do_POST(self):
+        if self.path != "/api/chat":
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        self.model = body.get("model", "llama3")
+        parts = tokens(CANNED_ANSWER, self.config.tokens)
+
+        time.sleep(self.config.first_token_ms / 1000)
+        if not body.get("stream", True):
+            payload = json.dumps(self._chunk("".join(parts), True)).encode()
+            time.sleep(self.config.token_ms * (len(parts) - 1) / 1000)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, part in enumerate(parts):
+            if i:
+                time.sleep(self.config.token_ms / 1000)
+            self._write_chunk(self._chunk(part, False))
+        self._write_chunk(self._chunk("", True))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, obj):
+        line = (json.dumps(obj) + "\n").encode()
+        self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+        self.wfile.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--first-token-ms", type=float, default=300, help="delay before the first token")
+    parser.add_argument("--token-ms", type=float, default=30, help="delay between tokens")
+    parser.add_argument("--tokens", type=int, default=0, help="answer length in tokens (0 = canned answer once)")
+    args = parser.parse_args()
+
+    FakeOllamaHandler.config = args
+    server = ThreadingHTTPServer((args.host, args.port), FakeOllamaHandler)
+    print(f"Fake Ollama listening on http://{args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
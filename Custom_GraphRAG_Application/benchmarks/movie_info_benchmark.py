@@ -0,0 +1,254 @@
+"""Micro-benchmark of the get_movie_info Cypher: chained OPTIONAL MATCHes vs subqueries.
+
+The previous query chained four OPTIONAL MATCHes, so each movie produced
+actors x directors x genres x ratings intermediate rows before aggregation.
+The current query (DAL.movie_queries.MOVIE_INFO_QUERY) computes each
+collection in its own CALL {} subquery: actors + directors + genres + ratings.
+
+Two modes:
+
+* Simulation (default, no database needed): replays both access patterns in
+  Python over a synthetic catalogue with a long-tailed rating distribution and
+  counts the intermediate rows each one would materialise. It never runs the
+  Cypher, so its row counts are a model of the two plans, not a measurement;
+  it reports no timings.
+
+      python -m benchmarks.movie_info_benchmark --movies 20
+
+* Neo4j test container: seeds the same synthetic catalogue into a throwaway
+  database and runs the legacy query and the queries from DAL.movie_queries
+  with PROFILE, reporting operator rows, db hits and latency, and checks that
+  they return the same movies. These are the measured numbers.
+
+      docker run --rm -p 7687:7687 -e NEO4J_AUTH=neo4j/benchmark neo4j:5
+      python -m benchmarks.movie_info_benchmark --neo4j-uri bolt://localhost:7687 \\
+          --neo4j-password benchmark --seed-graph
+
+  --seed-graph deletes everything in the target database first; never point
+  it at a real instance.
+"""
+import argparse
+import itertools
+import random
+import statistics
+import time
+from DAL.movie_queries import movie_info_query
+
+# The query get_movie_info ran before the subqueries, copied verbatim
+LEGACY_MOVIE_INFO_QUERY = """
+    MATCH (m:Movie)
+    WHERE m.movieId IN $movie_ids
+
+    OPTIONAL MATCH (m)<-[:ACTED_IN]-(a:Actor)
+    OPTIONAL MATCH (m)<-[:DIRECTED]-(d:Director)
+    OPTIONAL MATCH (m)-[:IN_GENRE]->(g:Genre)
+    OPTIONAL MATCH (u:User)-[r:RATED]->(m)
+
+    RETURN 
+        m.movieId AS id,
+        COALESCE(m.title, "Unknown") AS title,
+        COALESCE(m.year, "Unknown") AS year,
+        COALESCE(m.plot, "No plot available") AS plot,
+        COALESCE(m.languages, "Unknown") AS languages,
+        COALESCE(m.countries, "Unknown") AS countries,
+        COLLECT(DISTINCT COALESCE(a.name, "")) AS actors,
+        COLLECT(DISTINCT COALESCE(d.name, "")) AS directors,
+        COLLECT(DISTINCT COALESCE(g.name, "")) AS genres,
+        COLLECT(DISTINCT {id: u.userId, name: u.name}) AS user_ratings,
+        AVG(toFloat(r.rating)) AS avg_rating
+    """
+
+
+def synthetic_catalogue(n_movies, max_ratings, seed):
+    """Movies with a handful of actors/directors/genres and Pareto-distributed rating counts."""
+    rng = random.Random(seed)
+    movies = []
+    for i in range(n_movies):
+        n_ratings = min(max_ratings, int(rng.paretovariate(1.1) * 20))
+        movies.append({
+            "id": str(i),
+            "actors": [f"Actor {rng.randrange(5000)}" for _ in range(rng.randint(3, 12))],
+            "directors": [f"Director {rng.randrange(1000)}" for _ in range(rng.randint(1, 2))],
+            "genres": rng.sample([f"Genre {g}" for g in range(20)], rng.randint(1, 4)),
+            "ratings": [(f"user{rng.randrange(100000)}", rng.randint(1, 5)) for _ in range(n_ratings)],
+        })
+    return movies
+
+
+# Simulation: replay both plans row by row, without a database
+
+def _legacy_plan(movie):
+    """Cartesian product of the four OPTIONAL MATCHes, then one aggregation."""
+    actors, directors, genres, users, ratings = set(), set(), set(), set(), []
+    rows = 0
+    for a, d, g, (u, rating) in itertools.product(
+        movie["actors"] or [None], movie["directors"] or [None],
+        movie["genres"] or [None], movie["ratings"] or [(None, None)],
+    ):
+        rows += 1
+        actors.add(a or "")
+        directors.add(d or "")
+        genres.add(g or "")
+        users.add(u)
+        if rating is not None:
+            ratings.append(rating)
+    # AVG over the product counts every rating (actors x directors x genres) times
+    avg = sum(ratings) / len(ratings) if ratings else None
+    return rows, (actors, directors, genres, users, avg)
+
+
+def _subquery_plan(movie, include_user_ratings):
+    """One pass per collection, each aggregated on its own."""
+    rows = 0
+    collected = []
+    for collection in ("actors", "directors", "genres"):
+        values = movie[collection] or [None]
+        rows += len(values)
+        collected.append(set(v or "" for v in values))
+    ratings = movie["ratings"] or [(None, None)]
+    rows += len(ratings)
+    users = set(u for u, _ in ratings) if include_user_ratings else set()
+    scores = [r for _, r in ratings if r is not None]
+    avg = sum(scores) / len(scores) if scores else None
+    return rows, (*collected, users, avg)
+
+
+def run_simulation(args):
+    movies = synthetic_catalogue(args.movies, args.max_ratings, args.seed)
+    print(f"Simulation (no database, Cypher not executed): {len(movies)} movies, "
+          f"ratings per movie min/median/max = {min(len(m['ratings']) for m in movies)}/"
+          f"{int(statistics.median(len(m['ratings']) for m in movies))}/"
+          f"{max(len(m['ratings']) for m in movies)}")
+
+    plans = [
+        ("chained OPTIONAL MATCH", _legacy_plan),
+        ("CALL {} subqueries", lambda m: _subquery_plan(m, True)),
+        ("subqueries, no user_ratings", lambda m: _subquery_plan(m, False)),
+    ]
+    print(f"{'plan':<30}{'simulated rows':>16}")
+    results = {}
+    for name, plan in plans:
+        outputs = [plan(m) for m in movies]
+        results[name] = [result for _, result in outputs]
+        print(f"{name:<30}{sum(rows for rows, _ in outputs):>16,}")
+
+    legacy, subqueries = results["chained OPTIONAL MATCH"], results["CALL {} subqueries"]
+    same = all(
+        old[:4] == new[:4] and (old[4] is None) == (new[4] is None)
+        and (old[4] is None or abs(old[4] - new[4]) < 1e-9)
+        for old, new in zip(legacy, subqueries)
+    )
+    print("Both plans return the same collections and averages." if same else "Plans disagree!")
+    print("Run with --neo4j-uri to measure the actual queries.")
+
+
+# Neo4j test container
+
+def _seed(session, movies):
+    session.run("MATCH (n) DETACH DELETE n").consume()
+    session.run("CREATE INDEX movie_id IF NOT EXISTS FOR (m:Movie) ON (m.movieId)").consume()
+    for m in movies:
+        session.run(
+            """
+            CREATE (mv:Movie {movieId: $id, title: 'Movie ' + $id})
+            FOREACH (name IN $actors | MERGE (a:Actor {name: name}) CREATE (a)-[:ACTED_IN]->(mv))
+            FOREACH (name IN $directors | MERGE (d:Director {name: name}) CREATE (d)-[:DIRECTED]->(mv))
+            FOREACH (name IN $genres | MERGE (g:Genre {name: name}) CREATE (mv)-[:IN_GENRE]->(g))
+            FOREACH (r IN $ratings |
+                MERGE (u:User {userId: r[0]}) ON CREATE SET u.name = r[0]
+                CREATE (u)-[:RATED {rating: r[1]}]->(mv))
+            """,
+            id=m["id"], actors=m["actors"], directors=m["directors"], genres=m["genres"],
+            ratings=[[u, r] for u, r in m["ratings"]],
+        ).consume()
+
+
+def _profile_totals(plan):
+    rows, db_hits = plan.get("rows", 0), plan.get("dbHits", 0)
+    for child in plan.get("children", []):
+        child_rows, child_hits = _profile_totals(child)
+        rows += child_rows
+        db_hits += child_hits
+    return rows, db_hits
+
+
+def _movie_results(session, query, movie_ids):
+    """Collections and average rating per movie, as comparable sets."""
+    results = {}
+    for record in session.run(query, movie_ids=movie_ids):
+        results[record["id"]] = (
+            set(record["actors"]), set(record["directors"]), set(record["genres"]),
+            frozenset((user["id"], user["name"]) for user in record["user_ratings"]),
+            record["avg_rating"],
+        )
+    return results
+
+
+def _same_results(old, new, include_user_ratings):
+    if old.keys() != new.keys():
+        return False
+    for movie_id, (*old_sets, old_users, old_avg) in old.items():
+        *new_sets, new_users, new_avg = new[movie_id]
+        if old_sets != new_sets or (include_user_ratings and old_users != new_users):
+            return False
+        if (old_avg is None) != (new_avg is None) or (old_avg is not None and abs(old_avg - new_avg) > 1e-9):
+            return False
+    return True
+
+
+def run_neo4j(args):
+    from neo4j import GraphDatabase
+
+    movies = synthetic_catalogue(args.movies, args.max_ratings, args.seed)
+    movie_ids = [m["id"] for m in movies]
+    driver = GraphDatabase.driver(args.neo4j_uri, auth=(args.neo4j_user, args.neo4j_password))
+    with driver.session() as session:
+        if args.seed_graph:
+            print(f"Seeding {len(movies)} synthetic movies...")
+            _seed(session, movies)
+
+        queries = [
+            ("chained OPTIONAL MATCH", LEGACY_MOVIE_INFO_QUERY),
+            ("CALL {} subqueries", movie_info_query(True)),
+            ("subqueries, no user_ratings", movie_info_query(False)),
+        ]
+        print(f"{'query':<30}{'operator rows':>15}{'db hits':>12}{'p50 ms':>10}")
+        for name, query in queries:
+            summary = session.run("PROFILE " + query, movie_ids=movie_ids).consume()
+            rows, db_hits = _profile_totals(summary.profile)
+            latencies = []
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                session.run(query, movie_ids=movie_ids).consume()
+                latencies.append((time.perf_counter() - start) * 1000)
+            print(f"{name:<30}{rows:>15,}{db_hits:>12,}{statistics.median(latencies):>10.1f}")
+
+        legacy = _movie_results(session, LEGACY_MOVIE_INFO_QUERY, movie_ids)
+        same = all(
+            _same_results(legacy, _movie_results(session, movie_info_query(include), movie_ids), include)
+            for include in (True, False)
+        )
+        print("Both queries return the same collections and averages." if same else "Queries disagree!")
+    driver.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--movies", type=int, default=20, help="movies per get_movie_info call")
+    parser.add_argument("--max-ratings", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--neo4j-uri", help="bolt URI of a throwaway Neo4j test container")
+    parser.add_argument("--neo4j-user", default="neo4j")
+    parser.add_argument("--neo4j-password", default="benchmark")
+    parser.add_argument("--seed-graph", action="store_true", help="wipe the database and load synthetic data")
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.neo4j_uri:
+        run_neo4j(args)
+    else:
+        run_simulation(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Measures time-to-first-token of /ask/stream against the full answer time.
+
+Sends --requests questions with --concurrency in flight and reports, per
+request, when the context event arrived, when the first token arrived and
+when the stream finished. Point the API at benchmarks.fake_ollama_server to
+measure the pipeline without a model.
+
+    python -m benchmarks.stream_latency --url http://127.0.0.1:8000 --requests 20 --concurrency 4
+"""
+import argparse
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+
+def timed_stream(url, query):
+    """Returns (seconds to context, seconds to first token, seconds to done) for one question."""
+    start = time.perf_counter()
+    context_at = first_token_at = None
+    with requests.get(f"{url}/ask/stream", params={"query": query}, stream=True) as response:
+        response.raise_for_status()
+        event = None
+        for line in response.iter_lines(decode_unicode=True):
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                now = time.perf_counter() - start
+                if event == "context" and context_at is None:
+                    context_at = now
+                elif event == "token" and first_token_at is None:
+                    first_token_at = now
+                elif event == "error":
+                    raise RuntimeError(json.loads(line[len("data:"):])["detail"])
+    return context_at, first_token_at, time.perf_counter() - start
+
+
+def percentile(values, q):
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return float("nan")
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--query", default="Which movies did Christopher Nolan direct?")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        results = list(pool.map(lambda _: timed_stream(args.url, args.query), range(args.requests)))
+
+    print(f"{'stage':<20}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}")
+    for name, column in zip(("context", "first token", "full answer"), zip(*results)):
+        present = [v for v in column if v is not None]
+        mean = statistics.mean(present) * 1000 if present else float("nan")
+        print(f"{name:<20}{percentile(column, 0.5) * 1000:>10.1f}{percentile(column, 0.95) * 1000:>10.1f}{mean:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
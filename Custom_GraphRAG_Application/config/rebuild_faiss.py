@@ -1,12 +1,22 @@
+import argparse
+import hashlib
+import json
+import os
 import pickle
+import time
 import faiss
 from neo4j import GraphDatabase
 from sentence_transformers import SentenceTransformer
 import numpy as np
 import config.settings as settings  
+from DAL.movie_store import movie_key, write_movie_store
+from faiss_index_factory import build_index, set_search_params
+from embedding_cache import EmbeddingCache
 
 # Load Sentence Transformer model
-model = SentenceTransformer("all-MiniLM-L6-v2")
+MODEL_NAME = "all-MiniLM-L6-v2"
+model = SentenceTransformer(MODEL_NAME)
+embedding_cache = EmbeddingCache(settings.EMBEDDING_CACHE_PATH, MODEL_NAME, settings.EMBEDDING_CACHE_MEMORY_ITEMS)
 
 # Neo4j Connection
 NEO4J_URI = settings.NEO4J_URI
@@ -33,58 +43,182 @@ def get_movies(tx):
             COLLECT(DISTINCT coalesce(d.name, "")) AS directors,
             COLLECT(DISTINCT coalesce(g.name, "")) AS genres
 
+        ORDER BY id
         LIMIT 50000
     """
     # record.data() returns a dict of all returned fields
     return [record.data() for record in tx.run(query)]
 
-def rebuild_faiss():
+def movie_text(m):
+    """Builds the textual representation of a movie that gets embedded."""
+    # Safely handle None values
+    title = m.get("title", "")
+    plot = m.get("plot", "")
+    year = m.get("year", "")
+    actors = ", ".join(m.get("actors", []))
+    directors = ", ".join(m.get("directors", []))
+    genres = ", ".join(m.get("genres", []))
+    imdb_rating = m.get("imdbRating", "")
+    imdb_votes = m.get("imdbVotes", "")
+
+    # Combine everything into a single text block
+    movie_text = f"""
+    Title: {title}
+    Year: {year}
+    Plot: {plot}
+    Actors: {actors}
+    Directors: {directors}
+    Genres: {genres}
+    IMDb Rating: {imdb_rating}
+    IMDb Votes: {imdb_votes}
+    """
+    return movie_text.strip()
+
+def content_hash(text):
+    return hashlib.sha256(f"{MODEL_NAME}\n{text}".encode("utf-8")).hexdigest()
+
+def encode(texts):
+    """Encodes texts into normalized float32 embeddings, reusing cached ones."""
+    embeddings = embedding_cache.encode(model, texts, show_progress_bar=len(texts) > 100)
+    embeddings = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings.astype('float32')
+
+def fetch_movies():
     with driver.session() as session:
         movies = session.read_transaction(get_movies)
 
     if not movies:
         raise ValueError("No movies found! Check your Neo4j dataset.")
 
-    # Build a textual representation for each movie
-    texts = []
+    # One entry per FAISS id; movies without an ID cannot be looked up in Neo4j
+    unique, seen = [], set()
     for m in movies:
-        # Safely handle None values
-        title = m.get("title", "")
-        plot = m.get("plot", "")
-        year = m.get("year", "")
-        actors = ", ".join(m.get("actors", []))
-        directors = ", ".join(m.get("directors", []))
-        genres = ", ".join(m.get("genres", []))
-        imdb_rating = m.get("imdbRating", "")
-        imdb_votes = m.get("imdbVotes", "")
-
-        # Combine everything into a single text block
-        movie_text = f"""
-        Title: {title}
-        Year: {year}
-        Plot: {plot}
-        Actors: {actors}
-        Directors: {directors}
-        Genres: {genres}
-        IMDb Rating: {imdb_rating}
-        IMDb Votes: {imdb_votes}
-        """
-        texts.append(movie_text.strip())
+        if m.get("id") is None:
+            continue
+        key = movie_key(m["id"])
+        if key not in seen:
+            seen.add(key)
+            unique.append(m)
+    if len(unique) != len(movies):
+        print(f"Skipped {len(movies) - len(unique)} movies with a missing or duplicate movieId")
+    return unique
+
+def save_artifacts(index, movies, hashes):
+    """Writes the index, movie data and hash manifest, each swapped in atomically."""
+    # Save FAISS index (write then rename, so running workers never map a partial file)
+    tmp_index_path = f"{settings.FAISS_INDEX_PATH}.tmp"
+    faiss.write_index(index, tmp_index_path)
+    os.replace(tmp_index_path, settings.FAISS_INDEX_PATH)
+
+    # Save movie data (including IDs + all details)
+    with open(settings.MOVIES_PICKLE_PATH, "wb") as f:
+        pickle.dump(movies, f)
+    # Offset-indexed copy that the API reads on demand through mmap
+    write_movie_store(movies, settings.MOVIE_STORE_PATH, keys=[movie_key(m["id"]) for m in movies])
+
+    manifest = {"model": MODEL_NAME, "index_type": settings.FAISS_INDEX_TYPE, "hashes": hashes}
+    tmp_manifest_path = f"{settings.MOVIE_HASHES_PATH}.tmp"
+    with open(tmp_manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_manifest_path, settings.MOVIE_HASHES_PATH)
+
+    # New generation last, once everything it refers to is in place
+    tmp_generation_path = f"{settings.INDEX_GENERATION_PATH}.tmp"
+    with open(tmp_generation_path, "w", encoding="utf-8") as f:
+        f.write(str(time.time_ns()))
+    os.replace(tmp_generation_path, settings.INDEX_GENERATION_PATH)
+
+def load_previous_build():
+    """Returns (index, hashes) of the last build if it can be updated in place, else None."""
+    if not (os.path.exists(settings.FAISS_INDEX_PATH) and os.path.exists(settings.MOVIE_HASHES_PATH)):
+        return None
+
+    with open(settings.MOVIE_HASHES_PATH, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("model") != MODEL_NAME or manifest.get("index_type") != settings.FAISS_INDEX_TYPE:
+        print("Model or index type changed since the last build.")
+        return None
+
+    index = faiss.read_index(settings.FAISS_INDEX_PATH)
+    if not isinstance(index, faiss.IndexIDMap):
+        print("Existing index is not keyed by movieId.")
+        return None
+    return index, manifest["hashes"]
+
+def update_index(index, previous_hashes, movies, texts, hashes):
+    """Re-embeds only new or changed movies and swaps their vectors in by movieId.
+
+    Returns False if the index type cannot remove vectors (HNSW).
+    """
+    changed = [i for i, m in enumerate(movies) if previous_hashes.get(str(m["id"])) != hashes[str(m["id"])]]
+    removed_ids = [mid for mid in previous_hashes if mid not in hashes]
+    stale_ids = removed_ids + [str(movies[i]["id"]) for i in changed if str(movies[i]["id"]) in previous_hashes]
+
+    if stale_ids:
+        try:
+            index.remove_ids(np.array([movie_key(mid) for mid in stale_ids], dtype="int64"))
+        except RuntimeError as e:
+            print(f"Index cannot remove vectors ({e}).")
+            return False
+
+    if changed:
+        embeddings = encode([texts[i] for i in changed])
+        keys = np.array([movie_key(movies[i]["id"]) for i in changed], dtype="int64")
+        index.add_with_ids(embeddings, keys)
+
+    print(f"Incremental update: {len(changed)} new or changed, {len(removed_ids)} removed, "
+          f"{len(movies) - len(changed)} unchanged.")
+    return True
+
+def rebuild_faiss(incremental=False):
+    """Rebuilds the FAISS index from Neo4j.
+
+    With incremental=True, only movies whose content hash changed since the
+    last build are re-embedded; everything else is kept from the existing index.
+    """
+    movies = fetch_movies()
+
+    # Build a textual representation for each movie
+    texts = [movie_text(m) for m in movies]
+    hashes = {str(m["id"]): content_hash(text) for m, text in zip(movies, texts)}
+
+    if incremental:
+        previous = load_previous_build()
+        if previous is not None:
+            index, previous_hashes = previous
+            if update_index(index, previous_hashes, movies, texts, hashes):
+                set_search_params(index, nprobe=settings.FAISS_NPROBE, ef_search=settings.FAISS_EF_SEARCH)
+                save_artifacts(index, movies, hashes)
+                print("Successfully updated FAISS index!")
+                return
+        print("Falling back to a full rebuild.")
 
     # Encode with SentenceTransformer
-    embeddings = model.encode(texts, show_progress_bar=True)
-    # Normalize embeddings
-    embeddings = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    embeddings = encode(texts)
 
-    dimension = embeddings.shape[1]
-    index = faiss.IndexFlatIP(dimension)
-    index.add(embeddings.astype('float32'))
+    index = build_index(
+        embeddings,
+        index_type=settings.FAISS_INDEX_TYPE,
+        metric="ip",
+        train_sample=settings.FAISS_TRAIN_SAMPLE,
+        nlist=settings.FAISS_NLIST,
+        nprobe=settings.FAISS_NPROBE,
+        pq_m=settings.FAISS_PQ_M,
+        pq_nbits=settings.FAISS_PQ_NBITS,
+        hnsw_m=settings.FAISS_HNSW_M,
+        ef_construction=settings.FAISS_EF_CONSTRUCTION,
+        ef_search=settings.FAISS_EF_SEARCH,
+        ids=[movie_key(m["id"]) for m in movies],
+    )
 
-    # Save FAISS index
-    faiss.write_index(index, settings.FAISS_INDEX_PATH)
+    save_artifacts(index, movies, hashes)
 
-    # Save movie data (including IDs + all details)
-    with open("movies_list.pkl", "wb") as f:
-        pickle.dump(movies, f)
+    print(f"Embedding cache: {embedding_cache.stats()}")
+    print(f"Successfully rebuilt FAISS index ({settings.FAISS_INDEX_TYPE})!")
 
-    print("Successfully rebuilt FAISS index!")
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the movie FAISS index from Neo4j.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only re-embed movies that are new or changed since the last build")
+    args = parser.parse_args()
+    rebuild_faiss(incremental=args.incremental)
@@ -8,6 +8,45 @@ load_dotenv("config/.env")
 NEO4J_URI = os.getenv("NEO4J_URI")
 NEO4J_USER = os.getenv("NEO4J_USER")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
+NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "50"))
+NEO4J_MAX_CONNECTION_LIFETIME = int(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3600"))  # seconds
+NEO4J_CONNECTION_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_CONNECTION_ACQUISITION_TIMEOUT", "60"))  # seconds
+# Return the list of users who rated each movie (can be thousands of entries for popular movies)
+INCLUDE_USER_RATINGS = os.getenv("INCLUDE_USER_RATINGS", "true").lower() == "true"
 
 # FAISS Configuration
 FAISS_INDEX_PATH = "movie_index.faiss"
+# Memory-map the index instead of copying it into every worker's heap
+FAISS_USE_MMAP = os.getenv("FAISS_USE_MMAP", "true").lower() == "true"
+# Index type: flat (exact), ivf_flat, ivf_pq or hnsw
+FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "flat")
+FAISS_TRAIN_SAMPLE = int(os.getenv("FAISS_TRAIN_SAMPLE", "100000"))
+FAISS_NLIST = int(os.getenv("FAISS_NLIST", "1024"))
+FAISS_NPROBE = int(os.getenv("FAISS_NPROBE", "16"))
+FAISS_PQ_M = int(os.getenv("FAISS_PQ_M", "48"))
+FAISS_PQ_NBITS = int(os.getenv("FAISS_PQ_NBITS", "8"))
+FAISS_HNSW_M = int(os.getenv("FAISS_HNSW_M", "32"))
+FAISS_EF_CONSTRUCTION = int(os.getenv("FAISS_EF_CONSTRUCTION", "200"))
+FAISS_EF_SEARCH = int(os.getenv("FAISS_EF_SEARCH", "64"))
+
+# Embedding cache shared by rebuild_faiss and query encoding
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.sqlite")
+EMBEDDING_CACHE_MEMORY_ITEMS = int(os.getenv("EMBEDDING_CACHE_MEMORY_ITEMS", "10000"))
+
+# /ask micro-batching: concurrent queries arriving within the window share one encode + search
+ASK_BATCH_WINDOW_MS = float(os.getenv("ASK_BATCH_WINDOW_MS", "5"))
+ASK_BATCH_MAX_SIZE = int(os.getenv("ASK_BATCH_MAX_SIZE", "32"))
+
+# Movie data
+MOVIES_PICKLE_PATH = "movies_list.pkl"
+MOVIE_STORE_PATH = "movies_store.bin"
+# Content hash per movieId, used by incremental rebuilds
+MOVIE_HASHES_PATH = "movie_hashes.json"
+# Rewritten by every rebuild; cached /ask results from older generations are ignored
+INDEX_GENERATION_PATH = "index_generation.txt"
+
+# /ask result cache: "memory" (per worker) or "redis" (shared, needs REDIS_URL)
+RESULT_CACHE_BACKEND = os.getenv("RESULT_CACHE_BACKEND", "memory")
+RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", "300"))  # seconds
+RESULT_CACHE_MAX_ITEMS = int(os.getenv("RESULT_CACHE_MAX_ITEMS", "1000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
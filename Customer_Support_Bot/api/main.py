@@ -1,7 +1,13 @@
+import asyncio
+import json
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from llm.response_generator import query_llm
-from fastapi.responses import FileResponse
+from starlette.concurrency import iterate_in_threadpool
+from llm.response_generator import answer_cache, lookup_answer, query_llm, query_llm_stream, search_chunks, topic_keyword
+from dal.neo4j_handler import get_related_info_async, session_metrics
+from query_batcher import QueryBatcher
+from config import settings
+from fastapi.responses import FileResponse, StreamingResponse
 import os
 
 app = FastAPI()
@@ -15,11 +21,82 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Coalesces concurrent questions into one embedding batch and one FAISS search
+chunk_batcher = QueryBatcher(
+    search_chunks,
+    window_ms=settings.ASK_BATCH_WINDOW_MS,
+    max_batch_size=settings.ASK_BATCH_MAX_SIZE,
+)
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def _retrieve(query):
+    return await asyncio.gather(
+        chunk_batcher.submit(query),
+        get_related_info_async(topic_keyword(query)),
+    )
+
+async def _lookup(query, use_cache):
+    """Answer cache lookup, done before retrieval so a hit skips FAISS and Neo4j."""
+    if not use_cache:
+        return None, None
+    return await asyncio.to_thread(lookup_answer, query)
+
+async def _answer_events(query, use_cache):
+    # Everything after the 200 response has started is reported in the stream:
+    # a failed lookup, retrieval or generation sends `error`, and `done` always ends it
+    try:
+        cached, cache_key = await _lookup(query, use_cache)
+        if cached is not None:
+            yield _sse("context", {"question": query, "chunks": [], "graph_context": None, "cached": True})
+            yield _sse("token", {"text": cached})
+        else:
+            faiss_results, graph_context = await _retrieve(query)
+            yield _sse("context", {"question": query, "chunks": faiss_results, "graph_context": graph_context, "cached": False})
+            # The OpenAI client is synchronous; pull each chunk in a worker thread
+            stream = query_llm_stream(query, faiss_results, graph_context, use_cache, cache_key)
+            async for chunk in iterate_in_threadpool(stream):
+                yield _sse("token", {"text": chunk})
+    except Exception as e:
+        yield _sse("error", {"detail": str(e)})
+    yield _sse("done", {})
+
 @app.get("/")
 def serve_index():
     return FileResponse(os.path.abspath("frontend/index.html"))
 
 @app.get("/ask")
-def ask(query: str):
-    answer = query_llm(query)
-    return {"question": query, "answer": answer}
\ No newline at end of file
+async def ask(query: str, cache: bool = True):
+    cached, cache_key = await _lookup(query, cache)
+    if cached is not None:
+        return {"question": query, "answer": cached}
+    faiss_results, graph_context = await _retrieve(query)
+    answer = await asyncio.to_thread(query_llm, query, faiss_results, graph_context, cache, cache_key)
+    return {"question": query, "answer": answer}
+
+@app.get("/ask/stream")
+async def ask_stream(query: str, cache: bool = True):
+    """Streams the retrieved context, then the answer token by token, as server-sent events.
+
+    Events: `context`, any number of `token` ({"text": ...}), then `done`.
+    If retrieval or generation fails, `error` ({"detail": ...}) is sent
+    before `done`. A cached answer comes
+    as a single `token`, after a `context` with `"cached": true` and no
+    chunks. `cache=false` skips the semantic answer cache (both lookup and
+    store), e.g. for benchmarks.
+    """
+    return StreamingResponse(
+        _answer_events(query, cache),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/metrics")
+def metrics():
+    """Neo4j session concurrency, /ask batching and answer cache statistics."""
+    return {
+        "neo4j_sessions": session_metrics.snapshot(),
+        "ask_batching": chunk_batcher.stats(),
+        "answer_cache": answer_cache.stats(),
+    }
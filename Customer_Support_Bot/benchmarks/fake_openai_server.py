@@ -0,0 +1,114 @@
+"""Stand-in for the OpenAI chat completions API, for measuring streaming latency offline.
+
+Answers every POST /v1/chat/completions with a canned reply, streamed as
+OpenAI's server-sent chunk events (or as one completion when "stream" is
+false). The delay before the first token and between tokens is
+configurable, so the time-to-first-token of /ask/stream can be measured
+without an API key or network access.
+
+    python -m benchmarks.fake_openai_server --port 8089 --first-token-ms 400 --token-ms 25
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=fake uvicorn api.main:app
+"""
+import argparse
+import json
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_ANSWER = (
+    "Thank you for reaching out! You can return any item within 30 days of delivery. "
+    "Please make sure it is unused and in its original packaging, then start the return "
+    "from the Orders page of your account. Once we receive the item, your refund is issued "
+    "to the original payment method within 5 to 7 business days."
+)
+
+
+def tokens(text, n_tokens):
+    """Splits text into word-sized chunks (keeping the spaces), repeated up to n_tokens."""
+    words = [w + " " for w in text.split(" ")]
+    return [words[i % len(words)] for i in range(n_tokens or len(words))]
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # otherwise small token writes wait for delayed ACKs
+    config = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        model = body.get("model", "gpt-3.5-turbo")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        parts = tokens(CANNED_ANSWER, self.config.tokens)
+
+        time.sleep(self.config.first_token_ms / 1000)
+        if not body.get("stream", False):
+            time.sleep(self.config.token_ms * (len(parts) - 1) / 1000)
+            payload = json.dumps({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(parts)},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(parts), "total_tokens": len(parts)},
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, part in enumerate(parts + [None]):
+            if 0 < i < len(parts):
+                time.sleep(self.config.token_ms / 1000)
+            delta = {"content": part} if part is not None else {}
+            if i == 0:
+                delta["role"] = "assistant"
+            self._write_event(json.dumps({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": None if part is not None else "stop"}],
+            }))
+        self._write_event("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_event(self, data):
+        event = f"data: {data}\n\n".encode()
+        self.wfile.write(f"{len(event):x}\r\n".encode() + event + b"\r\n")
+        self.wfile.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--first-token-ms", type=float, default=300, help="delay before the first token")
+    parser.add_argument("--token-ms", type=float, default=30, help="delay between tokens")
+    parser.add_argument("--tokens", type=int, default=0, help="answer length in tokens (0 = canned answer once)")
+    args = parser.parse_args()
+
+    FakeOpenAIHandler.config = args
+    server = ThreadingHTTPServer((args.host, args.port), FakeOpenAIHandler)
+    print(f"Fake OpenAI listening on http://{args.host}:{args.port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
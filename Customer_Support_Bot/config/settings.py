@@ -7,4 +7,34 @@ load_dotenv("config/.env")
 # Neo4j Database Config
 NEO4J_URI = os.getenv("NEO4J_URI")
 NEO4J_USER = os.getenv("NEO4J_USER")
-NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
\ No newline at end of file
+NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
+NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "50"))
+NEO4J_MAX_CONNECTION_LIFETIME = int(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3600"))  # seconds
+NEO4J_CONNECTION_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_CONNECTION_ACQUISITION_TIMEOUT", "60"))  # seconds
+
+# Embedding cache shared by build_index.py and query encoding
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "index/embedding_cache.sqlite")
+EMBEDDING_CACHE_MEMORY_ITEMS = int(os.getenv("EMBEDDING_CACHE_MEMORY_ITEMS", "10000"))
+
+# /ask micro-batching: concurrent questions arriving within the window share one encode + search
+ASK_BATCH_WINDOW_MS = float(os.getenv("ASK_BATCH_WINDOW_MS", "5"))
+ASK_BATCH_MAX_SIZE = int(os.getenv("ASK_BATCH_MAX_SIZE", "32"))
+
+# FAISS index: flat (exact), ivf_flat, ivf_pq or hnsw
+FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "flat")
+FAISS_TRAIN_SAMPLE = int(os.getenv("FAISS_TRAIN_SAMPLE", "100000"))
+FAISS_NLIST = int(os.getenv("FAISS_NLIST", "1024"))
+FAISS_NPROBE = int(os.getenv("FAISS_NPROBE", "16"))
+FAISS_PQ_M = int(os.getenv("FAISS_PQ_M", "48"))
+FAISS_PQ_NBITS = int(os.getenv("FAISS_PQ_NBITS", "8"))
+FAISS_HNSW_M = int(os.getenv("FAISS_HNSW_M", "32"))
+FAISS_EF_CONSTRUCTION = int(os.getenv("FAISS_EF_CONSTRUCTION", "200"))
+FAISS_EF_SEARCH = int(os.getenv("FAISS_EF_SEARCH", "64"))
+
+# Written by build_index.py on every run; answers cached for an older version are dropped
+INDEX_VERSION_PATH = os.getenv("INDEX_VERSION_PATH", "index/index_version.txt")
+
+# Semantic answer cache: paraphrased questions (cosine similarity >= threshold) reuse a stored LLM answer
+ANSWER_CACHE_PATH = os.getenv("ANSWER_CACHE_PATH", "index/answer_cache.sqlite")
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_MAX_ITEMS = int(os.getenv("ANSWER_CACHE_MAX_ITEMS", "1000"))
@@ -1,5 +1,6 @@
 import os
-from neo4j import GraphDatabase
+from neo4j import AsyncGraphDatabase, GraphDatabase
+from neo4j_session_metrics import SessionMetrics
 
 from config import settings
 
@@ -8,34 +9,81 @@ NEO4J_URI = settings.NEO4J_URI
 NEO4J_USER = settings.NEO4J_USER
 NEO4J_PASSWORD = settings.NEO4J_PASSWORD
 
+POOL_CONFIG = {
+    "max_connection_pool_size": settings.NEO4J_MAX_POOL_SIZE,
+    "max_connection_lifetime": settings.NEO4J_MAX_CONNECTION_LIFETIME,
+    "connection_acquisition_timeout": settings.NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+}
+
 # Neo4j Driver
-driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD), **POOL_CONFIG)
+
+# The async driver is created on first use, inside the event loop that serves the API
+_async_driver = None
 
 def get_driver():
     """Get the Neo4j driver."""
     return driver
 
+def get_async_driver():
+    """Get the async Neo4j driver used by the FastAPI handlers."""
+    global _async_driver
+    if _async_driver is None:
+        _async_driver = AsyncGraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD), **POOL_CONFIG)
+    return _async_driver
+
+# Sessions this process has open at once (not the driver's pool itself), reported by /metrics
+session_metrics = SessionMetrics(settings.NEO4J_MAX_POOL_SIZE)
+
+def execute_read(work, **params):
+    """Runs work(tx, **params) in a managed read transaction (routed to a reader in a cluster)."""
+    with session_metrics.track("sync"):
+        with driver.session() as session:
+            return session.execute_read(work, **params)
+
+async def execute_read_async(work, **params):
+    """Async variant of execute_read; work must be a coroutine function taking (tx, **params)."""
+    with session_metrics.track("async"):
+        async with get_async_driver().session() as session:
+            return await session.execute_read(work, **params)
+
+
+RELATED_INFO_QUERY = """
+    UNWIND $topics AS topic
+    MATCH (t:Topic {name: topic})-[:COVERS|RELATED_TO|CONTACT_VIA]->(related)
+    OPTIONAL MATCH (related)-[r2]->(sub)
+    RETURN topic,
+           t.name AS name,
+           collect(DISTINCT related.name) AS related_info,
+           collect(DISTINCT sub.name) AS sub_info
+    """
+
+def _format_related_info(topic, row):
+    if not row:
+        return f"No information found for topic: {topic}"
+
+    topic = row["name"]
+    related = row["related_info"]
+    sub = row["sub_info"]
+
+    return (
+        f"**Topic**: {topic}\n"
+        f"Related: {', '.join(related)}\n"
+        f"Details: {', '.join([s for s in sub if s])}"
+    )
+
+def _fetch_related(tx, topics):
+    return {record["topic"]: record for record in tx.run(RELATED_INFO_QUERY, topics=topics)}
+
+async def _fetch_related_async(tx, topics):
+    result = await tx.run(RELATED_INFO_QUERY, topics=topics)
+    return {record["topic"]: record async for record in result}
+
 def get_related_info(topic):
-    with driver.session() as session:
-        query = """
-        MATCH (t:Topic {name: $topic})-[:COVERS|RELATED_TO|CONTACT_VIA]->(related)
-        OPTIONAL MATCH (related)-[r2]->(sub)
-        RETURN t.name AS topic,
-               collect(DISTINCT related.name) AS related_info,
-               collect(DISTINCT sub.name) AS sub_info
-        """
-        result = session.run(query, topic=topic)
-        row = result.single()
-
-        if not row:
-            return f"No information found for topic: {topic}"
-
-        topic = row["topic"]
-        related = row["related_info"]
-        sub = row["sub_info"]
-
-        return (
-            f"**Topic**: {topic}\n"
-            f"Related: {', '.join(related)}\n"
-            f"Details: {', '.join([s for s in sub if s])}"
-        )
\ No newline at end of file
+    rows = execute_read(_fetch_related, topics=[topic])
+    return _format_related_info(topic, rows.get(topic))
+
+async def get_related_info_async(topic):
+    """Async variant of get_related_info for the FastAPI handlers."""
+    rows = await execute_read_async(_fetch_related_async, topics=[topic])
+    return _format_related_info(topic, rows.get(topic))
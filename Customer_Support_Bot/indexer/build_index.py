@@ -1,10 +1,14 @@
 import os
+import time
 import faiss
 import pickle
 from sentence_transformers import SentenceTransformer
 from pathlib import Path
 from neo4j import GraphDatabase
 from dal.neo4j_handler import get_driver
+from config import settings
+from faiss_index_factory import build_index
+from embedding_cache import EmbeddingCache
 
 driver = get_driver()
 
@@ -30,19 +34,35 @@ def get_graph_chunks():
 graph_chunks = get_graph_chunks()
 print(f"Retrieved {len(graph_chunks)} graph chunks from Neo4j.")
 
-# Step 2: Embed with SentenceTransformers
+# Step 2: Embed with SentenceTransformers (chunks embedded by a previous run come from the cache)
+Path("index").mkdir(exist_ok=True)
 model = SentenceTransformer("all-MiniLM-L6-v2")
-embeddings = model.encode(graph_chunks, show_progress_bar=True)
+embedding_cache = EmbeddingCache(settings.EMBEDDING_CACHE_PATH, "all-MiniLM-L6-v2", settings.EMBEDDING_CACHE_MEMORY_ITEMS)
+embeddings = embedding_cache.encode(model, graph_chunks, show_progress_bar=True)
+print(f"Embedding cache: {embedding_cache.stats()}")
 
 # Step 3: Build FAISS index
-dim = embeddings[0].shape[0]
-index = faiss.IndexFlatL2(dim)
-index.add(embeddings)
+index = build_index(
+    embeddings,
+    index_type=settings.FAISS_INDEX_TYPE,
+    metric="l2",
+    train_sample=settings.FAISS_TRAIN_SAMPLE,
+    nlist=settings.FAISS_NLIST,
+    nprobe=settings.FAISS_NPROBE,
+    pq_m=settings.FAISS_PQ_M,
+    pq_nbits=settings.FAISS_PQ_NBITS,
+    hnsw_m=settings.FAISS_HNSW_M,
+    ef_construction=settings.FAISS_EF_CONSTRUCTION,
+    ef_search=settings.FAISS_EF_SEARCH,
+)
 
 # Step 4: Save index + chunks
-Path("index").mkdir(exist_ok=True)
 faiss.write_index(index, "index/faiss_graph_index.bin")
 with open("index/graph_chunks.pkl", "wb") as f:
     pickle.dump(graph_chunks, f)
 
+# Step 5: Record the new index version (invalidates the semantic answer cache)
+with open(settings.INDEX_VERSION_PATH, "w", encoding="utf-8") as f:
+    f.write(str(time.time_ns()))
+
 print("FAISS index from Neo4j created and saved.")
@@ -0,0 +1,123 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import faiss
+import numpy as np
+
+
+class SemanticAnswerCache:
+    """Returns a stored LLM answer when a new question is close enough to a past one.
+
+    Past questions are kept in a small inner-product FAISS index over
+    L2-normalised embeddings, so the score is cosine similarity. A lookup
+    scoring at least `threshold` returns the stored answer. At most `max_items`
+    answers are kept; the least recently used is evicted first.
+
+    Entries are persisted in SQLite, tagged with the knowledge index version
+    (`version_fn`, the version of the index the app has loaded). When the
+    version changes because build_index.py ran, every cached answer is
+    dropped, both on startup and while running.
+    """
+
+    def __init__(self, path, dimension, version_fn, threshold=0.95, max_items=1000):
+        self.threshold = threshold
+        self.max_items = max_items
+        self.version_fn = version_fn
+        self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(dimension))
+        self._entries = OrderedDict()  # id -> answer, least recently used first
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS answers (
+                id INTEGER PRIMARY KEY,
+                version TEXT NOT NULL,
+                question TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+        self.version = None
+        with self._lock:
+            self._load(version_fn())
+
+    def _load(self, version):
+        """Drops answers from other index versions and loads the rest, least recently used first."""
+        self._conn.execute("DELETE FROM answers WHERE version != ?", (version,))
+        self._conn.commit()
+        rows = self._conn.execute(
+            "SELECT id, answer, vector FROM answers ORDER BY last_used DESC LIMIT ?", (self.max_items,)
+        ).fetchall()
+        self._index.reset()
+        self._entries.clear()
+        for row_id, answer, blob in reversed(rows):
+            self._entries[row_id] = answer
+        if rows:
+            ids = np.array(list(self._entries), dtype="int64")
+            vectors = np.vstack([np.frombuffer(blob, dtype="float32") for _, _, blob in reversed(rows)])
+            self._index.add_with_ids(vectors, ids)
+        self.version = version
+
+    def _check_version(self):
+        version = self.version_fn()
+        if version != self.version:
+            print(f"Knowledge index changed ({self.version} -> {version}); clearing answer cache.")
+            self._load(version)
+
+    def get(self, vector):
+        """Returns the cached answer for a normalised question vector, or None."""
+        with self._lock:
+            self._check_version()
+            if self._index.ntotal:
+                scores, ids = self._index.search(vector.reshape(1, -1), 1)
+                row_id = int(ids[0][0])
+                if row_id != -1 and scores[0][0] >= self.threshold:
+                    self._entries.move_to_end(row_id)
+                    self._conn.execute("UPDATE answers SET last_used = ? WHERE id = ?", (time.time(), row_id))
+                    self._conn.commit()
+                    self.hits += 1
+                    return self._entries[row_id]
+            self.misses += 1
+            return None
+
+    def put(self, vector, version, question, answer):
+        """Stores an answer computed on index `version`, evicting the least recently used ones beyond max_items.
+
+        Answers computed on another version than the current one are not stored.
+        """
+        vector = np.asarray(vector, dtype="float32").reshape(1, -1)
+        with self._lock:
+            self._check_version()
+            if version != self.version:
+                return
+            cursor = self._conn.execute(
+                "INSERT INTO answers (version, question, answer, vector, last_used) VALUES (?, ?, ?, ?, ?)",
+                (self.version, question, answer, vector.tobytes(), time.time()),
+            )
+            row_id = cursor.lastrowid
+            self._index.add_with_ids(vector, np.array([row_id], dtype="int64"))
+            self._entries[row_id] = answer
+
+            evicted = []
+            while len(self._entries) > self.max_items:
+                evicted.append(self._entries.popitem(last=False)[0])
+            if evicted:
+                self._index.remove_ids(np.array(evicted, dtype="int64"))
+                self._conn.executemany("DELETE FROM answers WHERE id = ?", [(i,) for i in evicted])
+            self._conn.commit()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "items": len(self._entries),
+            "threshold": self.threshold,
+            "index_version": self.version,
+        }
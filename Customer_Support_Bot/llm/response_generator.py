@@ -1,10 +1,15 @@
 import os
 import pickle
+import threading
 import faiss
 from sentence_transformers import SentenceTransformer
 from openai import OpenAI
 from dotenv import load_dotenv
 from dal.neo4j_handler import get_related_info
+from config import settings
+from faiss_index_factory import set_search_params
+from embedding_cache import EmbeddingCache
+from llm.answer_cache import SemanticAnswerCache
 
 load_dotenv("config/.env")
 
@@ -12,24 +17,73 @@ load_dotenv("config/.env")
 openai_key = os.getenv("OPENAI_API_KEY")
 client = OpenAI(api_key=openai_key)
 
-# Load FAISS index
-index = faiss.read_index("index/faiss_graph_index.bin")
-with open("index/graph_chunks.pkl", "rb") as f:
-    text_chunks = pickle.load(f)
-
 # Embed model
 model = SentenceTransformer("all-MiniLM-L6-v2")
+embedding_cache = EmbeddingCache(settings.EMBEDDING_CACHE_PATH, "all-MiniLM-L6-v2", settings.EMBEDDING_CACHE_MEMORY_ITEMS)
+
+def index_version():
+    """Identifies the knowledge index build on disk; changes every time build_index.py runs."""
+    try:
+        with open(settings.INDEX_VERSION_PATH, encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        # Index built before versions were recorded
+        return str(os.stat("index/faiss_graph_index.bin").st_mtime_ns)
+
+# FAISS index and chunks, reloaded when build_index.py writes a new version
+_knowledge_lock = threading.Lock()
+_knowledge = None  # (version, index, text_chunks)
+
+def load_knowledge():
+    """Returns (version, index, text_chunks) of the loaded index, reloading it when the version on disk changed."""
+    global _knowledge
+    # The version is read before the files: build_index.py writes it last, so
+    # the loaded data is never older than the version it is tagged with
+    version = index_version()
+    if _knowledge is None or _knowledge[0] != version:
+        with _knowledge_lock:
+            if _knowledge is None or _knowledge[0] != version:
+                index = faiss.read_index("index/faiss_graph_index.bin")
+                set_search_params(index, nprobe=settings.FAISS_NPROBE, ef_search=settings.FAISS_EF_SEARCH)
+                with open("index/graph_chunks.pkl", "rb") as f:
+                    text_chunks = pickle.load(f)
+                _knowledge = (version, index, text_chunks)
+    return _knowledge
+
+# Answers are tagged with the version of the index that is loaded, not merely on disk
+answer_cache = SemanticAnswerCache(
+    settings.ANSWER_CACHE_PATH,
+    model.get_sentence_embedding_dimension(),
+    lambda: load_knowledge()[0],
+    threshold=settings.ANSWER_CACHE_THRESHOLD,
+    max_items=settings.ANSWER_CACHE_MAX_ITEMS,
+)
 
-def query_llm(question):
-    # 1. Get top FAISS chunk
-    q_emb = model.encode([question])
-    D, I = index.search(q_emb, k=3)
-    faiss_results = [text_chunks[i] for i in I[0]]
+def question_vector(question):
+    """Normalised question embedding for the answer cache (the encode itself is cached)."""
+    vector = embedding_cache.encode(model, [question]).copy()
+    faiss.normalize_L2(vector)
+    return vector[0]
+
+def search_chunks(questions, k=3):
+    """Returns the top FAISS chunks for each question, using one encode batch and one search."""
+    _, index, text_chunks = load_knowledge()
+    q_emb = embedding_cache.encode(model, questions)
+    D, I = index.search(q_emb, k=k)
+    return [[text_chunks[i] for i in row if i != -1] for row in I]
+
+def topic_keyword(question):
+    """Extract the most likely topic (assume keyword for now)"""
+    return question.split()[0].capitalize()
+
+def build_prompt(question, faiss_results=None, graph_context=None):
+    # 1. Get top FAISS chunk (unless the caller already searched, e.g. in a batch)
+    if faiss_results is None:
+        faiss_results = search_chunks([question])[0]
 
     # 2. Get Neo4j info
-    # Extract the most likely topic (assume keyword for now)
-    keyword = question.split()[0].capitalize()
-    graph_context = get_related_info(keyword)
+    if graph_context is None:
+        graph_context = get_related_info(topic_keyword(question))
 
     # 3. Build prompt
     context = "\n\n".join(faiss_results)
@@ -50,6 +104,28 @@ def query_llm(question):
 
         Answer:
         """
+    return prompt
+
+def lookup_answer(question):
+    """Looks a question up in the semantic answer cache, before any retrieval.
+
+    Returns (answer or None, cache_key). On a miss, pass cache_key to
+    query_llm/query_llm_stream with the retrieved context. It holds the index
+    version loaded now; if retrieval ran on a newer index, the answer is not
+    stored.
+    """
+    version = load_knowledge()[0]
+    vector = question_vector(question)
+    return answer_cache.get(vector), (vector, version)
+
+def query_llm(question, faiss_results=None, graph_context=None, use_cache=True, cache_key=None):
+    # 0. Reuse the answer to an earlier paraphrase of this question (unless the caller already looked)
+    if use_cache and cache_key is None:
+        cached, cache_key = lookup_answer(question)
+        if cached is not None:
+            return cached
+
+    prompt = build_prompt(question, faiss_results, graph_context)
 
     # 4. Query OpenAI
     response = client.chat.completions.create(
@@ -58,4 +134,33 @@ def query_llm(question):
         temperature=0.2,
     )
 
-    return response.choices[0].message.content.strip()
+    answer = response.choices[0].message.content.strip()
+    if use_cache and answer:
+        answer_cache.put(*cache_key, question, answer)
+    return answer
+
+def query_llm_stream(question, faiss_results=None, graph_context=None, use_cache=True, cache_key=None):
+    """Same as query_llm, but yields the answer in chunks as OpenAI produces them."""
+    if use_cache and cache_key is None:
+        cached, cache_key = lookup_answer(question)
+        if cached is not None:
+            yield cached
+            return
+
+    prompt = build_prompt(question, faiss_results, graph_context)
+    stream = client.chat.completions.create(
+        model="gpt-3.5-turbo",
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.2,
+        stream=True,
+    )
+    parts = []
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            parts.append(chunk.choices[0].delta.content)
+            yield parts[-1]
+    # Only complete answers are cached (the generator is not resumed if the client disconnects),
+    # and never an empty one, which would be replayed for every paraphrase
+    answer = "".join(parts).strip()
+    if use_cache and answer:
+        answer_cache.put(*cache_key, question, answer)
@@ -5,6 +5,7 @@ import json
 from utils.retriever_pipeline import retrieve_documents
 from utils.doc_handler import process_documents
 from sentence_transformers import CrossEncoder
+from utils.reranker import CachedReranker
 import torch
 import os
 from dotenv import load_dotenv, find_dotenv
@@ -21,10 +22,16 @@ EMBEDDINGS_MODEL = "nomic-embed-text:latest"
 CROSS_ENCODER_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
 
 device = "cuda" if torch.cuda.is_available() else "cpu"
+
+@st.cache_resource(show_spinner=False)
+def load_reranker(model_name, device):
+    # Loaded once per process, so the score cache survives reruns and is shared by sessions
+    return CachedReranker(CrossEncoder(model_name, device=device))
+
 # 🚀 Initialize Cross-Encoder (Reranker) at the global level 
 reranker = None                                                        
 try:
-    reranker = CrossEncoder(CROSS_ENCODER_MODEL, device=device)
+    reranker = load_reranker(CROSS_ENCODER_MODEL, device)
 except Exception as e:
     st.error(f"Failed to load CrossEncoder model: {str(e)}")
 
@@ -64,10 +71,10 @@ with st.sidebar:
         accept_multiple_files=True
     )
     
-    if uploaded_files and not st.session_state.documents_loaded:
-        with st.spinner("Processing documents..."):
-            process_documents(uploaded_files,reranker,EMBEDDINGS_MODEL, OLLAMA_BASE_URL)
-            st.success("Documents processed!")
+    # Files added to or removed from the uploader are added to / removed from the index
+    with st.spinner("Processing documents..."):
+        if process_documents(uploaded_files or [],reranker,EMBEDDINGS_MODEL, OLLAMA_BASE_URL):
+            st.success("Documents updated!")
     
     st.markdown("---")
     st.header("⚙️ RAG Settings")
@@ -0,0 +1,100 @@
+"""BM25 build and query latency of BM25Index against rank_bm25's BM25Okapi.
+
+Uses synthetic chunks with Zipf-distributed words (like real text after
+stopword removal). rank_bm25 is skipped above --rank-bm25-max chunks, where
+it needs several GB of memory and seconds per query.
+
+    python -m benchmarks.bm25_benchmark
+    python -m benchmarks.bm25_benchmark --sizes 10000,100000,1000000 --rank-bm25-max 100000
+"""
+import argparse
+import statistics
+import time
+from collections import Counter
+import numpy as np
+from langchain_core.documents import Document
+from utils.bm25 import BM25Index
+
+
+def synthetic_batches(n, vocab_size, words_per_chunk, batch_size, seed=0):
+    """Yields lists of token lists, batch_size chunks at a time."""
+    rng = np.random.default_rng(seed)
+    vocab = np.array([f"term{i}" for i in range(vocab_size)])
+    p = 1.0 / np.arange(1, vocab_size + 1) ** 1.1
+    p /= p.sum()
+    for start in range(0, n, batch_size):
+        size = min(batch_size, n - start)
+        lengths = rng.integers(words_per_chunk // 2, words_per_chunk * 3 // 2, size)
+        words = vocab[rng.choice(vocab_size, lengths.sum(), p=p)].tolist()
+        bounds = np.concatenate([[0], np.cumsum(lengths)])
+        yield [words[bounds[i]:bounds[i + 1]] for i in range(size)]
+
+
+def sample_queries(n, vocab_size, seed=1):
+    # Mix of common and rare terms, 2 to 6 per query
+    rng = np.random.default_rng(seed)
+    return [[f"term{t}" for t in rng.integers(0, vocab_size // rng.choice([10, 100, 1]), rng.integers(2, 7))]
+            for _ in range(n)]
+
+
+def time_queries(search, queries):
+    latencies = []
+    results = []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(search(query))
+        latencies.append(time.perf_counter() - start)
+    return statistics.median(latencies) * 1000, statistics.mean(latencies) * 1000, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--rank-bm25-max", type=int, default=100000, help="largest corpus to run rank_bm25 on")
+    parser.add_argument("--vocab", type=int, default=50000)
+    parser.add_argument("--words", type=int, default=80, help="average tokens per chunk")
+    parser.add_argument("--batch", type=int, default=50000, help="chunks per BM25Index.add() (one per document upload)")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=4)
+    args = parser.parse_args()
+
+    queries = sample_queries(args.queries, args.vocab)
+    print(f"{'chunks':>9}  {'index':<11}{'build s':>9}{'p50 ms':>10}{'mean ms':>10}{'same top-k':>13}")
+    for n in (int(s) for s in args.sizes.split(",")):
+        keep_tokens = n <= args.rank_bm25_max
+        corpus = []
+        index = BM25Index()
+        build = 0.0
+        for batch in synthetic_batches(n, args.vocab, args.words, args.batch):
+            start = len(index.documents)
+            counts = [Counter(tokens) for tokens in batch]
+            documents = [Document(page_content=str(start + i)) for i in range(len(batch))]
+            began = time.perf_counter()
+            index.add(range(start, start + len(batch)), documents, counts)
+            build += time.perf_counter() - began
+            if keep_tokens:
+                corpus.extend(batch)
+        p50, mean, ours = time_queries(lambda q: [int(d.page_content) for d in index.top_k(q, args.k)], queries)
+        print(f"{n:>9}  {'BM25Index':<11}{build:>9.2f}{p50:>10.2f}{mean:>10.2f}{'':>13}")
+
+        if not keep_tokens:
+            print(f"{n:>9}  {'rank_bm25':<11}{'skipped (--rank-bm25-max)':>42}")
+            continue
+        from rank_bm25 import BM25Okapi
+
+        began = time.perf_counter()
+        reference = BM25Okapi(corpus)
+        build = time.perf_counter() - began
+        p50_ref, mean_ref, theirs = time_queries(lambda q: reference.get_top_n(q, list(range(n)), n=args.k), queries)
+        # Compare scores, not ids: rank_bm25 orders equal scores arbitrarily
+        matches = sum(
+            np.allclose(np.sort(scores[a]), np.sort(scores[b]))
+            for q, a, b in zip(queries, ours, theirs)
+            for scores in [reference.get_scores(q)]
+        )
+        print(f"{n:>9}  {'rank_bm25':<11}{build:>9.2f}{p50_ref:>10.2f}{mean_ref:>10.2f}"
+              f"{f'{matches}/{len(queries)}':>13}   ({p50_ref / p50:.0f}x faster p50)")
+
+
+if __name__ == "__main__":
+    main()
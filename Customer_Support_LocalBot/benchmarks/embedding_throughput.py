@@ -0,0 +1,75 @@
+"""Embedding throughput of OllamaEmbeddingClient across batch sizes and concurrency.
+
+Runs against the fake Ollama stub (started in-process by default) or a real
+Ollama server with --url, and compares with LangChain's OllamaEmbeddings.
+
+    python -m benchmarks.embedding_throughput --texts 2000
+    python -m benchmarks.embedding_throughput --error-rate 0.05      # exercise retries
+    python -m benchmarks.embedding_throughput --url http://localhost:11434 --texts 500
+"""
+import argparse
+import time
+from benchmarks.fake_ollama import start_fake_ollama
+from utils.ollama_embeddings import OllamaEmbeddingClient
+
+
+def synthetic_chunks(n):
+    return [f"Chunk {i}: customers can return physical products within 30 days of delivery. " * 8 for i in range(n)]
+
+
+def run_client(url, model, texts, batch_size, concurrency):
+    client = OllamaEmbeddingClient(model, url, batch_size=batch_size, max_concurrency=concurrency, backoff=0.05)
+    start = time.perf_counter()
+    vectors = client.embed_documents(texts)
+    elapsed = time.perf_counter() - start
+    assert len(vectors) == len(texts)
+    return elapsed, client.stats()
+
+
+def run_langchain(url, model, texts):
+    from langchain_ollama import OllamaEmbeddings
+
+    embeddings = OllamaEmbeddings(model=model, base_url=url)
+    start = time.perf_counter()
+    embeddings.embed_documents(texts)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Ollama base URL (default: start the fake stub)")
+    parser.add_argument("--model", default="nomic-embed-text:latest")
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--batch-sizes", default="1,8,32,64")
+    parser.add_argument("--concurrency", default="1,2,4,8")
+    parser.add_argument("--parallel", type=int, default=4, help="stub: requests served at once")
+    parser.add_argument("--base-ms", type=float, default=20, help="stub: fixed delay per request")
+    parser.add_argument("--per-text-ms", type=float, default=2, help="stub: extra delay per text")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="stub: fraction of 503 responses")
+    args = parser.parse_args()
+
+    url = args.url
+    if url is None:
+        _, url = start_fake_ollama(
+            base_ms=args.base_ms, per_text_ms=args.per_text_ms, parallel=args.parallel, error_rate=args.error_rate
+        )
+        print(f"Fake Ollama: {args.base_ms} ms + {args.per_text_ms} ms/text, {args.parallel} parallel, "
+              f"{args.error_rate:.0%} errors")
+    texts = synthetic_chunks(args.texts)
+
+    print(f"{'client':<28}{'batch':>7}{'conc':>6}{'seconds':>10}{'texts/s':>10}{'p50 ms':>9}{'retries':>9}")
+    try:
+        elapsed = run_langchain(url, args.model, texts)
+        print(f"{'langchain OllamaEmbeddings':<28}{'-':>7}{1:>6}{elapsed:>10.2f}{len(texts) / elapsed:>10.0f}{'-':>9}{'-':>9}")
+    except Exception as e:
+        print(f"langchain OllamaEmbeddings skipped: {e}")
+
+    for batch_size in (int(b) for b in args.batch_sizes.split(",")):
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            elapsed, stats = run_client(url, args.model, texts, batch_size, concurrency)
+            print(f"{'OllamaEmbeddingClient':<28}{batch_size:>7}{concurrency:>6}{elapsed:>10.2f}"
+                  f"{len(texts) / elapsed:>10.0f}{stats['request_p50_seconds'] * 1000:>9.0f}{stats['retries']:>9}")
+
+
+if __name__ == "__main__":
+    main()
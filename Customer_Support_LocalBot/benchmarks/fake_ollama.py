@@ -0,0 +1,111 @@
+"""Stand-in for Ollama's embedding and generate endpoints, for tuning the app without a model.
+
+POST /api/embed returns deterministic vectors after a simulated model delay
+of --base-ms + --per-text-ms per input text. At most --parallel requests
+are served at once (like OLLAMA_NUM_PARALLEL); the others wait. With
+--error-rate, that fraction of requests fails with 503 to exercise retries.
+POST /api/generate (non-streaming, as used by HyDE) answers after
+--generate-ms, to exercise the retrieval timeouts.
+
+    python -m benchmarks.fake_ollama --port 11436 --parallel 4
+    OLLAMA_API_URL=http://127.0.0.1:11436 streamlit run app.py
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+
+def fake_vector(text, dimension):
+    """Unit vector derived from the text, so the same text always gets the same embedding."""
+    seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+    vector = np.random.default_rng(seed).standard_normal(dimension).astype("float32")
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def make_handler(base_ms, per_text_ms, parallel, error_rate, dimension, generate_ms):
+    slots = threading.Semaphore(parallel)
+
+    class FakeOllamaHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True  # headers and body are separate writes
+
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, status, body):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if self.path == "/api/generate":
+                time.sleep(generate_ms / 1000)
+                self._reply(200, {
+                    "model": body.get("model", "deepseek-r1:7b"),
+                    "response": "Customers can return products within 30 days of delivery for a full refund.",
+                    "done": True,
+                })
+                return
+            if self.path != "/api/embed":
+                self._reply(404, {"error": f"unknown endpoint {self.path}"})
+                return
+            if random.random() < error_rate:
+                self._reply(503, {"error": "server busy"})
+                return
+            texts = body.get("input", [])
+            texts = [texts] if isinstance(texts, str) else texts
+            start = time.perf_counter()
+            with slots:
+                time.sleep((base_ms + per_text_ms * len(texts)) / 1000)
+                embeddings = [fake_vector(t, dimension) for t in texts]
+            self._reply(200, {
+                "model": body.get("model", "nomic-embed-text:latest"),
+                "embeddings": embeddings,
+                "total_duration": int((time.perf_counter() - start) * 1e9),
+            })
+
+    return FakeOllamaHandler
+
+
+def start_fake_ollama(port=0, base_ms=20, per_text_ms=2, parallel=4, error_rate=0.0, dimension=768, generate_ms=2000):
+    """Starts the stub on a background thread; returns (server, base_url)."""
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", port), make_handler(base_ms, per_text_ms, parallel, error_rate, dimension, generate_ms)
+    )
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=11436)
+    parser.add_argument("--base-ms", type=float, default=20, help="fixed delay per request")
+    parser.add_argument("--per-text-ms", type=float, default=2, help="extra delay per input text")
+    parser.add_argument("--parallel", type=int, default=4, help="requests served at once")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--generate-ms", type=float, default=2000, help="delay of /api/generate")
+    args = parser.parse_args()
+
+    server, url = start_fake_ollama(
+        args.port, args.base_ms, args.per_text_ms, args.parallel, args.error_rate, args.dimension, args.generate_ms
+    )
+    print(f"Fake Ollama listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+# bm25.py
+from collections import Counter
+from typing import Any, List
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+MAX_SEGMENTS = 8  # merge segments beyond this many
+MAX_DEAD_FRACTION = 0.25  # drop removed chunks once they make up this share of the slots
+
+
+class _Segment:
+    """
+    Immutable postings for one batch of chunks, stored as term-major CSR.
+
+    terms holds the sorted term ids present in the batch; the postings of
+    terms[i] are slots[indptr[i]:indptr[i + 1]] with frequencies tfs[...].
+    """
+
+    __slots__ = ("terms", "indptr", "slots", "tfs")
+
+    def __init__(self, term_ids, slots, tfs):
+        order = np.lexsort((slots, term_ids))
+        term_ids, self.slots, self.tfs = term_ids[order], slots[order], tfs[order]
+        self.terms, starts = np.unique(term_ids, return_index=True)
+        self.indptr = np.append(starts, len(term_ids)).astype(np.int64)
+
+    def postings(self, term_id):
+        i = np.searchsorted(self.terms, term_id)
+        if i == len(self.terms) or self.terms[i] != term_id:
+            return None
+        return self.slots[self.indptr[i]:self.indptr[i + 1]], self.tfs[self.indptr[i]:self.indptr[i + 1]]
+
+    def entries(self):
+        """(term id, slot, tf) of every posting, as three arrays."""
+        return np.repeat(self.terms, np.diff(self.indptr)), self.slots, self.tfs
+
+
+class BM25Index:
+    """
+    Okapi BM25 over an inverted index in NumPy arrays, with incremental add/remove.
+
+    Each add() stores its chunks as a new CSR segment of postings. A query
+    only touches the postings of its own terms, so its cost depends on how
+    many chunks contain those terms, not on the corpus size. Removed chunks
+    are masked out and their document frequencies subtracted. Segments are
+    merged, and removed chunks dropped, once there are too many of either.
+
+    Scores match rank_bm25.BM25Okapi (same k1, b and epsilon floor for
+    negative IDF) over the current chunks, in insertion order.
+    """
+
+    def __init__(self, k1=1.5, b=0.75, epsilon=0.25):
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+        self.vocab = {}  # term -> term id
+        self.df = np.zeros(0, dtype=np.int64)  # document frequency per term id, live chunks only
+        self.segments = []
+        self.documents = []  # Document per slot
+        self.doc_len = np.zeros(0)  # length per slot
+        self.alive = np.zeros(0, dtype=bool)
+        self.id_to_slot = {}
+        self._idf = None
+        self._norms = None
+
+    def __len__(self):
+        return len(self.id_to_slot)
+
+    def live_documents(self):
+        return [self.documents[slot] for slot in np.flatnonzero(self.alive)]
+
+    def _changed(self):
+        self._idf = None
+        self._norms = None
+
+    def add(self, ids, documents, term_counts):
+        start = len(self.documents)
+        term_ids, slots, tfs, lengths = [], [], [], []
+        for offset, counts in enumerate(term_counts):
+            length = 0
+            for term, tf in counts.items():
+                term_ids.append(self.vocab.setdefault(term, len(self.vocab)))
+                slots.append(start + offset)
+                tfs.append(tf)
+                length += tf
+            lengths.append(length)
+
+        term_ids = np.array(term_ids, dtype=np.int64)
+        if len(self.vocab) > len(self.df):
+            self.df = np.concatenate([self.df, np.zeros(len(self.vocab) - len(self.df), dtype=np.int64)])
+        self.df += np.bincount(term_ids, minlength=len(self.df))
+        if len(term_ids):
+            self.segments.append(
+                _Segment(term_ids.astype(np.int32), np.array(slots, dtype=np.int32), np.array(tfs, dtype=np.float32))
+            )
+
+        self.documents.extend(documents)
+        self.doc_len = np.concatenate([self.doc_len, np.array(lengths, dtype=float)])
+        self.alive = np.concatenate([self.alive, np.ones(len(lengths), dtype=bool)])
+        for offset, chunk_id in enumerate(ids):
+            self.id_to_slot[chunk_id] = start + offset
+        self._changed()
+        if len(self.segments) > MAX_SEGMENTS:
+            self._compact()
+
+    def remove(self, ids):
+        dead = np.array([self.id_to_slot.pop(chunk_id) for chunk_id in ids], dtype=np.int32)
+        if not len(dead):
+            return
+        self.alive[dead] = False
+        for segment in self.segments:
+            term_ids, slots, _ = segment.entries()
+            removed = np.isin(slots, dead)
+            if removed.any():
+                self.df -= np.bincount(term_ids[removed], minlength=len(self.df))
+        self._changed()
+        if (~self.alive).sum() > MAX_DEAD_FRACTION * len(self.alive):
+            self._compact()
+
+    def _compact(self):
+        """Merge all segments into one and drop removed chunks, keeping chunk order."""
+        live = np.flatnonzero(self.alive)
+        new_slot = np.full(len(self.alive), -1, dtype=np.int64)
+        new_slot[live] = np.arange(len(live))
+
+        term_ids, slots, tfs = (np.concatenate(parts) for parts in zip(*(s.entries() for s in self.segments))) \
+            if self.segments else (np.zeros(0, np.int32), np.zeros(0, np.int32), np.zeros(0, np.float32))
+        keep = self.alive[slots]
+        self.segments = [_Segment(term_ids[keep], new_slot[slots[keep]].astype(np.int32), tfs[keep])] if keep.any() else []
+
+        self.documents = [self.documents[slot] for slot in live]
+        self.doc_len = self.doc_len[live]
+        self.alive = np.ones(len(live), dtype=bool)
+        self.id_to_slot = {chunk_id: int(new_slot[slot]) for chunk_id, slot in self.id_to_slot.items()}
+        self._changed()
+
+    def copy(self):
+        """Independent copy; segments are immutable and shared."""
+        clone = BM25Index(self.k1, self.b, self.epsilon)
+        clone.vocab = dict(self.vocab)
+        clone.df = self.df.copy()
+        clone.segments = list(self.segments)
+        clone.documents = list(self.documents)
+        clone.doc_len = self.doc_len.copy()
+        clone.alive = self.alive.copy()
+        clone.id_to_slot = dict(self.id_to_slot)
+        return clone
+
+    def idf(self):
+        """IDF per term id (0 for terms no live chunk contains)."""
+        if self._idf is None:
+            n = len(self)
+            present = self.df > 0
+            raw = np.zeros(len(self.df))
+            raw[present] = np.log(n - self.df[present] + 0.5) - np.log(self.df[present] + 0.5)
+            average_idf = raw[present].mean() if present.any() else 0.0
+            self._idf = np.where(raw < 0, self.epsilon * average_idf, raw) * present
+        return self._idf
+
+    def _slot_scores(self, query_tokens):
+        scores = np.zeros(len(self.alive))
+        if not len(self):
+            return scores
+        idf = self.idf()
+        if self._norms is None:
+            avgdl = self.doc_len[self.alive].sum() / len(self)
+            self._norms = self.k1 * (1 - self.b + self.b * self.doc_len / avgdl)
+        for term, query_freq in Counter(query_tokens).items():
+            term_id = self.vocab.get(term)
+            if term_id is None or idf[term_id] == 0.0:
+                continue
+            weight = idf[term_id] * query_freq * (self.k1 + 1)
+            for segment in self.segments:
+                postings = segment.postings(term_id)
+                if postings is not None:
+                    slots, tfs = postings
+                    scores[slots] += weight * tfs / (tfs + self._norms[slots])
+        return scores
+
+    def get_scores(self, query_tokens):
+        """BM25 score of every live chunk, in insertion order."""
+        return self._slot_scores(query_tokens)[self.alive]
+
+    def top_k(self, query_tokens, k):
+        """Best k chunks as Documents, highest score first (the same chunks as rank_bm25's get_top_n, up to ties)."""
+        k = min(k, len(self))
+        if k <= 0:
+            return []
+        scores = self._slot_scores(query_tokens)
+        scores[~self.alive] = -np.inf
+        # Linear-time selection of the k-th best score, then sort only the candidates
+        kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+        candidates = np.flatnonzero(scores >= kth)
+        # Highest score first; ties go to the later chunk
+        order = candidates[np.lexsort((-candidates, -scores[candidates]))][:k]
+        return [self.documents[slot] for slot in order]
+
+
+class BM25IndexRetriever(BaseRetriever):
+    """LangChain retriever over a BM25Index (drop-in for BM25Retriever in the EnsembleRetriever)."""
+
+    index: Any
+    preprocess_func: Any
+    k: int = 4
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self.index.top_k(self.preprocess_func(query), self.k)
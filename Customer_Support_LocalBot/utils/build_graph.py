@@ -1,106 +1,170 @@
 # build_graph.py
 import streamlit as st
+from collections import Counter
 import networkx as nx
-import re
+from utils.graph_index import NodeIndex, get_node_index
 from utils.visualization import visualize_graph, visualize_query_subgraph
 
-def build_knowledge_graph(docs):
+def graph_from_counts(node_counts, edge_weights, prune=True):
     """
-    Build a knowledge graph from document contents by extracting entities and relationships.
+    Build the knowledge graph from entity counts (see entity_extraction.count_entities).
+    
+    Counts from several documents can be summed first, so a stored document
+    does not have to be re-read to rebuild the graph.
     
     Args:
-        docs: List of document objects with page_content attribute
+        prune: Remove nodes with fewer than two neighbors (the graph shown to
+            the user); False gives the unpruned graph update_knowledge_graph keeps
     
     Returns:
         NetworkX graph object
     """
     G = nx.Graph()
-    
-    for doc in docs:
-        # Extract potential entities (starting with capital letters)
-        entities = re.findall(r'\b[A-Z][a-z]+(?: [A-Z][a-z]+)*\b', doc.page_content)
-        
-        # Add nodes and edges
-        if len(entities) > 1:
-            # Add all entities as nodes
-            for entity in entities:
-                if not G.has_node(entity):
-                    G.add_node(entity, type="entity", count=1)
-                else:
-                    # Increment count if node already exists
-                    G.nodes[entity]["count"] = G.nodes[entity].get("count", 0) + 1
-            
-            # Connect entities that appear close to each other
-            for i in range(len(entities) - 1):
-                if entities[i] != entities[i + 1]:  # Avoid self-loops
-                    if G.has_edge(entities[i], entities[i + 1]):
-                        # Increment weight if edge already exists
-                        G[entities[i]][entities[i + 1]]["weight"] = G[entities[i]][entities[i + 1]].get("weight", 1) + 1
-                    else:
-                        G.add_edge(entities[i], entities[i + 1], weight=1)
+    for entity, count in node_counts.items():
+        G.add_node(entity, type="entity", count=count)
+    for (a, b), weight in edge_weights.items():
+        G.add_edge(a, b, weight=weight)
+    if not prune:
+        return G
     
     # Remove nodes with low connectivity (optional)
     nodes_to_remove = [node for node, degree in dict(G.degree()).items() if degree < 2]
     G.remove_nodes_from(nodes_to_remove)
     
+    # Word -> node index for query lookups
+    G.graph["node_index"] = NodeIndex(G.nodes)
     return G
 
 
-def retrieve_from_graph(query, G, top_k=5):
+def counts_from_graph(full):
+    """Entity counts and edge weights of an unpruned graph; the inverse of graph_from_counts(..., prune=False)."""
+    node_counts = Counter({node: data["count"] for node, data in full.nodes(data=True)})
+    edge_weights = Counter({(a, b) if a < b else (b, a): data["weight"] for a, b, data in full.edges(data=True)})
+    return node_counts, edge_weights
+
+
+def update_knowledge_graph(full, G, node_counts, edge_weights, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1) one document's entity counts in place.
+    
+    Args:
+        full: Unpruned graph holding the summed counts of all documents
+        G: Pruned graph shown to the user, kept equal to graph_from_counts of the same counts
+        node_counts, edge_weights: The document's counts (see entity_extraction.count_entities)
+        sign: 1 to add the document, -1 to remove it
     """
-    Retrieve relevant information from the knowledge graph based on query.
+    def apply_nodes():
+        for entity, count in node_counts.items():
+            total = full.nodes[entity]["count"] + sign * count if entity in full else sign * count
+            if total > 0:
+                full.add_node(entity, type="entity", count=total)
+            elif entity in full:
+                full.remove_node(entity)
+
+    def apply_edges():
+        for (a, b), weight in edge_weights.items():
+            total = (full[a][b]["weight"] if full.has_edge(a, b) else 0) + sign * weight
+            if total > 0:
+                full.add_edge(a, b, weight=total)
+            elif full.has_edge(a, b):
+                full.remove_edge(a, b)
+
+    # Edges only exist between counted entities: add nodes first, remove them last
+    if sign > 0:
+        apply_nodes()
+        apply_edges()
+    else:
+        apply_edges()
+        apply_nodes()
     
+    # Only entities of this document can change degree, so only they can
+    # enter or leave the pruned graph
+    index = get_node_index(G)
+    touched = set(node_counts)
+    for a, b in edge_weights:
+        touched.update((a, b))
+    for entity in touched:
+        if entity in full and full.degree(entity) >= 2:
+            G.add_node(entity, **full.nodes[entity])
+            index.add(entity)
+        elif entity in G:
+            G.remove_node(entity)
+            index.remove(entity)
+    for entity in touched:
+        if entity not in G:
+            continue
+        for neighbor in list(G.neighbors(entity)):
+            if not full.has_edge(entity, neighbor):
+                G.remove_edge(entity, neighbor)
+        for neighbor, data in full[entity].items():
+            if neighbor in G:
+                G.add_edge(entity, neighbor, weight=data["weight"])
+
+
+def find_graph_nodes(query, G, top_k=5):
+    """
+    Find the knowledge graph nodes matching a query, without any Streamlit output.
+
+    Safe to run in a worker thread.
+
     Args:
         query: User query string
         G: NetworkX graph object
-        top_k: Number of top results to return
-    
+        top_k: Number of top related nodes to return
+
     Returns:
-        List of relevant nodes/content
+        (matched_nodes, related_nodes): Nodes matching a query word, and the
+        top_k of them and their neighbors by degree
     """
+    # Look up the query words in the word -> node index
+    index = get_node_index(G)
+    matches = index.match(query)
+    matched_nodes = [node for node in matches if node in G]
+    if not matched_nodes:
+        return [], []
+    named = index.phrases(query, matches)  # multi-word entities named in full
+
+    # Track all related nodes
+    related_nodes = set()
+
+    # Get first-degree connections
+    for node in matched_nodes:
+        related_nodes.update(G.neighbors(node))
+        related_nodes.add(node)  # Include the matched node itself
+
+    # Convert to list and sort by node degree (connection importance), entities named in full first
+    sorted_nodes = sorted(related_nodes, key=lambda x: (x in named, G.degree(x)), reverse=True)[:top_k]
+    return matched_nodes, sorted_nodes
+
+
+def show_graph_results(query, G, matched_nodes, sorted_nodes, top_k=5):
+    """Streamlit debug output and visualization for the results of find_graph_nodes."""
     # Debug log
     st.write(f"🔎 Searching GraphRAG for: {query}")
 
-    # Convert query into words to match knowledge graph nodes
-    query_words = query.lower().split()
-    matched_nodes = [node for node in G.nodes if any(word in node.lower() for word in query_words)]
-    
-    # Get related nodes
-    if matched_nodes:
-        # Track all related nodes
-        related_nodes = set()
-        
-        # Get first-degree connections
-        for node in matched_nodes:
-            related_nodes.update(G.neighbors(node))
-            related_nodes.add(node)  # Include the matched node itself
-        
-        # Convert to list and sort by node degree (connection importance)
-        sorted_nodes = sorted(related_nodes, key=lambda x: G.degree(x), reverse=True)[:top_k]
-        
-        # Display visualization in a collapsible section
-        with st.expander("📊 Knowledge Graph Visualization", expanded=False):
-            st.write("Showing nodes related to your query:")
-            
-            # Create subgraph for visualization
-            query_subgraph = visualize_query_subgraph(G, query, top_k=top_k)
-            
-            # Display export button
-            if st.button("Export Graph"):
-                # Create full graph visualization for download
-                full_vis = visualize_graph(G, query=None)
-                st.download_button(
-                    label="Download Graph HTML",
-                    data=full_vis,
-                    file_name="knowledge_graph.html",
-                    mime="text/html"
-                )
-        
-        # Debug info
-        st.write(f"🟢 GraphRAG Matched Nodes: {matched_nodes}")
-        st.write(f"🟢 GraphRAG Retrieved Related Nodes: {sorted_nodes}")
-        
-        return sorted_nodes
-    
-    st.write(f"❌ No graph results found for: {query}")
-    return []
\ No newline at end of file
+    if not matched_nodes:
+        st.write(f"❌ No graph results found for: {query}")
+        return
+
+    # Display visualization in a collapsible section
+    with st.expander("📊 Knowledge Graph Visualization", expanded=False):
+        st.write("Showing nodes related to your query:")
+
+        # Create subgraph for visualization
+        query_subgraph = visualize_query_subgraph(G, query, top_k=top_k)
+
+        # Display export button
+        if st.button("Export Graph"):
+            # Create full graph visualization for download
+            full_vis = visualize_graph(G, query=None)
+            st.download_button(
+                label="Download Graph HTML",
+                data=full_vis,
+                file_name="knowledge_graph.html",
+                mime="text/html"
+            )
+
+    # Debug info
+    st.write(f"🟢 GraphRAG Matched Nodes: {matched_nodes}")
+    st.write(f"🟢 GraphRAG Retrieved Related Nodes: {sorted_nodes}")
+
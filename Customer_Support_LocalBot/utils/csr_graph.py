@@ -0,0 +1,103 @@
+# csr_graph.py
+import networkx as nx
+import numpy as np
+from utils.graph_index import NodeIndex
+
+
+class CSRGraph:
+    """
+    Read-only knowledge graph stored as CSR adjacency arrays.
+
+    Node i's neighbors are indices[indptr[i]:indptr[i + 1]], with edge
+    weights in weights[...]. Each edge costs two int32 + float32 entries
+    instead of NetworkX's nested dicts, for graphs too large to hold as
+    nx.Graph. Supports what the graph lookups and visualizations read
+    (nodes, neighbors, degree, edges, subgraph, graph["node_index"]), so
+    it can be passed wherever the knowledge graph is only queried.
+    """
+
+    def __init__(self, names, counts, indptr, indices, weights):
+        self.names = names  # node id -> entity
+        self.ids = {name: i for i, name in enumerate(names)}
+        self.counts = counts
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.graph = {"node_index": NodeIndex(names)}
+
+    @classmethod
+    def from_counts(cls, node_counts, edge_weights):
+        """
+        Same graph as build_graph.graph_from_counts, including the removal of
+        nodes with fewer than two neighbors, built with array operations.
+        """
+        ids = {name: i for i, name in enumerate(node_counts)}
+        for pair in edge_weights:
+            for entity in pair:
+                ids.setdefault(entity, len(ids))  # edges can name entities without a count
+        names = list(ids)
+        pairs = np.array([(ids[a], ids[b]) for a, b in edge_weights], dtype=np.int64).reshape(-1, 2)
+        weights = np.fromiter(edge_weights.values(), dtype=np.float32, count=len(edge_weights))
+
+        # Remove nodes with low connectivity, in one pass like graph_from_counts
+        degree = np.bincount(pairs.ravel(), minlength=len(names))
+        keep = degree >= 2
+        kept = keep[pairs[:, 0]] & keep[pairs[:, 1]]
+        pairs, weights = pairs[kept], weights[kept]
+        new_id = np.cumsum(keep) - 1
+        pairs = new_id[pairs]
+        names = [name for name, k in zip(names, keep) if k]
+
+        # Both directions of every edge, sorted by source node
+        sources = np.concatenate([pairs[:, 0], pairs[:, 1]])
+        targets = np.concatenate([pairs[:, 1], pairs[:, 0]])
+        order = np.argsort(sources, kind="stable")
+        indptr = np.zeros(len(names) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=len(names)), out=indptr[1:])
+        counts = np.array([node_counts.get(name, 0) for name in names], dtype=np.int64)
+        return cls(names, counts, indptr, targets[order].astype(np.int32), np.concatenate([weights, weights])[order])
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __contains__(self, node):
+        return node in self.ids
+
+    def nodes(self):
+        return self.names
+
+    def neighbors(self, node):
+        i = self.ids[node]
+        return [self.names[j] for j in self.indices[self.indptr[i]:self.indptr[i + 1]]]
+
+    def degree(self, node):
+        i = self.ids[node]
+        return int(self.indptr[i + 1] - self.indptr[i])
+
+    def number_of_nodes(self):
+        return len(self.names)
+
+    def number_of_edges(self):
+        return len(self.indices) // 2
+
+    def edges(self):
+        for i, name in enumerate(self.names):
+            for j in self.indices[self.indptr[i]:self.indptr[i + 1]]:
+                if i < j:
+                    yield name, self.names[j]
+
+    def subgraph(self, nodes):
+        """Induced subgraph as a (small) nx.Graph, e.g. for visualization."""
+        G = nx.Graph()
+        for node in nodes:
+            i = self.ids[node]
+            G.add_node(node, type="entity", count=int(self.counts[i]))
+        for node in nodes:
+            i = self.ids[node]
+            for j, weight in zip(self.indices[self.indptr[i]:self.indptr[i + 1]], self.weights[self.indptr[i]:self.indptr[i + 1]]):
+                if self.names[j] in G:
+                    G.add_edge(node, self.names[j], weight=float(weight))
+        return G
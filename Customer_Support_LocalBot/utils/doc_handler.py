@@ -1,96 +1,185 @@
 #doc_handler.py
 import streamlit as st
-from langchain_community.document_loaders import PyPDFLoader, Docx2txtLoader, TextLoader
-from langchain.text_splitter import CharacterTextSplitter
-from langchain_ollama import OllamaEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain_community.retrievers import BM25Retriever
-from langchain.retrievers import EnsembleRetriever
-from utils.build_graph import build_knowledge_graph
-from rank_bm25 import BM25Okapi
-import os
+from utils.document_index import DocumentIndex
+from utils.index_store import document_key, file_hash, has_document, load_document, save_document
+from utils.ingestion import IngestError, IngestStats, ingest_files
+from utils.ollama_embeddings import OllamaEmbeddingClient
+from collections import Counter
+from itertools import islice
 import re
 
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt")
+
+
+def bm25_preprocess(text):
+    return re.sub(r"\W+", " ", text).lower().split()
+
+
+def store_chunks(key, chunks, vectors, node_counts, edge_weights):
+    """Store a parsed, split and embedded file and its entity counts under key."""
+    text_contents = [doc.page_content for doc in chunks]
+    save_document(
+        key,
+        text_contents,
+        [doc.metadata for doc in chunks],
+        vectors,
+        [Counter(bm25_preprocess(text)) for text in text_contents],
+        node_counts,
+        edge_weights,
+    )
+
+
+# 🚀 Shared across sessions and browser tabs: one pooled embedding client per
+# model, each document is read from the store once, and each set of documents
+# gets one retrieval pipeline
+@st.cache_resource(show_spinner=False)
+def get_embedding_client(embedding_model, base_url):
+    return OllamaEmbeddingClient(embedding_model, base_url)
+
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def load_stored_document(key):
+    # Raise rather than return None: st.cache_resource would keep a miss for good
+    document = load_document(key)
+    if document is None:
+        raise KeyError(f"Document {key} is not in the index store")
+    return document
+
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def build_retrieval_pipeline(keys, embedding_model, base_url):
+    """
+    Assemble the hybrid retrieval index from stored documents without re-embedding anything.
+
+    The returned index is shared: sessions copy it before adding or removing documents.
+
+    Args:
+        keys: Sorted tuple of document_key values
+        embedding_model, base_url: Ollama embedding model used for queries
+
+    Returns:
+        DocumentIndex over the documents
+    """
+    # 🚀 Hybrid Retrieval Setup
+    index = DocumentIndex(get_embedding_client(embedding_model, base_url), bm25_preprocess)
+    for key in keys:
+        index.add(load_stored_document(key))
+    return index
+
+
+def _file_key(file, embedding_model):
+    """document_key of an upload, hashed once per uploaded file and session."""
+    file_keys = st.session_state.setdefault("file_keys", {})
+    cache_key = (getattr(file, "file_id", file.name), embedding_model)
+    if cache_key not in file_keys:
+        file_keys[cache_key] = document_key(file_hash(file.getvalue()), embedding_model, CHUNK_SIZE, CHUNK_OVERLAP)
+    return file_keys[cache_key]
+
+
+def _ingest(pending, embedding_model, base_url):
+    """Parse and embed new files into the store; returns the keys of files without any text."""
+    empty = set()
+    embeddings = get_embedding_client(embedding_model, base_url)
+    stats = IngestStats()
+    progress = st.progress(0.0, text=f"Processing {len(pending)} new files...")
+    for done, (key, chunks, vectors, node_counts, edge_weights) in enumerate(
+        ingest_files(pending.values(), embeddings, CHUNK_SIZE, CHUNK_OVERLAP, stats), start=1
+    ):
+        if chunks:
+            store_chunks(key, chunks, vectors, node_counts, edge_weights)
+        else:
+            empty.add(key)
+        progress.progress(done / len(pending), text=f"Processed {done}/{len(pending)} new files")
+    for line in stats.report():
+        st.caption(f"⏱️ {line}")
+    client = embeddings.stats()
+    st.caption(
+        f"⏱️ ollama: {client['requests']} embedding requests, {client['retries']} retries, "
+        f"p50 {client['request_p50_seconds'] * 1000:.0f} ms, p95 {client['request_p95_seconds'] * 1000:.0f} ms"
+    )
+    return empty
+
 
 def process_documents(uploaded_files,reranker,embedding_model, base_url):
-    if st.session_state.documents_loaded:
-        return
+    """
+    Bring the session's retrieval pipeline in line with the uploaded files.
 
+    Files added to the uploader are ingested (if new) and added to the index;
+    files removed from it are deleted from the index. Returns True if the
+    set of documents changed.
+    """
     st.session_state.processing = True
-    documents = []
-    
-    # Create temp directory
-    if not os.path.exists("temp"):
-        os.makedirs("temp")
+    empty_files = st.session_state.setdefault("empty_files", set())
+    keys = set()
+    pending = {}
     
-    # Process files
+    # Only files never seen before are parsed and embedded
     for file in uploaded_files:
+        if not file.name.endswith(SUPPORTED_EXTENSIONS):
+            continue
+        key = _file_key(file, embedding_model)
+        if key in empty_files:
+            continue
+        keys.add(key)
+        if not has_document(key):
+            pending[key] = (key, file.name, file.getvalue())
+
+    if pending:
         try:
-            file_path = os.path.join("temp", file.name)
-            with open(file_path, "wb") as f:
-                f.write(file.getbuffer())
-
-            if file.name.endswith(".pdf"):
-                loader = PyPDFLoader(file_path)
-            elif file.name.endswith(".docx"):
-                loader = Docx2txtLoader(file_path)
-            elif file.name.endswith(".txt"):
-                loader = TextLoader(file_path)
-            else:
-                continue
-                
-            documents.extend(loader.load())
-            os.remove(file_path)
+            empty = _ingest(pending, embedding_model, base_url)
         except Exception as e:
-            st.error(f"Error processing {file.name}: {str(e)}")
-            return
-
-    # Text splitting
-    text_splitter = CharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200,
-        separator="\n"
-    )
-    texts = text_splitter.split_documents(documents)
-    text_contents = [doc.page_content for doc in texts]
+            name, cause = (e.name, e.cause) if isinstance(e, IngestError) else ("the uploaded files", e)
+            st.error(f"Error processing {name}: {cause}")
+            st.session_state.processing = False
+            return False
+        if empty:
+            st.warning("No text could be extracted from some of the uploaded files.")
+        empty_files.update(empty)
+        keys -= empty
 
-    # 🚀 Hybrid Retrieval Setup
-    embeddings = OllamaEmbeddings(model=embedding_model, base_url=base_url)
-    
-    # Vector store
-    vector_store = FAISS.from_documents(texts, embeddings)
-    
-    # BM25 store
-    bm25_retriever = BM25Retriever.from_texts(
-        text_contents, 
-        bm25_impl=BM25Okapi,
-        preprocess_func=lambda text: re.sub(r"\W+", " ", text).lower().split()
-    )
+    index = st.session_state.get("document_index")
+    current = index.keys() if index is not None else set()
+    st.session_state.processing = False
+    if keys == current:
+        return False
 
-    # Ensemble retrieval
-    ensemble_retriever = EnsembleRetriever(
-        retrievers=[
-            bm25_retriever,
-            vector_store.as_retriever(search_kwargs={"k": 5})
-        ],
-        weights=[0.4, 0.6]
-    )
+    if not keys:
+        st.session_state.document_index = None
+        st.session_state.retrieval_pipeline = None
+        st.session_state.documents_loaded = False
+        return True
+
+    if index is None:
+        index = build_retrieval_pipeline(tuple(sorted(keys)), embedding_model, base_url)
+        st.session_state.document_index_owned = False
+    else:
+        # 🚀 Incremental update: copy the shared index once, then add/remove documents in place
+        if not st.session_state.get("document_index_owned"):
+            index = index.copy()
+            st.session_state.document_index_owned = True
+        for key in current - keys:
+            index.remove(key)
+        for key in keys - current:
+            index.add(load_stored_document(key))
 
     # Store in session
+    st.session_state.document_index = index
     st.session_state.retrieval_pipeline = {
-        "ensemble": ensemble_retriever,
+        "ensemble": index.ensemble,
         "reranker": reranker,  # Now using the global reranker variable
-        "texts": text_contents,
-        "knowledge_graph": build_knowledge_graph(texts)  # Store Knowledge Graph
+        "texts": index.texts,
+        "knowledge_graph": index.knowledge_graph  # Store Knowledge Graph
     }
-
     st.session_state.documents_loaded = True
-    st.session_state.processing = False
 
     # ✅ Debugging: Print Knowledge Graph Nodes & Edges
     if "knowledge_graph" in st.session_state.retrieval_pipeline:
         G = st.session_state.retrieval_pipeline["knowledge_graph"]
-        st.write(f"🔗 Total Nodes: {len(G.nodes)}")
-        st.write(f"🔗 Total Edges: {len(G.edges)}")
-        st.write(f"🔗 Sample Nodes: {list(G.nodes)[:10]}")
-        st.write(f"🔗 Sample Edges: {list(G.edges)[:10]}")
+        st.write(f"🔗 Total Nodes: {G.number_of_nodes()}")
+        st.write(f"🔗 Total Edges: {G.number_of_edges()}")
+        st.write(f"🔗 Sample Nodes: {list(islice(G.nodes(), 10))}")
+        st.write(f"🔗 Sample Edges: {list(islice(G.edges(), 10))}")
+
+    return True
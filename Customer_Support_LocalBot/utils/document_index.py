@@ -0,0 +1,151 @@
+# document_index.py
+import os
+from collections import Counter
+import faiss
+import networkx as nx
+import numpy as np
+from langchain.retrievers import EnsembleRetriever
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from utils.bm25 import BM25Index, BM25IndexRetriever
+from utils.build_graph import counts_from_graph, graph_from_counts, update_knowledge_graph
+from utils.csr_graph import CSRGraph
+from utils.graph_index import get_node_index
+
+# Above this many entities the knowledge graph is served as a CSRGraph, built
+# from summed Counters, instead of NetworkX graphs updated in place
+CSR_GRAPH_MIN_NODES = int(os.getenv("CSR_GRAPH_MIN_NODES", "200000"))
+
+
+class DocumentIndex:
+    """
+    Hybrid retrieval index (FAISS + BM25 + knowledge graph) over stored documents.
+
+    Documents (see index_store.load_document) are added and removed one at a
+    time. Their chunks are added to FAISS and BM25 under ids "<key>:<n>",
+    which are also used to delete them. The knowledge graph counts are
+    adjusted in place. No document is ever re-read, re-split or re-embedded.
+
+    Once the graph has CSR_GRAPH_MIN_NODES entities, the NetworkX graphs are
+    dropped: only the summed counts are kept, and knowledge_graph is a
+    read-only CSRGraph rebuilt from them when it is next read after a change.
+    It switches back below half that size.
+    """
+
+    def __init__(self, embeddings, preprocess_func):
+        self.embeddings = embeddings
+        self.preprocess_func = preprocess_func
+        self.vector_store = None  # created with the first document, once the dimension is known
+        self.bm25 = BM25Index()
+        self.full_graph = nx.Graph()  # unpruned counts; None while the graph is a CSRGraph
+        self.graph_counts = None  # (node_counts, edge_weights) while the graph is a CSRGraph
+        self._knowledge_graph = nx.Graph()  # None while a CSRGraph has to be rebuilt
+        self.documents = {}  # key -> stored document
+        self.ensemble = None
+
+    def keys(self):
+        return set(self.documents)
+
+    @property
+    def knowledge_graph(self):
+        if self._knowledge_graph is None:
+            self._knowledge_graph = CSRGraph.from_counts(*self.graph_counts)
+        return self._knowledge_graph
+
+    @property
+    def texts(self):
+        return [document.page_content for document in self.bm25.live_documents()]
+
+    def _build_ensemble(self):
+        # Ensemble retrieval
+        self.ensemble = EnsembleRetriever(
+            retrievers=[
+                BM25IndexRetriever(index=self.bm25, preprocess_func=self.preprocess_func),
+                self.vector_store.as_retriever(search_kwargs={"k": 5})
+            ],
+            weights=[0.4, 0.6]
+        )
+
+    def add(self, document):
+        key = document["key"]
+        if key in self.documents:
+            return
+        ids = [f"{key}:{i}" for i in range(len(document["texts"]))]
+        vectors = np.asarray(document["vectors"], dtype="float32")
+
+        if self.vector_store is None:
+            self.vector_store = FAISS(
+                embedding_function=self.embeddings,
+                index=faiss.IndexFlatL2(vectors.shape[1]),
+                docstore=InMemoryDocstore(),
+                index_to_docstore_id={},
+            )
+            self._build_ensemble()
+        self.vector_store.add_embeddings(
+            list(zip(document["texts"], vectors)), metadatas=document["metadatas"], ids=ids
+        )
+
+        self.bm25.add(
+            ids,
+            [Document(page_content=text, metadata=metadata) for text, metadata in zip(document["texts"], document["metadatas"])],
+            document["term_counts"],
+        )
+        self._update_graph(document)
+        self.documents[key] = document
+
+    def remove(self, key):
+        document = self.documents.pop(key)
+        ids = [f"{key}:{i}" for i in range(len(document["texts"]))]
+        self.vector_store.delete(ids)
+        self.bm25.remove(ids)
+        self._update_graph(document, sign=-1)
+
+    def _update_graph(self, document, sign=1):
+        """Add or subtract a document's entity counts, switching between NetworkX and CSR at the thresholds."""
+        if self.full_graph is not None:
+            update_knowledge_graph(
+                self.full_graph, self._knowledge_graph, document["node_counts"], document["edge_weights"], sign
+            )
+            if self.full_graph.number_of_nodes() >= CSR_GRAPH_MIN_NODES:
+                self.graph_counts = counts_from_graph(self.full_graph)
+                self.full_graph = self._knowledge_graph = None
+            return
+
+        node_counts, edge_weights = self.graph_counts
+        for totals, counts in ((node_counts, document["node_counts"]), (edge_weights, document["edge_weights"])):
+            for item, count in counts.items():
+                totals[item] += sign * count
+                if totals[item] <= 0:
+                    del totals[item]
+        if len(node_counts) < CSR_GRAPH_MIN_NODES // 2:
+            self.full_graph = graph_from_counts(node_counts, edge_weights, prune=False)
+            self._knowledge_graph = graph_from_counts(node_counts, edge_weights)
+            self.graph_counts = None
+        else:
+            self._knowledge_graph = None
+
+    def copy(self):
+        """Independent copy, so one session can change its documents without affecting others."""
+        clone = DocumentIndex(self.embeddings, self.preprocess_func)
+        if self.vector_store is not None:
+            clone.vector_store = FAISS(
+                embedding_function=self.embeddings,
+                index=faiss.clone_index(self.vector_store.index),
+                docstore=InMemoryDocstore(dict(self.vector_store.docstore._dict)),
+                index_to_docstore_id=dict(self.vector_store.index_to_docstore_id),
+            )
+        clone.bm25 = self.bm25.copy()
+        if clone.vector_store is not None:
+            clone._build_ensemble()
+        if self.full_graph is not None:
+            clone.full_graph = self.full_graph.copy()
+            clone._knowledge_graph = self._knowledge_graph.copy()
+            clone._knowledge_graph.graph["node_index"] = get_node_index(self._knowledge_graph).copy()  # graph.copy() shares it
+        else:
+            # A CSRGraph is never modified, so the copy can share it until its counts change
+            clone.full_graph = None
+            clone.graph_counts = tuple(Counter(counts) for counts in self.graph_counts)
+            clone._knowledge_graph = self._knowledge_graph
+        clone.documents = dict(self.documents)
+        return clone
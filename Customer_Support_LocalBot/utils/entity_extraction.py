@@ -0,0 +1,38 @@
+# entity_extraction.py
+import re
+from collections import Counter
+
+# Potential entities: runs of capitalized words ("Customer Service")
+ENTITY_PATTERN = re.compile(r'\b[A-Z][a-z]+(?: [A-Z][a-z]+)*\b')
+
+# Part of every stored document's key: bump it when the counts change, so
+# documents counted the old way are processed again (2: counted per page,
+# before splitting, instead of per overlapping chunk)
+ENTITY_COUNT_VERSION = 2
+
+
+def count_entities(texts, node_counts=None, edge_weights=None):
+    """
+    Count entity occurrences and co-occurrences in texts.
+
+    Entities next to each other in a text are connected. Texts with fewer
+    than two entities are skipped. Kept free of Streamlit and NetworkX
+    imports so it is cheap to run in worker processes.
+
+    Args:
+        texts: Iterable of strings
+        node_counts, edge_weights: Counters to add to (new ones if None)
+
+    Returns:
+        (node_counts, edge_weights): Counters keyed by entity and by sorted entity pair
+    """
+    node_counts = Counter() if node_counts is None else node_counts
+    edge_weights = Counter() if edge_weights is None else edge_weights
+    for text in texts:
+        entities = ENTITY_PATTERN.findall(text)
+        if len(entities) > 1:
+            node_counts.update(entities)
+            # Connect entities that appear close to each other, avoiding self-loops
+            edge_weights.update((a, b) if a < b else (b, a) for a, b in zip(entities, entities[1:]) if a != b)
+    return node_counts, edge_weights
+
@@ -0,0 +1,129 @@
+# graph_index.py
+import re
+
+try:
+    import ahocorasick  # optional: pip install pyahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+def tokenize(text):
+    return re.findall(r'\w+', str(text).lower())
+
+
+class NodeIndex:
+    """
+    Inverted index from lowercase words to the knowledge graph nodes containing them.
+
+    A query only looks up its own words, so matching costs the same on a
+    graph of any size. Multi-word entities named in full in the query
+    (e.g. "Customer Service") are found with an Aho-Corasick automaton
+    when pyahocorasick is installed, or by checking the word matches
+    otherwise; both give the same result.
+    """
+
+    def __init__(self, nodes=()):
+        self.postings = {}  # word -> {node: None}, in insertion order
+        self.names = {}  # node -> lowercase name
+        self._automaton = None
+        for node in nodes:
+            self.add(node)
+
+    def __contains__(self, node):
+        return node in self.names
+
+    def add(self, node):
+        if node in self.names:
+            return
+        self.names[node] = str(node).lower()
+        for word in set(tokenize(node)):
+            self.postings.setdefault(word, {})[node] = None
+        self._automaton = None
+
+    def remove(self, node):
+        if self.names.pop(node, None) is None:
+            return
+        for word in set(tokenize(node)):
+            nodes = self.postings[word]
+            del nodes[node]
+            if not nodes:
+                del self.postings[word]
+        self._automaton = None
+
+    def copy(self):
+        clone = NodeIndex()
+        clone.postings = {word: dict(nodes) for word, nodes in self.postings.items()}
+        clone.names = dict(self.names)
+        return clone
+
+    def match(self, query):
+        """
+        Nodes sharing a word with the query.
+
+        Returns:
+            Dict of node -> number of query words found in its name, in index order
+        """
+        scores = {}
+        for word in tokenize(query):
+            for node in self.postings.get(word, ()):
+                scores[node] = scores.get(node, 0) + 1
+        return scores
+
+    def _phrase_automaton(self):
+        if self._automaton is None:
+            automaton = ahocorasick.Automaton()
+            for node, name in self.names.items():
+                if " " in name:
+                    automaton.add_word(name, (node, name))
+            if len(automaton):
+                automaton.make_automaton()
+            self._automaton = automaton
+        return self._automaton
+
+    def phrases(self, query, candidates=None):
+        """
+        Multi-word nodes whose whole name appears in the query, on word boundaries.
+
+        Args:
+            query: User query string
+            candidates: Result of match(query), if already computed
+
+        Returns:
+            Set of nodes
+        """
+        text = query.lower()
+
+        def on_boundary(start, end):
+            return (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum())
+
+        if ahocorasick is not None:
+            automaton = self._phrase_automaton()
+            if not len(automaton):
+                return set()
+            return {
+                node for end, (node, name) in automaton.iter(text) if on_boundary(end + 1 - len(name), end + 1)
+            }
+
+        found = set()
+        for node in candidates if candidates is not None else self.match(query):
+            name = self.names[node]
+            if " " in name:
+                start = text.find(name)
+                while start != -1 and not on_boundary(start, start + len(name)):
+                    start = text.find(name, start + 1)
+                if start != -1:
+                    found.add(node)
+        return found
+
+
+def get_node_index(G):
+    """
+    NodeIndex of a graph, kept in G.graph["node_index"] (built on first use).
+
+    Subgraph views share the parent's graph attributes, so their index can
+    contain nodes outside the view; check membership in G.
+    """
+    index = G.graph.get("node_index")
+    if index is None:
+        index = G.graph["node_index"] = NodeIndex(G.nodes())
+    return index
@@ -0,0 +1,74 @@
+# hyde_cache.py
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from utils.index_store import STORE_DIR
+
+HYDE_CACHE_PATH = os.getenv("HYDE_CACHE_PATH", os.path.join(STORE_DIR, "hyde_cache.sqlite"))
+HYDE_CACHE_MAX_ITEMS = int(os.getenv("HYDE_CACHE_MAX_ITEMS", "5000"))
+
+
+def normalize_question(question):
+    """Lowercase, collapse whitespace and drop trailing punctuation, so rephrasings of the same text share a key."""
+    return " ".join(question.lower().split()).rstrip(" ?!.")
+
+
+class HydeCache:
+    """
+    LRU cache of HyDE expansions (hypothetical answers), persisted in SQLite.
+
+    Keys are the model name and the normalized question. An expansion does
+    not depend on the uploaded documents or the chat history, so entries
+    stay valid across sessions and restarts. The most recently used
+    `max_items` entries are kept in memory and on disk.
+    """
+
+    def __init__(self, path=HYDE_CACHE_PATH, max_items=HYDE_CACHE_MAX_ITEMS):
+        self.max_items = max_items
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS expansions (key TEXT PRIMARY KEY, expansion TEXT, last_used REAL)"
+        )
+        rows = self._db.execute(
+            "SELECT key, expansion FROM expansions ORDER BY last_used DESC LIMIT ?", (max_items,)
+        ).fetchall()
+        self._items = OrderedDict(reversed(rows))
+
+    @staticmethod
+    def key(model, question):
+        return f"{model}\n{normalize_question(question)}"
+
+    def get(self, key):
+        with self._lock:
+            expansion = self._items.get(key)
+            if expansion is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._items.move_to_end(key)
+            self._db.execute("UPDATE expansions SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            return expansion
+
+    def put(self, key, expansion):
+        with self._lock:
+            self._items[key] = expansion
+            self._items.move_to_end(key)
+            self._db.execute(
+                "INSERT OR REPLACE INTO expansions VALUES (?, ?, ?)", (key, expansion, time.time())
+            )
+            while len(self._items) > self.max_items:
+                oldest, _ = self._items.popitem(last=False)
+                self._db.execute("DELETE FROM expansions WHERE key = ?", (oldest,))
+            self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            return {"items": len(self._items), "hits": self.hits, "misses": self.misses}
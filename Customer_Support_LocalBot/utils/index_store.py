@@ -0,0 +1,86 @@
+# index_store.py
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+from utils.entity_extraction import ENTITY_COUNT_VERSION
+
+STORE_DIR = os.getenv("INDEX_STORE_DIR", "index_store")
+
+
+def file_hash(data):
+    """SHA-256 of an uploaded file's bytes, used as its content address."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def document_key(digest, embedding_model, chunk_size, chunk_overlap):
+    """
+    Store key of a processed document.
+
+    The same file processed with another embedding model or splitter settings
+    produces different chunks and vectors, and another ENTITY_COUNT_VERSION
+    different graph counts, so those are part of the key.
+    """
+    settings = json.dumps([embedding_model, chunk_size, chunk_overlap, ENTITY_COUNT_VERSION])
+    return f"{digest}-{hashlib.sha256(settings.encode()).hexdigest()[:12]}"
+
+
+def _path(key):
+    return os.path.join(STORE_DIR, key[:2], key)
+
+
+def has_document(key):
+    return os.path.exists(os.path.join(_path(key), "document.json"))
+
+
+def save_document(key, texts, metadatas, vectors, term_counts, node_counts, edge_weights):
+    """
+    Persist everything retrieval needs for one document.
+
+    Args:
+        key: document_key of the file
+        texts, metadatas: Chunk contents and their metadata
+        vectors: Chunk embeddings, one row per chunk
+        term_counts: BM25 term frequencies, one {token: count} dict per chunk
+        node_counts, edge_weights: Knowledge graph counts (see entity_extraction.count_entities)
+    """
+    final_path = _path(key)
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+
+    # Write into a scratch directory and rename it into place, so a reader
+    # never sees a half-written document
+    tmp_path = tempfile.mkdtemp(dir=os.path.dirname(final_path), prefix=".tmp-")
+    np.save(os.path.join(tmp_path, "vectors.npy"), np.asarray(vectors, dtype="float32"))
+    with open(os.path.join(tmp_path, "document.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "texts": texts,
+            "metadatas": metadatas,
+            "term_counts": term_counts,
+            "node_counts": node_counts,
+            "edge_weights": [[a, b, w] for (a, b), w in edge_weights.items()],
+        }, f)
+    try:
+        os.rename(tmp_path, final_path)
+    except OSError:
+        # Another session stored the same document first
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+def load_document(key):
+    """
+    Load a stored document, or None if it has not been processed yet.
+
+    The vectors are memory-mapped, so every session and process reading
+    the same document shares one copy in the OS page cache.
+    """
+    path = _path(key)
+    if not has_document(key):
+        return None
+    with open(os.path.join(path, "document.json"), encoding="utf-8") as f:
+        document = json.load(f)
+    document["key"] = key
+    document["vectors"] = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+    document["edge_weights"] = {(a, b): w for a, b, w in document["edge_weights"]}
+    return document
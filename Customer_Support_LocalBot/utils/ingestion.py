@@ -0,0 +1,194 @@
+# ingestion.py
+import io
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+from langchain.text_splitter import CharacterTextSplitter
+from langchain_core.documents import Document
+from utils.entity_extraction import count_entities
+
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class IngestError(RuntimeError):
+    """Parsing or embedding one file failed; name is the file's name."""
+
+    def __init__(self, name, cause):
+        super().__init__(f"{name}: {cause}")
+        self.name = name
+        self.cause = cause
+
+
+def get_pool():
+    """Process pool shared by all sessions, started on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=INGEST_WORKERS)
+        return _pool
+
+
+def discard_pool(pool):
+    """Shuts down a pool broken by a crashed worker, so the next get_pool() starts a new one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:  # another session may already have replaced it
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def parse_file(name, data):
+    """
+    Extract the pages of one file straight from its bytes (runs in a worker process).
+
+    Args:
+        name: Original file name, used for the type and the source metadata
+        data: File content
+
+    Returns:
+        (pages, seconds): List of (text, metadata) tuples and the time spent parsing
+    """
+    start = time.perf_counter()
+    if name.endswith(".pdf"):
+        from pypdf import PdfReader
+        reader = PdfReader(io.BytesIO(data))
+        pages = [(page.extract_text() or "", {"source": name, "page": i}) for i, page in enumerate(reader.pages)]
+    elif name.endswith(".docx"):
+        import docx2txt
+        pages = [(docx2txt.process(io.BytesIO(data)), {"source": name})]
+    elif name.endswith(".txt"):
+        pages = [(data.decode("utf-8"), {"source": name})]
+    else:
+        pages = []
+    return pages, time.perf_counter() - start
+
+
+def parse_and_count(name, data):
+    """
+    parse_file, then count the knowledge graph entities of its pages (runs in a worker process).
+
+    Entities are counted on the page text before it is split, so the text
+    shared by overlapping chunks is counted once.
+
+    Returns:
+        (pages, parse_seconds, node_counts, edge_weights, extract_seconds)
+    """
+    pages, parse_seconds = parse_file(name, data)
+    start = time.perf_counter()
+    node_counts, edge_weights = count_entities(text for text, _ in pages)
+    return pages, parse_seconds, node_counts, edge_weights, time.perf_counter() - start
+
+
+def iter_chunks(pages, splitter):
+    """Split pages lazily, yielding chunks as Documents one page at a time."""
+    for text, metadata in pages:
+        for chunk in splitter.split_text(text):
+            yield Document(page_content=chunk, metadata=dict(metadata))
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class IngestStats:
+    """Items processed and time spent per stage, for throughput reporting."""
+
+    def __init__(self):
+        self.files = 0
+        self.bytes = 0
+        self.pages = 0
+        self.chunks = 0
+        self.parse_seconds = 0.0  # summed over worker processes
+        self.extract_seconds = 0.0  # entity counting, summed over worker processes
+        self.split_seconds = 0.0
+        self.embed_seconds = 0.0  # time spent waiting on the embedding client
+        self.started = time.perf_counter()
+
+    def report(self):
+        """One line per stage: items, busy seconds and items per second."""
+        def rate(items, seconds):
+            return items / seconds if seconds else float("inf")
+
+        wall = time.perf_counter() - self.started
+        return [
+            f"parse: {self.files} files, {self.pages} pages, {self.bytes / 1e6:.1f} MB in {self.parse_seconds:.2f}s "
+            f"({rate(self.pages, self.parse_seconds):.0f} pages/s per worker, {INGEST_WORKERS} workers)",
+            f"entities: {self.pages} pages in {self.extract_seconds:.2f}s "
+            f"({rate(self.pages, self.extract_seconds):.0f} pages/s per worker)",
+            f"split: {self.chunks} chunks in {self.split_seconds:.2f}s ({rate(self.chunks, self.split_seconds):.0f} chunks/s)",
+            f"embed: {self.chunks} chunks in {self.embed_seconds:.2f}s ({rate(self.chunks, self.embed_seconds):.1f} chunks/s)",
+            f"total: {wall:.2f}s wall ({rate(self.chunks, wall):.1f} chunks/s end to end)",
+        ]
+
+
+def ingest_files(files, embeddings, chunk_size, chunk_overlap, stats):
+    """
+    Parse files and count their entities in the process pool, and embed their chunks as each file arrives.
+
+    Parsing of the remaining files continues in the workers while the chunks
+    of a finished file are split and queued on the embedding client in
+    batches of its batch_size. The client embeds several batches at once
+    and blocks the split when its queue is full.
+
+    Args:
+        files: Iterable of (key, name, data) tuples
+        embeddings: OllamaEmbeddingClient (anything with batch_size and submit(texts) -> Future)
+        chunk_size, chunk_overlap: CharacterTextSplitter settings
+        stats: IngestStats updated in place
+
+    Yields:
+        (key, chunks, vectors, node_counts, edge_weights) per file, in completion order
+    """
+    splitter = CharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap, separator="\n")
+    pool = get_pool()
+    futures = {}
+    for key, name, data in files:
+        try:
+            futures[pool.submit(parse_and_count, name, data)] = (key, name)
+        except BrokenProcessPool as e:
+            discard_pool(pool)
+            raise IngestError(name, e) from e
+        stats.bytes += len(data)
+
+    for future in as_completed(futures):
+        key, name = futures[future]
+        try:
+            pages, parse_seconds, node_counts, edge_weights, extract_seconds = future.result()
+        except BrokenProcessPool as e:
+            # A worker died (e.g. out of memory or a crash in a parser): every
+            # later submit would fail too, so the pool is replaced on next use
+            discard_pool(pool)
+            raise IngestError(name, e) from e
+        except Exception as e:
+            raise IngestError(name, e) from e
+        stats.files += 1
+        stats.pages += len(pages)
+        stats.parse_seconds += parse_seconds
+        stats.extract_seconds += extract_seconds
+
+        chunks, pending = [], []
+        split_start = time.perf_counter()
+        for batch in batched(iter_chunks(pages, splitter), embeddings.batch_size):
+            embed_start = time.perf_counter()
+            stats.split_seconds += embed_start - split_start
+            pending.append(embeddings.submit([doc.page_content for doc in batch]))
+            chunks.extend(batch)
+            split_start = time.perf_counter()
+            stats.embed_seconds += split_start - embed_start
+        wait_start = time.perf_counter()
+        stats.split_seconds += wait_start - split_start
+        try:
+            vectors = [vector for future in pending for vector in future.result()]
+        except Exception as e:
+            raise IngestError(name, e) from e
+        stats.embed_seconds += time.perf_counter() - wait_start
+        stats.chunks += len(chunks)
+        yield key, chunks, vectors, node_counts, edge_weights
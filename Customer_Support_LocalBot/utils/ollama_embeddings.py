@@ -0,0 +1,116 @@
+# ollama_embeddings.py
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from langchain_core.embeddings import Embeddings
+
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "4"))
+EMBED_TIMEOUT = float(os.getenv("EMBED_TIMEOUT", "120"))  # seconds per request
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class OllamaEmbeddingClient(Embeddings):
+    """
+    Embeds texts through Ollama's /api/embed in batches, with several requests in flight.
+
+    Requests share one pooled HTTP session. At most `max_concurrency`
+    batches run at once, and submit() blocks while `2 * max_concurrency`
+    batches are queued, so a fast producer cannot pile up unbounded work
+    (backpressure). Connection errors, timeouts and 429/5xx responses are
+    retried with exponential backoff and jitter.
+
+    Usable anywhere LangChain expects an Embeddings object (e.g. FAISS).
+    """
+
+    def __init__(self, model, base_url, batch_size=EMBED_BATCH_SIZE, max_concurrency=EMBED_CONCURRENCY,
+                 max_retries=EMBED_MAX_RETRIES, timeout=EMBED_TIMEOUT, backoff=0.5):
+        self.model = model
+        self.url = f"{base_url.rstrip('/')}/api/embed"
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff = backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="ollama-embed")
+        self._slots = threading.BoundedSemaphore(2 * max_concurrency)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.texts = 0
+        self.request_seconds = deque(maxlen=10000)  # latencies of the most recent requests
+
+    def _post(self, texts):
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                response = self.session.post(
+                    self.url, json={"model": self.model, "input": texts}, timeout=self.timeout
+                )
+                if response.status_code not in RETRY_STATUS:
+                    response.raise_for_status()
+                    vectors = response.json()["embeddings"]
+                    with self._lock:
+                        self.requests += 1
+                        self.texts += len(texts)
+                        self.request_seconds.append(time.perf_counter() - start)
+                    return vectors
+                error = requests.HTTPError(f"{response.status_code} from {self.url}", response=response)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            if attempt == self.max_retries:
+                raise error
+            with self._lock:
+                self.retries += 1
+            time.sleep(self.backoff * 2 ** attempt * (0.5 + random.random()))
+
+    def _run(self, texts):
+        try:
+            return self._post(texts)
+        finally:
+            self._slots.release()
+
+    def submit(self, texts):
+        """Queue one batch; returns a Future of its vectors. Blocks while the queue is full."""
+        if not texts:
+            future = Future()
+            future.set_result([])
+            return future
+        self._slots.acquire()
+        try:
+            return self._executor.submit(self._run, list(texts))
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def embed_documents(self, texts):
+        futures = [self.submit(texts[i:i + self.batch_size]) for i in range(0, len(texts), self.batch_size)]
+        return [vector for future in futures for vector in future.result()]
+
+    def embed_query(self, text):
+        # Queries skip the batch queue so a long ingestion does not delay them
+        return self._post([text])[0]
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self.request_seconds)
+        def pct(q):
+            return latencies[min(len(latencies) - 1, int(q * len(latencies)))] if latencies else 0.0
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "texts": self.texts,
+            "request_p50_seconds": pct(0.5),
+            "request_p95_seconds": pct(0.95),
+            "request_seconds_mean": sum(latencies) / len(latencies) if latencies else 0.0,
+        }
@@ -0,0 +1,119 @@
+# reranker.py
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "16"))
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "20000"))  # (query, chunk) scores kept
+RERANK_CONFIDENT_SCORE = float(os.getenv("RERANK_CONFIDENT_SCORE", "5.0"))  # set to inf to always score everything
+
+
+def content_hash(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class CachedReranker:
+    """
+    CrossEncoder reranking with deduplication, a score cache and early cutoff.
+
+    Candidates with the same content (e.g. found by both the graph and
+    FAISS) are scored once. Scores are cached per (query hash, chunk hash)
+    in an LRU shared by all sessions, so a repeated question or a chunk
+    that comes back in the next turn is not scored again. The remaining
+    candidates are scored in batches of `batch_size`, in retrieval order;
+    scoring stops once `top_n` candidates score at least `confident_score`
+    (a CrossEncoder logit; 5.0 is a sigmoid of about 0.99).
+    """
+
+    def __init__(self, model, batch_size=RERANK_BATCH_SIZE, cache_size=RERANK_CACHE_SIZE,
+                 confident_score=RERANK_CONFIDENT_SCORE):
+        self.model = model
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.confident_score = confident_score
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.call_seconds = deque(maxlen=10000)  # latencies of the most recent calls
+
+    def _cached_scores(self, query_key, hashes):
+        with self._lock:
+            scores = {}
+            for h in hashes:
+                score = self._cache.get((query_key, h))
+                if score is not None:
+                    self._cache.move_to_end((query_key, h))
+                    scores[h] = score
+            return scores
+
+    def _store(self, query_key, scores):
+        with self._lock:
+            for h, score in scores.items():
+                self._cache[(query_key, h)] = score
+                self._cache.move_to_end((query_key, h))
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def rerank(self, query, docs, top_n):
+        """
+        Rerank documents for a query.
+
+        Args:
+            query: User query string
+            docs: Candidate Documents, best retrieval rank first
+            top_n: Number of documents to return (max_contexts)
+
+        Returns:
+            (ranked_docs, info): Best top_n documents, highest score first, and a
+            dict with the candidate, cached and scored counts and the call's seconds
+        """
+        start = time.perf_counter()
+        unique = {}
+        for doc in docs:
+            unique.setdefault(content_hash(doc.page_content), doc)
+        query_key = content_hash(query)
+
+        scores = self._cached_scores(query_key, unique)
+        cached = len(scores)
+        pending = [h for h in unique if h not in scores]
+        scored = 0
+        stopped_early = False
+        for i in range(0, len(pending), self.batch_size):
+            if sum(score >= self.confident_score for score in scores.values()) >= top_n:
+                stopped_early = True
+                break
+            batch = pending[i:i + self.batch_size]
+            batch_scores = self.model.predict(
+                [[query, unique[h].page_content] for h in batch], batch_size=self.batch_size
+            )
+            new_scores = {h: float(score) for h, score in zip(batch, batch_scores)}
+            self._store(query_key, new_scores)
+            scores.update(new_scores)
+            scored += len(batch)
+
+        # Unscored candidates (after an early cutoff) rank below the confident ones
+        ranked = sorted(scores, key=scores.get, reverse=True)[:top_n]
+        seconds = time.perf_counter() - start
+        self.call_seconds.append(seconds)
+        return [unique[h] for h in ranked], {
+            "candidates": len(docs),
+            "unique": len(unique),
+            "cached": cached,
+            "scored": scored,
+            "stopped_early": stopped_early,
+            "seconds": seconds,
+        }
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self.call_seconds)
+            items = len(self._cache)
+        def pct(q):
+            return latencies[min(len(latencies) - 1, int(q * len(latencies)))] if latencies else 0.0
+        return {
+            "calls": len(latencies),
+            "cached_scores": items,
+            "call_p50_seconds": pct(0.5),
+            "call_p95_seconds": pct(0.95),
+        }
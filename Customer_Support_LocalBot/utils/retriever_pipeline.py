@@ -1,34 +1,161 @@
 #retriever_pipeline.py
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
 import streamlit as st
-from utils.build_graph import retrieve_from_graph
+from utils.build_graph import find_graph_nodes, show_graph_results
+from utils.hyde_cache import HydeCache
 from langchain_core.documents import Document
 import requests
 
+HYDE_TIMEOUT = float(os.getenv("HYDE_TIMEOUT", "8"))  # seconds to wait for HyDE before searching with the raw query
+HYDE_REQUEST_TIMEOUT = float(os.getenv("HYDE_REQUEST_TIMEOUT", "120"))  # a late expansion still warms the cache until then
+HYDE_WORKERS = int(os.getenv("HYDE_WORKERS", "2"))
+RETRIEVAL_TIMEOUT = float(os.getenv("RETRIEVAL_TIMEOUT", "20"))  # seconds per search stage (BM25, FAISS, graph)
+RETRIEVAL_WORKERS = int(os.getenv("RETRIEVAL_WORKERS", "8"))
+
+_pool = None
+_hyde_pool = None
+_hyde_cache = None
+_hyde_inflight = {}  # cache key -> Future of an expansion being generated
+_hyde_lock = threading.Lock()
+
+
+def get_pool():
+    """Thread pool shared by all sessions for the retrieval stages, started on first use."""
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=RETRIEVAL_WORKERS, thread_name_prefix="retrieval")
+    return _pool
+
+
+def get_hyde_cache():
+    global _hyde_cache
+    if _hyde_cache is None:
+        _hyde_cache = HydeCache()
+    return _hyde_cache
+
+
 # 🚀 Query Expansion with HyDE
-def expand_query(query,uri,model):
+def expand_query(query,uri,model,timeout=HYDE_REQUEST_TIMEOUT):
+    # Runs in a worker thread: raises on failure instead of calling Streamlit
+    response = requests.post(uri, json={
+        "model": model,
+        "prompt": f"You are a helpful customer support assistant that answers customer's questions by clear and meaningful sentences. Help with the following query: {query}",
+        "stream": False
+    }, timeout=timeout)
+    response.raise_for_status()
+    return response.json().get('response', '')
+
+
+def _expand_and_cache(key, query, uri, model):
+    try:
+        expansion = expand_query(query, uri, model)
+        get_hyde_cache().put(key, expansion)
+        return expansion
+    finally:
+        with _hyde_lock:
+            _hyde_inflight.pop(key, None)
+
+
+def hyde_expansion(query, uri, model):
+    """
+    Future of the HyDE expansion of a question, as (expansion, seconds).
+
+    Cached expansions are returned at once (seconds is None). Otherwise the
+    LLM call runs on its own small pool, so the search stages never queue
+    behind it, and is shared by concurrent requests for the same question.
+    It keeps running past HYDE_TIMEOUT and stores its result in the cache,
+    so the next time the question is asked the expansion is ready.
+    """
+    global _hyde_pool
+    cache = get_hyde_cache()
+    key = cache.key(model, query)
+    expansion = cache.get(key)
+    if expansion is not None:
+        future = Future()
+        future.set_result((expansion, None))
+        return future
+    with _hyde_lock:
+        if key not in _hyde_inflight:
+            if _hyde_pool is None:
+                _hyde_pool = ThreadPoolExecutor(max_workers=HYDE_WORKERS, thread_name_prefix="hyde")
+            _hyde_inflight[key] = _hyde_pool.submit(_timed, _expand_and_cache, key, query, uri, model)
+        return _hyde_inflight[key]
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def _wait(future, deadline, stage, timings, errors):
+    """Result of a stage submitted with _timed, or None if it failed or missed its deadline."""
     try:
-        response = requests.post(uri, json={
-            "model": model,
-            "prompt": f"You are a helpful customer support assistant that answers customer's questions by clear and meaningful sentences. Help with the following query: {query}",
-            "stream": False
-        }).json()
-        return f"{query}\n{response.get('response', '')}"
+        result, seconds = future.result(timeout=max(0.0, deadline - time.perf_counter()))
+    except FutureTimeout:
+        timings[stage] = "timed out"
+        return None
     except Exception as e:
-        st.error(f"Query expansion failed: {str(e)}")
-        return query
+        timings[stage] = "failed"
+        errors.append(f"{stage}: {e}")
+        return None
+    timings[stage] = "cached" if seconds is None else f"{seconds:.2f}s"
+    return result
 
 
 # 🚀 Advanced Retrieval Pipeline
 def retrieve_documents(query, uri, model, chat_history=""):
-    expanded_query = expand_query(f"{chat_history}\n{query}", uri, model) if st.session_state.enable_hyde else query
-    
+    """
+    Retrieve the top contexts for a query, running independent stages concurrently.
+
+    HyDE expansion, BM25 on the raw query, FAISS on the raw query and the
+    graph lookup start together. If HyDE answers within HYDE_TIMEOUT, FAISS
+    is searched again with the expanded query; otherwise the raw-query
+    results are used. The BM25 and FAISS lists are merged with the ensemble's
+    weighted reciprocal rank fusion, then reranked.
+
+    HyDE sees only the question, so its expansion can be cached; the chat
+    history is added to the FAISS query instead.
+    """
+    pipeline = st.session_state.retrieval_pipeline
+    ensemble = pipeline["ensemble"]
+    sparse_retriever, dense_retriever = ensemble.retrievers
+    pool = get_pool()
+    start = time.perf_counter()
+    timings, errors = {}, []
+
+    # 🔀 Everything that only needs the raw query starts right away
+    hyde = hyde_expansion(query, uri, model) if st.session_state.enable_hyde else None
+    dense_query = f"{chat_history}\n{query}".strip()
+    sparse = pool.submit(_timed, sparse_retriever.invoke, query)
+    raw_dense = dense = pool.submit(_timed, dense_retriever.invoke, dense_query)  # fallback if HyDE is slow
+    graph = None
+    if st.session_state.enable_graph_rag:
+        graph = pool.submit(_timed, find_graph_nodes, query, pipeline["knowledge_graph"])
+
+    if hyde is not None:
+        expansion = _wait(hyde, start + HYDE_TIMEOUT, "hyde", timings, errors)
+        if expansion is not None:
+            dense = pool.submit(_timed, dense_retriever.invoke, f"{dense_query}\n{expansion}")
+        else:
+            timings["hyde"] += " → raw query"
+
     # 🔍 Retrieve documents using BM25 + FAISS
-    docs = st.session_state.retrieval_pipeline["ensemble"].invoke(expanded_query)
+    deadline = time.perf_counter() + RETRIEVAL_TIMEOUT
+    dense_docs = _wait(dense, deadline, "faiss", timings, errors)
+    if dense_docs is None and dense is not raw_dense:
+        dense_docs = _wait(raw_dense, deadline, "faiss (raw query)", timings, errors)
+    sparse_docs = _wait(sparse, deadline, "bm25", timings, errors)
+    docs = ensemble.weighted_reciprocal_rank([sparse_docs or [], dense_docs or []])
 
     # 🚀 GraphRAG Retrieval
-    if st.session_state.enable_graph_rag:
-        graph_results = retrieve_from_graph(query, st.session_state.retrieval_pipeline["knowledge_graph"])
-        
+    if graph is not None:
+        matched_nodes, graph_results = _wait(graph, deadline, "graph", timings, errors) or ([], [])
+        show_graph_results(query, pipeline["knowledge_graph"], matched_nodes, graph_results)
+
         # Debugging output
         st.write(f"🔍 GraphRAG Retrieved Nodes: {graph_results}")
 
@@ -40,15 +167,20 @@ def retrieve_documents(query, uri, model, chat_history=""):
         # If graph retrieval is successful, merge it with standard document retrieval
         if graph_docs:
             docs = graph_docs + docs  # Merge GraphRAG results with FAISS + BM25 results
-    
-    # 🚀 Neural Reranking (if enabled)
-    if st.session_state.enable_reranking:
-        pairs = [[query, doc.page_content] for doc in docs]  # ✅ Fix: Use `page_content`
-        scores = st.session_state.retrieval_pipeline["reranker"].predict(pairs)
 
-        # Sort documents based on reranking scores
-        ranked_docs = [doc for _, doc in sorted(zip(scores, docs), reverse=True)]
+    for error in errors:
+        st.error(f"Retrieval stage failed: {error}")
+
+    # 🚀 Neural Reranking (if enabled)
+    if st.session_state.enable_reranking and pipeline["reranker"] is not None:
+        ranked_docs, rerank = pipeline["reranker"].rerank(query, docs, st.session_state.max_contexts)
+        timings["rerank"] = (
+            f"{rerank['seconds']:.2f}s ({rerank['scored']} scored, {rerank['cached']} cached"
+            f"{', stopped early' if rerank['stopped_early'] else ''})"
+        )
     else:
         ranked_docs = docs
 
+    timings["total"] = f"{time.perf_counter() - start:.2f}s"
+    st.caption("⏱️ Retrieval: " + " · ".join(f"{stage} {value}" for stage, value in timings.items()))
     return ranked_docs[:st.session_state.max_contexts]  # Return top results based on max_contexts
@@ -8,6 +8,7 @@ import uuid
 import time
 from streamlit.components.v1 import html
 import re
+from utils.graph_index import get_node_index
 
 def visualize_graph(G, query=None, height=500, width=700):
     """
@@ -31,11 +32,9 @@ def visualize_graph(G, query=None, height=500, width=700):
     # Process query to find relevant terms
     highlighted_nodes = set()
     if query:
-        query_terms = set(re.findall(r'\b\w+\b', query.lower()))
         # Find nodes that match query terms
-        for node in G.nodes():
-            node_terms = set(re.findall(r'\b\w+\b', str(node).lower()))
-            if query_terms.intersection(node_terms):
+        for node in get_node_index(G).match(query):
+            if node in G:
                 highlighted_nodes.add(node)
                 # Also add immediate neighbors
                 for neighbor in G.neighbors(node):
@@ -106,15 +105,12 @@ def visualize_query_subgraph(G, query, top_k=10):
     entities = re.findall(r'\b[A-Za-z][a-z]+(?: [A-Za-z][a-z]+)*\b', query)
     
     # Find relevant nodes based on query terms
-    query_words = query.lower().split()
-    scores = {}
-    
-    for node in G.nodes():
-        node_str = str(node).lower()
-        # Calculate relevance score based on word matches
-        score = sum(1 for word in query_words if word in node_str)
-        if score > 0:
-            scores[node] = score
+    index = get_node_index(G)
+    matches = index.match(query)
+    named = index.phrases(query, matches)
+
+    # Relevance score: query words in the node name, plus one if the query names it in full
+    scores = {node: score + (node in named) for node, score in matches.items() if node in G}
     
     # Get top-k relevant nodes
     relevant_nodes = sorted(scores.keys(), key=lambda x: scores[x], reverse=True)[:top_k]
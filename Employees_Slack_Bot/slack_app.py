@@ -3,35 +3,65 @@ from slack_bolt.adapter.fastapi import SlackRequestHandler
 from fastapi import FastAPI, Request
 from dotenv import load_dotenv
 import os
+import json
+import time
 import requests
 
 load_dotenv("config/.env")
 
 SLACK_BOT_TOKEN = os.getenv("SLACK_BOT_TOKEN")
 SLACK_SIGNING_SECRET = os.getenv("SLACK_SIGNING_SECRET")
+API_URL = os.getenv("GRAPH_RAG_API_URL", "https://graphrag-api-pkdf.onrender.com")
+# Slack allows roughly one chat.update per second per channel
+UPDATE_INTERVAL = float(os.getenv("SLACK_UPDATE_INTERVAL", 1.0))
 
 app = App(token=SLACK_BOT_TOKEN, signing_secret=SLACK_SIGNING_SECRET)
 fastapi_app = FastAPI()
 handler = SlackRequestHandler(app)
 
+def stream_answer(query):
+    """Yields the answer chunks from the API's /ask/stream server-sent events."""
+    with requests.get(f"{API_URL}/ask/stream", params={"query": query}, stream=True, timeout=60) as res:
+        res.raise_for_status()
+        event = None
+        for line in res.iter_lines(decode_unicode=True):
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                data = json.loads(line[len("data:"):])
+                if event == "token":
+                    yield data["text"]
+                elif event == "error":
+                    raise RuntimeError(data["detail"])
+
 @app.event("app_mention")
-def handle_mention(event, say):
+def handle_mention(event, say, client):
     print("Received event:", event)
 
     user_query = event["text"].split(">", 1)[-1].strip()
     print("User query:", user_query)
 
+    # Post a placeholder right away and edit it as the answer streams in
+    message = say("_Thinking..._")
+    answer = ""
+    last_update = time.monotonic()
     try:
-        res = requests.get(
-            "https://graphrag-api-pkdf.onrender.com/ask",
-            params={"query": user_query}
+        for chunk in stream_answer(user_query):
+            answer += chunk
+            if time.monotonic() - last_update >= UPDATE_INTERVAL:
+                client.chat_update(channel=message["channel"], ts=message["ts"], text=answer + " ▌")
+                last_update = time.monotonic()
+        print("Response from API:", answer)
+        client.chat_update(
+            channel=message["channel"], ts=message["ts"],
+            text=answer.strip() or "Sorry, I couldn't understand that."
         )
-        data = res.json()
-        print("Response from API:", data)
-        say(data.get("answer", "Sorry, I couldn't understand that."))
     except Exception as e:
         print("Error during request:", e)
-        say("Failed to reach the assistant. Please try again later.")
+        client.chat_update(
+            channel=message["channel"], ts=message["ts"],
+            text="Failed to reach the assistant. Please try again later."
+        )
 
 @fastapi_app.post("/slack/events")
 async def slack_events(request: Request):
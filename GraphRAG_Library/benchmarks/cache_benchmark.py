@@ -0,0 +1,129 @@
+"""Warm re-index cache time: graphrag's file-per-call cache against the packed cache.
+
+A warm re-index finds every LLM call in the cache, so its cache cost is one
+has() + get() per call. The file cache is read the way graphrag's
+JsonPipelineCache over FilePipelineStorage reads it (exists checks and file
+reads on worker threads, like aiofiles); the packed cache through
+PackedPipelineCache. Both run 25 lookups at a time (concurrent_requests),
+with and without decoding the cached JSON (which, for the embeddings, costs
+more than finding it). The cache/ folder is copied --replicas times into a
+temporary folder, to simulate a larger index, and imported into a
+temporary packed cache.
+
+    python -m benchmarks.cache_benchmark
+    python -m benchmarks.cache_benchmark --replicas 10 --rounds 3
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+from cache_store.graphrag_cache import PackedPipelineCache
+from cache_store.packed_cache import PackedCache, import_file_cache
+from config.settings import FILE_CACHE_DIR
+
+
+class FileCache:
+    """graphrag's file cache read path: JsonPipelineCache.get -> has, FilePipelineStorage.get -> has, read."""
+
+    def __init__(self, root, decode=True):
+        self.root = root
+        self.decode = decode
+
+    async def has(self, key):
+        return await asyncio.to_thread(os.path.exists, os.path.join(self.root, key))
+
+    async def get(self, key):
+        if not await self.has(key) or not await self.has(key):
+            return None
+        data = await asyncio.to_thread(self._read, os.path.join(self.root, key))
+        return json.loads(data).get("result") if self.decode else data
+
+    @staticmethod
+    def _read(path):
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+
+class RawPackedCache:
+    """PackedCache with PackedPipelineCache's has/get interface, returning the stored JSON undecoded."""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    async def has(self, key):
+        return key in self.cache
+
+    async def get(self, key):
+        return self.cache.get(key)
+
+
+async def reindex(cache, keys, concurrency):
+    """has() + get() for every key, concurrency lookups at a time; returns the number of hits."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def lookup(key):
+        async with semaphore:
+            return await cache.has(key) and await cache.get(key) is not None
+
+    return sum(await asyncio.gather(*(lookup(key) for key in keys)))
+
+
+def replicate(source, target, replicas):
+    """Copies of the cache folder's files, as <name>_r<i>; returns their keys."""
+    keys = []
+    for root, _, names in os.walk(source):
+        folder = os.path.relpath(root, source)
+        os.makedirs(os.path.join(target, folder), exist_ok=True)
+        for name in names:
+            for i in range(replicas):
+                key = f"{folder}/{name}_r{i}".replace(os.sep, "/").lstrip("./")
+                shutil.copyfile(os.path.join(root, name), os.path.join(target, key))
+                keys.append(key)
+    return keys
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", default=FILE_CACHE_DIR)
+    parser.add_argument("--replicas", type=int, default=3)
+    parser.add_argument("--rounds", type=int, default=3, help="re-index passes per cache (best one is reported)")
+    parser.add_argument("--concurrency", type=int, default=25)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files_dir, packed_dir = os.path.join(tmp, "cache"), os.path.join(tmp, "cache_packed")
+        keys = replicate(args.source, files_dir, args.replicas)
+        random.Random(0).shuffle(keys)
+
+        start = time.perf_counter()
+        with PackedCache(packed_dir) as packed:
+            files, size = import_file_cache(packed, files_dir)
+        print(f"{files} cached calls ({size / 2**20:.0f} MB), imported in {time.perf_counter() - start:.2f} s")
+
+        results = {}
+        for decode in [False, True]:
+            print("lookup + JSON decode:" if decode else "lookup only:")
+            for name in ["file-per-entry", "packed"]:
+                best = None
+                for _ in range(args.rounds):
+                    start = time.perf_counter()
+                    if name == "packed":
+                        packed = PackedCache(packed_dir)  # opening is part of the re-index
+                        cache = PackedPipelineCache(packed) if decode else RawPackedCache(packed)
+                        hits = asyncio.run(reindex(cache, keys, args.concurrency))
+                        packed.close()
+                    else:
+                        hits = asyncio.run(reindex(FileCache(files_dir, decode), keys, args.concurrency))
+                    seconds = time.perf_counter() - start
+                    best = seconds if best is None else min(best, seconds)
+                results[name] = best
+                print(f"  {name:<15} {best:6.2f} s  ({hits}/{len(keys)} hits, {best / len(keys) * 1e6:.0f} µs per call)")
+            print(f"  speedup: {results['file-per-entry'] / results['packed']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
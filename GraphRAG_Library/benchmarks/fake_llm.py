@@ -0,0 +1,201 @@
+"""Stand-in for the OpenAI chat and embedding endpoints, for running global search and indexing without a model.
+
+POST /v1/chat/completions and /v1/embeddings answer after --base-ms +
+--per-1k-tokens-ms per 1000 prompt tokens (estimated at 4 characters per
+token). At most --parallel requests are served at once; the others wait.
+Answers follow the prompt:
+
+- global search map prompts (whose system prompt asks for "points") get
+  JSON key points citing the report ids in their data table, with scores
+  derived from the ids;
+- extract_graph prompts get an entity for each run of capitalized words in
+  the text, and a relationship between each two consecutive ones (gleaning
+  turns find nothing more);
+- summarize_descriptions prompts get the descriptions joined;
+- community report prompts get a JSON report on the first entities of the table;
+- embeddings are pseudo-random unit vectors seeded by the text;
+- anything else gets a short text answer.
+
+With --error-rate, that fraction of requests fails with 503 to exercise retries.
+
+    python -m benchmarks.fake_llm --port 8011 --parallel 25
+    GRAPHRAG_API_BASE=http://127.0.0.1:8011/v1 python -m search.global_search "What are the main themes?"
+    GRAPHRAG_API_BASE=http://127.0.0.1:8011/v1 python -m indexing.incremental --dry-run
+"""
+import argparse
+import csv
+import hashlib
+import io
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Data rows of a map prompt: "<report id>|<title>|..."
+REPORT_ROW = re.compile(r"^(\d+)\|([^|\n]*)\|", re.MULTILINE)
+# Parts of the indexing prompts (prompts/extract_graph.txt, summarize_descriptions.txt, community_report_graph.txt)
+EXTRACTION_INPUT = re.compile(r"-Real Data-.*?Entity_types: ([^\n]*)\nText: (.*)\n#+\nOutput:", re.DOTALL)
+DESCRIPTION_LIST = re.compile(r"^Description List: (.*)$", re.MULTILINE)
+ENTITY_TABLE = re.compile(r"-----Entities-----\n(.*?)(?:\n\n|$)", re.DOTALL)
+NAME = re.compile(r"\b[A-Z][a-z]+(?: [A-Z][a-z]+)+\b")
+
+
+def seeded(text, modulo):
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=4).digest(), "little") % modulo
+
+
+def fake_points(context):
+    """Key points for the reports in a map prompt's data table, scored 0-100 from their ids."""
+    points = []
+    for report_id, title in REPORT_ROW.findall(context):
+        score = seeded(report_id, 101)
+        points.append({"description": f"{title} is relevant to the question [Data: Reports ({report_id})]", "score": score})
+    return {"points": points}
+
+
+def fake_extraction(entity_types, text):
+    """extract_graph records for the capitalized names in text, linking each to the next."""
+    types = [t.strip().upper() for t in entity_types.split(",")]
+    names = list(dict.fromkeys(name.upper() for name in NAME.findall(text)))[:20]
+    records = [f'("entity"<|>{name}<|>{types[seeded(name, len(types))]}<|>{name.title()} is mentioned in the text)'
+               for name in names]
+    records += [f'("relationship"<|>{a}<|>{b}<|>{a.title()} appears next to {b.title()}<|>{1 + seeded(a + b, 9)})'
+                for a, b in zip(names, names[1:])]
+    return "\n##\n".join(records) + "\n<|COMPLETE|>"
+
+
+def fake_report(table):
+    """Community report JSON about the first entities of the report prompt's entity table."""
+    rows = list(csv.DictReader(io.StringIO(table)))[:3]
+    titles = [row["title"].title() for row in rows] or ["Unknown"]
+    return {
+        "title": f"{titles[0]} and Associates",
+        "summary": f"The community centers on {', '.join(titles)}.",
+        "rating": seeded(table, 101) / 10,
+        "rating_explanation": "The rating reflects how central these entities are.",
+        "findings": [{"summary": f"Role of {title}", "explanation": f"{title} is part of this community "
+                      f"[Data: Entities ({row['human_readable_id']})]."} for title, row in zip(titles, rows)],
+    }
+
+
+def fake_embedding(text, dimensions):
+    rng = random.Random(seeded(text, 2**32))
+    vector = [rng.gauss(0, 1) for _ in range(dimensions)]
+    norm = math.sqrt(sum(v * v for v in vector))
+    return [v / norm for v in vector]
+
+
+def fake_answer(messages):
+    """Content of the chat answer, chosen by what the prompt asks for."""
+    system = next((m["content"] for m in messages if m["role"] == "system"), "")
+    prompt = next((m["content"] for m in messages if m["role"] == "user"), "")
+    last = messages[-1]["content"] if messages else ""
+    if '"points"' in system:
+        return json.dumps(fake_points(system))
+    if extraction := EXTRACTION_INPUT.search(prompt):
+        if len(messages) > 1:  # gleaning turns: nothing more to add
+            return "N" if "Answer Y or N" in last else "<|COMPLETE|>"
+        return fake_extraction(*extraction.groups())
+    if descriptions := DESCRIPTION_LIST.search(prompt):
+        return " ".join(json.loads(descriptions.group(1)))[:2000]
+    if "IMPACT SEVERITY RATING" in prompt:
+        table = ENTITY_TABLE.search(prompt)
+        return json.dumps(fake_report(table.group(1) if table else ""))
+    return "The reports describe several connected themes [Data: Reports (1, 2, 3)]."
+
+
+def make_handler(base_ms, per_1k_tokens_ms, parallel, error_rate):
+    slots = threading.Semaphore(parallel)
+
+    class FakeLLMHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True  # headers and body are separate writes
+
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, status, body):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            try:
+                self.wfile.write(payload)
+            except (BrokenPipeError, ConnectionResetError):  # client gave up (map timeout)
+                pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            endpoint = self.path.removeprefix("/v1")
+            if endpoint not in ("/chat/completions", "/embeddings"):
+                self._reply(404, {"error": {"message": f"unknown endpoint {self.path}"}})
+                return
+            if random.random() < error_rate:
+                self._reply(503, {"error": {"message": "server busy"}})
+                return
+            if endpoint == "/embeddings":
+                texts = [body["input"]] if isinstance(body["input"], str) else body["input"]
+                prompt_tokens = sum(len(text) for text in texts) // 4
+            else:
+                messages = body.get("messages", [])
+                prompt_tokens = sum(len(m["content"]) for m in messages) // 4
+            with slots:
+                time.sleep((base_ms + per_1k_tokens_ms * prompt_tokens / 1000) / 1000)
+            if endpoint == "/embeddings":
+                dimensions = body.get("dimensions", 1536)
+                self._reply(200, {
+                    "object": "list",
+                    "data": [{"object": "embedding", "index": i, "embedding": fake_embedding(text, dimensions)}
+                             for i, text in enumerate(texts)],
+                    "model": body.get("model", "text-embedding-3-small"),
+                    "usage": {"prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens},
+                })
+                return
+            content = fake_answer(messages)
+            self._reply(200, {
+                "id": f"chatcmpl-{random.getrandbits(64):x}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "gpt-3.5-turbo"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": len(content) // 4,
+                    "total_tokens": prompt_tokens + len(content) // 4,
+                },
+            })
+
+    return FakeLLMHandler
+
+
+def start_fake_llm(port=0, base_ms=500, per_1k_tokens_ms=50, parallel=25, error_rate=0.0):
+    """Starts the stub on a background thread; returns (server, base_url ending in /v1)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(base_ms, per_1k_tokens_ms, parallel, error_rate))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--base-ms", type=float, default=500, help="fixed delay per request")
+    parser.add_argument("--per-1k-tokens-ms", type=float, default=50, help="extra delay per 1000 prompt tokens")
+    parser.add_argument("--parallel", type=int, default=25, help="requests served at once")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    args = parser.parse_args()
+
+    server, url = start_fake_llm(args.port, args.base_ms, args.per_1k_tokens_ms, args.parallel, args.error_rate)
+    print(f"Fake LLM listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Per-phase latency of global search against the fake LLM server, offline.
+
+The community reports are replicated --replicas times (as new communities)
+to simulate a larger index. Each configuration runs the same question at a
+few concurrency limits and rank thresholds.
+
+    python -m benchmarks.global_search_latency
+    python -m benchmarks.global_search_latency --replicas 20 --concurrency 1,5,25 --min-ranks 0,8 --base-ms 1000
+"""
+import argparse
+from benchmarks.fake_llm import start_fake_llm
+from search.global_search import GlobalSearch, format_seconds, load_reports
+
+
+def replicate(reports, replicas):
+    """reports plus replicas - 1 copies, with community ids shifted so each copy is a separate community."""
+    step = max(r["community"] for r in reports) + 1
+    return [dict(r, community=r["community"] + i * step) for i in range(replicas) for r in reports]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--replicas", type=int, default=10)
+    parser.add_argument("--concurrency", default="1,5,25", help="map calls in flight")
+    parser.add_argument("--min-ranks", default="0,8", help="rank thresholds to prune with")
+    parser.add_argument("--level", type=int, default=2)
+    parser.add_argument("--base-ms", type=float, default=500, help="fake LLM delay per request")
+    parser.add_argument("--per-1k-tokens-ms", type=float, default=50, help="fake LLM delay per 1000 prompt tokens")
+    parser.add_argument("--question", default="What are the main themes in the dataset?")
+    args = parser.parse_args()
+
+    server, url = start_fake_llm(base_ms=args.base_ms, per_1k_tokens_ms=args.per_1k_tokens_ms, parallel=1000)
+    reports = replicate(load_reports(), args.replicas)
+    print(f"{len(reports)} community reports, fake LLM at {args.base_ms:.0f} ms + "
+          f"{args.per_1k_tokens_ms:.0f} ms per 1k prompt tokens")
+    try:
+        for min_rank in [float(r) for r in args.min_ranks.split(",")]:
+            for concurrency in [int(c) for c in args.concurrency.split(",")]:
+                engine = GlobalSearch(reports, api_base=url, concurrency=concurrency, level=args.level, min_rank=min_rank)
+                result = engine.search(args.question)
+                print(f"\nmin rank {min_rank:g}, concurrency {concurrency}: {result['reports']} reports mapped, "
+                      f"{result['pruned']} pruned, {result['points']} points, {result['usage']['prompt']} prompt tokens")
+                print(f"  {format_seconds(result)}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Load time and query latency of the in-process local search, offline.
+
+Questions are simulated with the stored entity description vectors plus
+Gaussian noise (so they don't match an entity exactly); no embedding model
+or LLM is called.
+
+    python -m benchmarks.local_search_latency
+    python -m benchmarks.local_search_latency --queries 1000 --noise 0.5 --max-tokens 8000
+"""
+import argparse
+import statistics
+import time
+import numpy as np
+from config.settings import LOCAL_SEARCH_MAX_TOKENS, load_graphrag_settings
+from search.artifacts import GraphArtifacts
+from search.local_search import LocalSearchEngine
+
+
+def percentile(values, p):
+    return float(np.percentile(values, p)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--loads", type=int, default=5, help="times to load the artifacts")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--noise", type=float, default=0.3, help="noise norm relative to the (unit) entity vector")
+    parser.add_argument("--max-tokens", type=int, default=LOCAL_SEARCH_MAX_TOKENS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    settings = load_graphrag_settings()
+    loads = []
+    for _ in range(args.loads):
+        start = time.perf_counter()
+        artifacts = GraphArtifacts(settings=settings)
+        loads.append(time.perf_counter() - start)
+    steps = ", ".join(f"{name} {s * 1000:.1f} ms" for name, s in artifacts.load_seconds.items())
+    print(f"Load: median {statistics.median(loads) * 1000:.1f} ms ({steps})")
+    print(f"  {artifacts.entities.num_rows} entities, {artifacts.relationships.num_rows} relationships, "
+          f"{artifacts.text_units.num_rows} text units, {artifacts.reports.num_rows} reports")
+
+    engine = LocalSearchEngine(artifacts, max_tokens=args.max_tokens)
+    rng = np.random.default_rng(args.seed)
+    vectors = artifacts.entity_vectors[rng.integers(0, artifacts.entities.num_rows, args.queries)]
+    noise = rng.normal(size=vectors.shape).astype(np.float32)
+    noise *= args.noise / np.linalg.norm(noise, axis=1, keepdims=True)
+    queries = vectors + noise
+
+    engine.search(queries[0])  # warm-up
+    totals, steps, tokens = [], {}, []
+    for query in queries:
+        start = time.perf_counter()
+        result = engine.search(query)
+        totals.append(time.perf_counter() - start)
+        tokens.append(sum(result["tokens"].values()))
+        for name, seconds in result["seconds"].items():
+            steps.setdefault(name, []).append(seconds)
+
+    print(f"Query ({args.queries} questions, {args.max_tokens} token budget, "
+          f"{statistics.mean(tokens):.0f} tokens of context on average):")
+    print(f"  {'total':<14} p50 {percentile(totals, 50):7.2f} ms   p95 {percentile(totals, 95):7.2f} ms")
+    for name, seconds in steps.items():
+        print(f"  {name:<14} p50 {percentile(seconds, 50):7.2f} ms   p95 {percentile(seconds, 95):7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Run `graphrag index` with the packed cache instead of the one-file-per-call cache folder.
+
+    python -m cache_store.packed_cache import          # once, to keep the existing cache
+    python -m cache_store.graphrag_cache --root .      # same arguments as `graphrag index`
+"""
+import json
+import sys
+from cache_store.packed_cache import PackedCache
+
+try:
+    from graphrag.cache.pipeline_cache import PipelineCache
+except ImportError:  # the adapter only needs graphrag to run the pipeline
+    PipelineCache = object
+
+
+class PackedPipelineCache(PipelineCache):
+    """
+    graphrag PipelineCache on a PackedCache.
+
+    Values are stored like graphrag's JSON file cache stores them
+    ({"result": value, **debug_data}), and child caches use "name/" key
+    prefixes where the file cache uses folders, so keys imported with
+    import_file_cache are found under the same names.
+    """
+
+    def __init__(self, cache, prefix=""):
+        self._cache = cache
+        self._prefix = prefix
+
+    async def get(self, key):
+        value = self._cache.get(self._prefix + key)
+        if value is None:
+            return None
+        try:
+            return json.loads(value).get("result")
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            self._cache.delete(self._prefix + key)
+            return None
+
+    async def set(self, key, value, debug_data=None):
+        if value is None:
+            return
+        data = {"result": value, **(debug_data or {})}
+        self._cache.put(self._prefix + key, json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+    async def has(self, key):
+        return self._prefix + key in self._cache
+
+    async def delete(self, key):
+        self._cache.delete(self._prefix + key)
+
+    async def clear(self):
+        for key in self._cache.keys():
+            if key.startswith(self._prefix):
+                self._cache.delete(key)
+
+    def child(self, name):
+        return PackedPipelineCache(self._cache, f"{self._prefix}{name}/")
+
+
+def main():
+    from graphrag.cli.main import app
+    import graphrag.index.run.run_pipeline as run_pipeline
+
+    cache = PackedCache()
+    # run_pipeline builds its cache from settings.yaml's cache section, which only knows graphrag's own types
+    run_pipeline.create_cache_from_config = lambda config, root_dir: PackedPipelineCache(cache)
+    try:
+        app(args=["index", *sys.argv[1:]], prog_name="graphrag")
+    finally:
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
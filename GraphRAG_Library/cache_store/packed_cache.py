@@ -0,0 +1,421 @@
+"""Packed key-value cache for LLM responses: one index file plus append-only segment files.
+
+    python -m cache_store.packed_cache import      # copy the cache/ folder into cache_packed/
+    python -m cache_store.packed_cache stats
+    python -m cache_store.packed_cache compact
+"""
+import argparse
+import glob
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+import numpy as np
+from config.settings import (
+    FILE_CACHE_DIR, PACKED_CACHE_DIR, PACKED_CACHE_MAX_DEAD_FRACTION, PACKED_CACHE_MAX_MB, PACKED_CACHE_SEGMENT_MB,
+)
+
+INDEX_FILE = "index.bin"
+INDEX_HEADER = struct.Struct("<4sIII")  # magic, version, segments, entries
+INDEX_MAGIC = b"GRPK"
+INDEX_VERSION = 1
+SEGMENT_ENTRY = struct.Struct("<IQ")  # segment id, bytes covered by the index
+RECORD = struct.Struct("<QII")  # key hash, key length, value length
+TOMBSTONE = 0xFFFFFFFF  # value length of a delete record
+EVICT_TO = 0.9  # eviction frees space down to this fraction of max_bytes
+
+
+def key_hash(key):
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def segment_path(directory, segment):
+    return os.path.join(directory, f"segment_{segment:06d}.dat")
+
+
+class PackedCache:
+    """
+    Cache of byte values by string key, packed into a few large files.
+
+    Records (key hash, key, value) are appended to segment files. The index
+    file holds, sorted by key hash, where each live record is, as columns
+    that are memory-mapped and binary-searched, so opening the cache reads
+    nothing but the header and a lookup touches a few pages. Entries written
+    or deleted since the last flush are kept in memory on top of it; records
+    appended after the last flush are replayed from the segments on open, so
+    a crash only loses the LRU timestamps.
+
+    Above max_bytes of live records, the least recently used entries are
+    evicted. Space of overwritten, deleted and evicted records is reclaimed
+    by compaction, when it exceeds max_dead_fraction of the segments.
+    Safe to share between threads, not between processes.
+    """
+
+    def __init__(self, directory=PACKED_CACHE_DIR, max_bytes=int(PACKED_CACHE_MAX_MB * 2**20),
+                 segment_bytes=int(PACKED_CACHE_SEGMENT_MB * 2**20), max_dead_fraction=PACKED_CACHE_MAX_DEAD_FRACTION):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        self.max_dead_fraction = max_dead_fraction
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock()
+        self._maps = {}  # sealed segment -> mmap
+        self._load_index()
+        self._recover()
+
+    # Index file
+
+    def _load_index(self):
+        self._new = {}  # hash -> [segment, offset, length, last_used], written since the index file
+        self._removed = set()  # hashes of index rows overwritten, deleted or evicted since
+        self._used = {}  # index row -> last_used, for rows read since
+        self._index_map = None
+        path = os.path.join(self.directory, INDEX_FILE)
+        if not os.path.exists(path):
+            self._covered = {}
+            self._columns = {name: np.zeros(0, dtype) for name, dtype in self._column_types()}
+            self.live_bytes = 0
+            return
+        with open(path, "rb") as f:
+            self._index_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, segments, entries = INDEX_HEADER.unpack_from(self._index_map)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise ValueError(f"{path} is not a version {INDEX_VERSION} packed cache index")
+        position = INDEX_HEADER.size
+        self._covered = {}
+        for _ in range(segments):
+            segment, covered = SEGMENT_ENTRY.unpack_from(self._index_map, position)
+            self._covered[segment] = covered
+            position += SEGMENT_ENTRY.size
+        position += -position % 8  # columns are 8-byte aligned
+        self._columns = {}
+        for name, dtype in self._column_types():
+            self._columns[name] = np.frombuffer(self._index_map, dtype, entries, position)
+            position += entries * np.dtype(dtype).itemsize
+        self.live_bytes = int(self._columns["length"].sum())
+
+    @staticmethod
+    def _column_types():
+        return [("hash", "<u8"), ("offset", "<u8"), ("last_used", "<f8"), ("segment", "<u4"), ("length", "<u4")]
+
+    def _write_index(self, columns, covered):
+        """Replaces the index file with the given (hash-sorted) columns."""
+        path = os.path.join(self.directory, INDEX_FILE)
+        with open(path + ".tmp", "wb") as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, len(covered), len(columns["hash"])))
+            for segment, size in sorted(covered.items()):
+                f.write(SEGMENT_ENTRY.pack(segment, size))
+            f.write(b"\0" * (-f.tell() % 8))
+            for name, dtype in self._column_types():
+                f.write(np.ascontiguousarray(columns[name], dtype).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        # Release the old mapping first: Windows can't replace a mapped file
+        self._columns = None
+        if self._index_map is not None:
+            self._index_map.close()
+        os.replace(path + ".tmp", path)
+        self._load_index()
+
+    def _row(self, h):
+        hashes = self._columns["hash"]
+        i = int(np.searchsorted(hashes, np.uint64(h)))
+        return i if i < len(hashes) and hashes[i] == h else None
+
+    def _locate(self, h):
+        """[segment, offset, length] of the live record with hash h, or None."""
+        if h in self._new:
+            return self._new[h]
+        if h in self._removed:
+            return None
+        i = self._row(h)
+        if i is None:
+            return None
+        return [int(self._columns["segment"][i]), int(self._columns["offset"][i]), int(self._columns["length"][i]), i]
+
+    # Segments
+
+    def _segment_ids(self):
+        return sorted(int(os.path.basename(p)[8:14]) for p in glob.glob(os.path.join(self.directory, "segment_*.dat")))
+
+    def _open_active(self, segment):
+        self._active = segment
+        self._active_file = open(segment_path(self.directory, segment), "a+b", buffering=0)
+        self._active_size = self._active_file.seek(0, os.SEEK_END)
+
+    def _roll(self):
+        """Seals the active segment and starts the next one."""
+        self._active_file.close()
+        self._open_active(self._active + 1)
+
+    def _read(self, segment, offset, length):
+        if segment == self._active:
+            self._active_file.seek(offset)
+            return self._active_file.read(length)
+        if segment not in self._maps:
+            with open(segment_path(self.directory, segment), "rb") as f:
+                self._maps[segment] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._maps[segment][offset:offset + length]
+
+    def _recover(self):
+        """Replays records appended after the last index write (and truncates a torn last record)."""
+        segments = self._segment_ids()
+        missing = set(self._covered) - set(segments)
+        if missing:  # segment files deleted by hand: forget their entries
+            for i in np.flatnonzero(np.isin(self._columns["segment"], list(missing))):
+                self._removed.add(int(self._columns["hash"][i]))
+                self.live_bytes -= int(self._columns["length"][i])
+        for segment in segments:
+            path = segment_path(self.directory, segment)
+            offset, size = self._covered.get(segment, 0), os.path.getsize(path)
+            if offset >= size:
+                continue
+            with open(path, "r+b") as f:
+                f.seek(offset)
+                data = f.read()
+                position = 0
+                while position + RECORD.size <= len(data):
+                    h, key_length, value_length = RECORD.unpack_from(data, position)
+                    length = RECORD.size + key_length + (0 if value_length == TOMBSTONE else value_length)
+                    if position + length > len(data):
+                        break
+                    self._forget(h)
+                    if value_length != TOMBSTONE:
+                        self._new[h] = [segment, offset + position, length, time.time()]
+                        self.live_bytes += length
+                    position += length
+                if position < len(data):
+                    f.truncate(offset + position)
+        self._open_active(segments[-1] if segments else 1)
+        if self._active_size >= self.segment_bytes:
+            self._roll()
+
+    def _append(self, record):
+        if self._active_size and self._active_size + len(record) > self.segment_bytes:
+            self._roll()
+        offset = self._active_size
+        view = memoryview(record)
+        while view:
+            view = view[self._active_file.write(view):]
+        self._active_size += len(record)
+        return offset
+
+    def _forget(self, h):
+        """Drops the live entry with hash h, if any (its record becomes dead space)."""
+        if h in self._new:
+            self.live_bytes -= self._new.pop(h)[2]
+        elif h not in self._removed:
+            i = self._row(h)
+            if i is not None:
+                self._removed.add(h)
+                self.live_bytes -= int(self._columns["length"][i])
+
+    # Public interface
+
+    def get(self, key):
+        """Value stored under key (bytes), or None."""
+        h = key_hash(key)
+        with self._lock:
+            location = self._locate(h)
+            if location is not None:
+                segment, offset, length = location[:3]
+                record = self._read(segment, offset, length)
+                _, key_length, _ = RECORD.unpack_from(record)
+                if record[RECORD.size:RECORD.size + key_length] == key.encode("utf-8"):  # not a hash collision
+                    if h in self._new:
+                        location[3] = time.time()
+                    else:
+                        self._used[location[3]] = time.time()
+                    self.hits += 1
+                    return bytes(record[RECORD.size + key_length:])
+            self.misses += 1
+            return None
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._locate(key_hash(key)) is not None
+
+    def __len__(self):
+        return len(self._columns["hash"]) - len(self._removed) + len(self._new)
+
+    def put(self, key, value, last_used=None):
+        """Stores value (bytes) under key, replacing any previous value."""
+        h = key_hash(key)
+        encoded = key.encode("utf-8")
+        record = RECORD.pack(h, len(encoded), len(value)) + encoded + value
+        with self._lock:
+            offset = self._append(record)
+            self._forget(h)
+            self._new[h] = [self._active, offset, len(record), last_used or time.time()]
+            self.live_bytes += len(record)
+            if self.live_bytes > self.max_bytes:
+                self.evict()
+
+    def delete(self, key):
+        h = key_hash(key)
+        with self._lock:
+            if self._locate(h) is not None:
+                encoded = key.encode("utf-8")
+                self._append(RECORD.pack(h, len(encoded), TOMBSTONE) + encoded)
+                self._forget(h)
+
+    def keys(self):
+        """All keys (read from the segments)."""
+        with self._lock:
+            columns = self._live_columns()
+            keys = []
+            for segment, offset, length in zip(columns["segment"].tolist(), columns["offset"].tolist(),
+                                               columns["length"].tolist()):
+                record = self._read(segment, offset, min(length, RECORD.size + 4096))  # keys are short
+                _, key_length, _ = RECORD.unpack_from(record)
+                if RECORD.size + key_length > len(record):
+                    record = self._read(segment, offset, RECORD.size + key_length)
+                keys.append(record[RECORD.size:RECORD.size + key_length].decode("utf-8"))
+            return keys
+
+    def _live_columns(self):
+        """Columns of all live entries (index rows still live, then new ones), with current last_used."""
+        keep = ~np.isin(self._columns["hash"], np.fromiter(self._removed, np.uint64, len(self._removed)))
+        last_used = self._columns["last_used"].copy()
+        if self._used:
+            last_used[list(self._used)] = list(self._used.values())
+        new = list(self._new.items())
+        return {
+            "hash": np.concatenate([self._columns["hash"][keep], np.array([h for h, _ in new], np.uint64)]),
+            "segment": np.concatenate([self._columns["segment"][keep], np.array([e[0] for _, e in new], np.uint32)]),
+            "offset": np.concatenate([self._columns["offset"][keep], np.array([e[1] for _, e in new], np.uint64)]),
+            "length": np.concatenate([self._columns["length"][keep], np.array([e[2] for _, e in new], np.uint32)]),
+            "last_used": np.concatenate([last_used[keep], np.array([e[3] for _, e in new], np.float64)]),
+        }
+
+    def evict(self):
+        """Drops least recently used entries until live records fit in EVICT_TO * max_bytes; then flushes."""
+        with self._lock:
+            columns = self._live_columns()
+            order = np.argsort(columns["last_used"], kind="stable")
+            freed = np.cumsum(columns["length"][order].astype(np.int64))
+            count = int(np.searchsorted(freed, self.live_bytes - int(self.max_bytes * EVICT_TO))) + 1
+            for h in columns["hash"][order[:count]].tolist():
+                self._forget(h)
+            self.flush()
+
+    def flush(self):
+        """Writes the index file (compacting first if too much of the segments is dead)."""
+        with self._lock:
+            if self.dead_fraction() > self.max_dead_fraction:
+                self.compact()
+                return
+            columns = self._live_columns()
+            order = np.argsort(columns["hash"], kind="stable")
+            covered = {segment: os.path.getsize(segment_path(self.directory, segment)) for segment in self._segment_ids()}
+            self._write_index({name: values[order] for name, values in columns.items()}, covered)
+
+    def total_bytes(self):
+        return sum(os.path.getsize(segment_path(self.directory, s)) for s in self._segment_ids())
+
+    def dead_fraction(self):
+        total = self.total_bytes()
+        return (total - self.live_bytes) / total if total else 0.0
+
+    def compact(self):
+        """Copies live records into new segments, in segment order, and deletes the old segments."""
+        with self._lock:
+            columns = self._live_columns()
+            old_segments = self._segment_ids()
+            self._roll()
+            order = np.lexsort((columns["offset"], columns["segment"]))
+            offsets = np.zeros(len(order), dtype=np.uint64)
+            segments = np.zeros(len(order), dtype=np.uint32)
+            for n, i in enumerate(order):
+                record = self._read(int(columns["segment"][i]), int(columns["offset"][i]), int(columns["length"][i]))
+                offsets[n] = self._append(bytes(record))
+                segments[n] = self._active
+            compacted = {name: values[order] for name, values in columns.items()}
+            compacted["offset"], compacted["segment"] = offsets, segments
+            by_hash = np.argsort(compacted["hash"], kind="stable")
+            covered = {s: os.path.getsize(segment_path(self.directory, s)) for s in range(old_segments[-1] + 1, self._active + 1)}
+            self._write_index({name: values[by_hash] for name, values in compacted.items()}, covered)
+
+            # The index no longer points into the old segments
+            for segment in old_segments:
+                if segment in self._maps:
+                    self._maps.pop(segment).close()
+                os.remove(segment_path(self.directory, segment))
+
+    def stats(self):
+        total = self.total_bytes()
+        return {
+            "entries": len(self),
+            "live_mb": self.live_bytes / 2**20,
+            "segments_mb": total / 2**20,
+            "segments": len(self._segment_ids()),
+            "dead_fraction": (total - self.live_bytes) / total if total else 0.0,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self._active_file.close()
+            for segment_map in self._maps.values():
+                segment_map.close()
+            self._maps = {}
+            self._columns = None
+            self._index_map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def import_file_cache(cache, source=FILE_CACHE_DIR, overwrite=False):
+    """
+    Copies graphrag's file cache (one file per call, e.g. extract_graph/chat_<hash>_v2)
+    into a PackedCache, under the same relative paths as keys. File
+    modification times seed the LRU order.
+
+    Returns:
+        (files imported, bytes imported)
+    """
+    files, size = 0, 0
+    for root, _, names in os.walk(source):
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            key = os.path.relpath(path, source).replace(os.sep, "/")
+            if not overwrite and key in cache:
+                continue
+            with open(path, "rb") as f:
+                value = f.read()
+            cache.put(key, value, last_used=os.path.getmtime(path))
+            files += 1
+            size += len(value)
+    cache.flush()
+    return files, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["import", "stats", "compact"])
+    parser.add_argument("--source", default=FILE_CACHE_DIR, help="file cache folder to import")
+    parser.add_argument("--overwrite", action="store_true", help="re-import keys already in the packed cache")
+    args = parser.parse_args()
+
+    with PackedCache() as cache:
+        if args.command == "import":
+            start = time.perf_counter()
+            files, size = import_file_cache(cache, args.source, args.overwrite)
+            print(f"✅ Imported {files} files ({size / 2**20:.1f} MB) in {time.perf_counter() - start:.2f} s")
+        elif args.command == "compact":
+            cache.compact()
+        print(f"📊 {cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
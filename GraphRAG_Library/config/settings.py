@@ -0,0 +1,59 @@
+import os
+import yaml
+from dotenv import load_dotenv
+
+# graphrag project root (settings.yaml, output/, cache/); the tools run from this folder
+GRAPHRAG_ROOT = os.getenv("GRAPHRAG_ROOT", ".")
+SETTINGS_PATH = os.path.join(GRAPHRAG_ROOT, "settings.yaml")
+OUTPUT_DIR = os.getenv("GRAPHRAG_OUTPUT_DIR", os.path.join(GRAPHRAG_ROOT, "output"))
+
+# Same .env as `graphrag index` (GRAPHRAG_API_KEY), for embedding questions and chat calls
+load_dotenv(os.path.join(GRAPHRAG_ROOT, ".env"))
+GRAPHRAG_API_KEY = os.getenv("GRAPHRAG_API_KEY")
+
+# Local search: context window shared between community reports, entities/relationships and text units
+LOCAL_SEARCH_MAX_TOKENS = int(os.getenv("LOCAL_SEARCH_MAX_TOKENS", "12000"))
+LOCAL_SEARCH_TOP_K_ENTITIES = int(os.getenv("LOCAL_SEARCH_TOP_K_ENTITIES", "10"))
+LOCAL_SEARCH_TOP_K_RELATIONSHIPS = int(os.getenv("LOCAL_SEARCH_TOP_K_RELATIONSHIPS", "10"))
+LOCAL_SEARCH_COMMUNITY_PROP = float(os.getenv("LOCAL_SEARCH_COMMUNITY_PROP", "0.25"))
+LOCAL_SEARCH_TEXT_UNIT_PROP = float(os.getenv("LOCAL_SEARCH_TEXT_UNIT_PROP", "0.5"))
+
+# Global search: map/reduce over community reports (chat model and concurrent_requests come from settings.yaml)
+GRAPHRAG_API_BASE = os.getenv("GRAPHRAG_API_BASE")  # e.g. the fake LLM server; unset = settings.yaml api_base or OpenAI
+GLOBAL_SEARCH_COMMUNITY_LEVEL = int(os.getenv("GLOBAL_SEARCH_COMMUNITY_LEVEL", "2"))
+GLOBAL_SEARCH_MIN_RANK = float(os.getenv("GLOBAL_SEARCH_MIN_RANK", "0"))  # reports ranked lower are not sent to the map step
+GLOBAL_SEARCH_MAP_MAX_TOKENS = int(os.getenv("GLOBAL_SEARCH_MAP_MAX_TOKENS", "8000"))  # report tokens per map call
+GLOBAL_SEARCH_REDUCE_MAX_TOKENS = int(os.getenv("GLOBAL_SEARCH_REDUCE_MAX_TOKENS", "8000"))
+GLOBAL_SEARCH_MAP_TIMEOUT = float(os.getenv("GLOBAL_SEARCH_MAP_TIMEOUT", "120"))  # then reduce with the points received
+
+# Packed LLM cache: one index file + append-only segments instead of one file per cached call
+FILE_CACHE_DIR = os.path.join(GRAPHRAG_ROOT, "cache")  # graphrag's file cache (cache.base_dir)
+PACKED_CACHE_DIR = os.getenv("PACKED_CACHE_DIR", os.path.join(GRAPHRAG_ROOT, "cache_packed"))
+PACKED_CACHE_MAX_MB = float(os.getenv("PACKED_CACHE_MAX_MB", "2048"))  # least recently used entries are evicted above this
+PACKED_CACHE_SEGMENT_MB = float(os.getenv("PACKED_CACHE_SEGMENT_MB", "64"))
+PACKED_CACHE_MAX_DEAD_FRACTION = float(os.getenv("PACKED_CACHE_MAX_DEAD_FRACTION", "0.3"))  # compact above this
+
+# Incremental indexing: each run writes the rows it changed (and the ids it removed) to a new folder here
+INCREMENTAL_DELTA_DIR = os.getenv("INCREMENTAL_DELTA_DIR", os.path.join(OUTPUT_DIR, "delta"))
+
+# Run logs: per-workflow and per-call measurements of indexing runs, and what counts as a regression between two
+RUN_LOG_DIR = os.getenv("RUN_LOG_DIR", os.path.join(GRAPHRAG_ROOT, "logs", "runs"))
+REGRESSION_THRESHOLD = float(os.getenv("REGRESSION_THRESHOLD", "0.2"))  # relative increase in time, tokens or memory
+REGRESSION_MIN_SECONDS = float(os.getenv("REGRESSION_MIN_SECONDS", "1"))  # smaller slowdowns are noise
+REGRESSION_MIN_MB = float(os.getenv("REGRESSION_MIN_MB", "50"))  # smaller memory growth is noise
+REGRESSION_MIN_CALL_SECONDS = float(os.getenv("REGRESSION_MIN_CALL_SECONDS", "0.5"))  # smaller median call slowdowns are noise
+REGRESSION_MIN_CALLS = int(os.getenv("REGRESSION_MIN_CALLS", "10"))  # model calls per run before medians are compared
+REGRESSION_MAX_CACHE_DROP = float(os.getenv("REGRESSION_MAX_CACHE_DROP", "0.1"))  # cache hit ratio, 0-1
+
+
+def load_graphrag_settings(path=SETTINGS_PATH):
+    """settings.yaml as a dict (${VAR} references are left as they are)."""
+    with open(path, encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+
+def lancedb_uri(settings=None):
+    """db_uri of the default vector store, relative to GRAPHRAG_ROOT (Windows separators accepted)."""
+    settings = settings or load_graphrag_settings()
+    uri = settings["vector_store"]["default_vector_store"]["db_uri"].replace("\\", "/")
+    return uri if os.path.isabs(uri) else os.path.join(GRAPHRAG_ROOT, uri)
@@ -0,0 +1,68 @@
+"""
+Input documents and text units, made the way graphrag's load_input and
+create_base_text_units make them.
+
+Document ids are the sha512 of the text, and text unit ids the sha512 of
+(document ids, text, token count), so a document or unit chunked here has
+the same id as in the index output and the two can be diffed.
+"""
+import datetime
+import hashlib
+import os
+import re
+
+
+def sha512(text):
+    return hashlib.sha512(text.encode("utf-8")).hexdigest()
+
+
+def get_encoding(name):
+    """tiktoken encoding to chunk with; it must be the one the index was built with, or no unit id matches."""
+    try:
+        import tiktoken
+    except ImportError as e:
+        raise RuntimeError("chunking needs tiktoken, like graphrag: pip install tiktoken") from e
+    return tiktoken.get_encoding(name)
+
+
+def read_documents(input_dir, file_pattern=r".*\.txt$", encoding="utf-8"):
+    """Input text files as document rows (id, title, text, creation_date), by title."""
+    pattern = re.compile(file_pattern)
+    documents = []
+    for root, _, names in os.walk(input_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            title = os.path.relpath(path, input_dir).replace(os.sep, "/")
+            if not pattern.search(title):
+                continue
+            with open(path, encoding=encoding) as f:
+                text = f.read()
+            created = datetime.datetime.fromtimestamp(os.path.getctime(path)).astimezone()
+            documents.append({
+                "id": sha512(text),
+                "title": title,
+                "text": text,
+                "creation_date": created.strftime("%Y-%m-%d %H:%M:%S %z"),
+            })
+    return sorted(documents, key=lambda d: d["title"])
+
+
+def chunk_document(document, encoding, size=1200, overlap=100):
+    """
+    Text units of a document: windows of size tokens, size - overlap tokens
+    apart, until the last one starts past the end (graphrag's "tokens"
+    strategy, grouped by document id).
+    """
+    tokens = encoding.encode(document["text"])
+    units = []
+    for start in range(0, len(tokens), size - overlap):
+        chunk = tokens[start:start + size]
+        text = encoding.decode(chunk)
+        document_ids = [document["id"]]
+        units.append({
+            "id": sha512(str((document_ids, text, len(chunk)))),
+            "text": text,
+            "n_tokens": len(chunk),
+            "document_ids": document_ids,
+        })
+    return units
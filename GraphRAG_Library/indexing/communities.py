@@ -0,0 +1,201 @@
+"""
+Community membership after a graph update, and community reports for the
+communities it changed.
+
+The Leiden hierarchy of the last full index is kept: an entity without a
+community joins the level-0 community where most of its relationship weight
+goes, then the child community where most of it goes at each level below.
+Entities with no relationship into any community stay outside, like the
+components graphrag leaves out of clustering.
+"""
+import csv
+import io
+import json
+import uuid
+from collections import Counter, defaultdict
+from search.tokens import num_tokens
+
+ENTITY_CONTEXT_COLUMNS = ["human_readable_id", "title", "description", "degree"]
+RELATIONSHIP_CONTEXT_COLUMNS = ["human_readable_id", "source", "target", "description", "combined_degree"]
+
+
+def neighbor_weights(relationships):
+    """title -> Counter of neighbor title -> summed relationship weight (both directions)."""
+    neighbors = defaultdict(Counter)
+    for r in relationships:
+        if r["source"] != r["target"]:
+            neighbors[r["source"]][r["target"]] += r["weight"]
+            neighbors[r["target"]][r["source"]] += r["weight"]
+    return neighbors
+
+
+def assign_entities(communities, entities, relationships):
+    """
+    Puts entities that are in no community into the communities of their
+    neighbors, repeating until no more can be placed (so chains of new
+    entities follow their first placed member).
+
+    Args:
+        communities: community rows by community number, modified in place
+        entities: entity rows by id
+    Returns:
+        ids of the entities placed
+    """
+    title_id = {e["title"]: entity_id for entity_id, e in entities.items()}
+    membership = defaultdict(dict)  # entity id -> level -> community
+    for c in communities.values():
+        for entity_id in c["entity_ids"]:
+            membership[entity_id][c["level"]] = c["community"]
+    neighbors = neighbor_weights(relationships)
+
+    def best(entity_id, candidates, level):
+        votes = Counter()
+        for title, weight in neighbors[entities[entity_id]["title"]].items():
+            community = membership.get(title_id.get(title), {}).get(level)
+            if community in candidates:
+                votes[community] += weight
+        return max(votes, key=lambda c: (votes[c], -c)) if votes else None
+
+    roots = {c["community"] for c in communities.values() if c["parent"] == -1}
+    pending = sorted((i for i in entities if i not in membership), key=lambda i: entities[i]["human_readable_id"])
+    placed = []
+    while pending:
+        remaining = []
+        for entity_id in pending:
+            community = best(entity_id, roots, 0)
+            if community is None:
+                remaining.append(entity_id)
+                continue
+            while community is not None:
+                c = communities[community]
+                c["entity_ids"].append(entity_id)
+                membership[entity_id][c["level"]] = community
+                community = best(entity_id, set(c["children"]), c["level"] + 1)
+            placed.append(entity_id)
+        if len(remaining) == len(pending):
+            break
+        pending = remaining
+    return placed
+
+
+def update_membership(communities, previous, entities, relationships, period):
+    """
+    Drops deleted entities from the communities and recomputes their
+    relationships (both ends inside) and text units (those of the
+    relationships). Communities left empty are removed, from their parent's
+    children too.
+
+    Args:
+        communities: community rows by community number, modified in place
+        previous: the same rows before the update
+        entities: entity rows by id
+        relationships: relationship rows
+        period: date of the update, for the communities that changed
+    Returns:
+        numbers of the remaining communities whose entities or relationships changed
+    """
+    changed = set()
+    for number, c in list(communities.items()):
+        entity_ids = [i for i in c["entity_ids"] if i in entities]
+        if not entity_ids:
+            del communities[number]
+            continue
+        titles = {entities[i]["title"] for i in entity_ids}
+        inside = [r for r in relationships if r["source"] in titles and r["target"] in titles]
+        c.update(
+            entity_ids=entity_ids,
+            relationship_ids=sorted(r["id"] for r in inside),
+            text_unit_ids=sorted({t for r in inside for t in r["text_unit_ids"]}),
+            size=len(entity_ids),
+        )
+        before = previous[number]
+        if set(entity_ids) != set(before["entity_ids"]) or c["relationship_ids"] != sorted(before["relationship_ids"]):
+            c["period"] = period
+            changed.add(number)
+    for c in communities.values():
+        c["children"] = [child for child in c["children"] if child in communities]
+    return changed
+
+
+def _rows(columns, rows):
+    out = io.StringIO()
+    csv.writer(out, lineterminator="\n").writerows([row[column] for column in columns] for row in rows)
+    return out.getvalue()
+
+
+def _table(label, columns, rows):
+    return f"-----{label}-----\n{','.join(columns)}\n{_rows(columns, rows)}"
+
+
+def community_context(community, entities, relationships, max_tokens):
+    """
+    {input_text} of a community report: its entities and relationships as
+    CSV tables, relationships with the highest combined degree first (each
+    bringing its two entities), cut off at max_tokens.
+    """
+    members = {entities[i]["title"]: entities[i] for i in community["entity_ids"] if i in entities}
+    relationship_ids = set(community["relationship_ids"])
+    edges = sorted((r for r in relationships if r["id"] in relationship_ids),
+                   key=lambda r: (-r["combined_degree"], r["human_readable_id"]))
+    if not edges:
+        return _table("Entities", ENTITY_CONTEXT_COLUMNS, list(members.values()))
+
+    nodes, kept, seen = [], [], set()
+    tokens = num_tokens(",".join(ENTITY_CONTEXT_COLUMNS)) + num_tokens(",".join(RELATIONSHIP_CONTEXT_COLUMNS))
+    for edge in edges:
+        new_nodes = [members[t] for t in dict.fromkeys((edge["source"], edge["target"])) if t not in seen]
+        added = num_tokens(_rows(ENTITY_CONTEXT_COLUMNS, new_nodes)) + num_tokens(_rows(RELATIONSHIP_CONTEXT_COLUMNS, [edge]))
+        if kept and tokens + added > max_tokens:
+            break
+        nodes += new_nodes
+        seen.update(n["title"] for n in new_nodes)
+        kept.append(edge)
+        tokens += added
+    return "\n\n".join([_table("Entities", ENTITY_CONTEXT_COLUMNS, nodes),
+                        _table("Relationships", RELATIONSHIP_CONTEXT_COLUMNS, kept)])
+
+
+def parse_report(text):
+    """The community report JSON of an answer, or None if it isn't one."""
+    try:
+        report = json.loads(text)
+        findings = [{"explanation": str(f["explanation"]), "summary": str(f["summary"])} for f in report["findings"]]
+        return {
+            "title": str(report["title"]),
+            "summary": str(report["summary"]),
+            "rating": float(report["rating"]),
+            "rating_explanation": str(report["rating_explanation"]),
+            "findings": findings,
+        }
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+        return None
+
+
+def report_row(community, report, report_id=None):
+    """community_reports row of a parsed report, formatted like graphrag's (full_content in markdown)."""
+    sections = "\n\n".join(f"## {f['summary']}\n\n{f['explanation']}" for f in report["findings"])
+    return {
+        "id": report_id or uuid.uuid4().hex,
+        "human_readable_id": community["community"],
+        "community": community["community"],
+        "level": community["level"],
+        "parent": community["parent"],
+        "children": list(community["children"]),
+        "title": report["title"],
+        "summary": report["summary"],
+        "full_content": f"# {report['title']}\n\n{report['summary']}\n\n{sections}",
+        "rank": report["rating"],
+        "rating_explanation": report["rating_explanation"],
+        "findings": report["findings"],
+        "full_content_json": json.dumps(report, indent=4, ensure_ascii=False),
+        "period": community["period"],
+        "size": community["size"],
+    }
+
+
+async def generate_report(llm, prompt, community, entities, relationships, max_input_length=8000, max_length=2000):
+    """Parsed report of one community (None if the model's answer isn't a report)."""
+    context = community_context(community, entities, relationships, max_input_length)
+    answer = await llm.chat([{"role": "user", "content": prompt.replace("{input_text}", context)}],
+                            "community_reporting", json_answer=True, max_tokens=max_length)
+    return parse_report(answer)
@@ -0,0 +1,103 @@
+"""
+Graph extraction and description summaries, with graphrag's extract_graph
+and summarize_descriptions prompts and its rules for reading the answers.
+"""
+import html
+import json
+import re
+from search.tokens import num_tokens
+
+TUPLE_DELIMITER = "<|>"
+RECORD_DELIMITER = "##"
+COMPLETION_DELIMITER = "<|COMPLETE|>"
+CONTINUE_PROMPT = ("MANY entities and relationships were missed in the last extraction. Remember to ONLY emit entities "
+                   "that match any of the previously extracted types. Add them below using the same format:\n")
+LOOP_PROMPT = ("It appears some entities and relationships may have still been missed.  Answer Y or N if there are "
+               "still entities or relationships that need to be added.\n")
+SUMMARY_MAX_INPUT_TOKENS = 4000  # graphrag's default max_input_tokens for summarize_descriptions
+
+
+def clean_str(value):
+    """graphrag's clean_str: unescaped HTML, stripped, without control characters."""
+    return re.sub(r"[\x00-\x1f\x7f-\x9f]", "", html.unescape(value.strip()))
+
+
+def parse_records(text):
+    """
+    Entity and relationship records of an extraction answer.
+
+    Returns:
+        (entities as (title, type, description),
+         relationships as (source, target, description, weight))
+    """
+    entities, relationships = [], []
+    for record in text.replace(COMPLETION_DELIMITER, "").split(RECORD_DELIMITER):
+        fields = re.sub(r"^\(|\)$", "", record.strip()).split(TUPLE_DELIMITER)
+        if fields[0] == '"entity"' and len(fields) >= 4:
+            title = clean_str(fields[1].upper())
+            if title:
+                entities.append((title, clean_str(fields[2].upper()), clean_str(fields[3])))
+        elif fields[0] == '"relationship"' and len(fields) >= 5:
+            try:
+                weight = float(fields[-1])
+            except ValueError:
+                weight = 1.0
+            source, target = clean_str(fields[1].upper()), clean_str(fields[2].upper())
+            if source and target:
+                relationships.append((source, target, clean_str(fields[3]), weight))
+    return entities, relationships
+
+
+async def extract_graph(llm, prompt, text, entity_types, max_gleanings=1):
+    """
+    Entities and relationships of one text unit: the extraction prompt, then
+    up to max_gleanings "continue" turns (with a Y/N check between them).
+
+    Returns:
+        same as parse_records
+    """
+    messages = [{"role": "user", "content": prompt.format(
+        tuple_delimiter=TUPLE_DELIMITER, record_delimiter=RECORD_DELIMITER,
+        completion_delimiter=COMPLETION_DELIMITER, entity_types=",".join(entity_types), input_text=text,
+    )}]
+    answer = await llm.chat(messages, "extract_graph")
+    results = answer
+    for i in range(max_gleanings):
+        messages = messages + [{"role": "assistant", "content": answer}, {"role": "user", "content": CONTINUE_PROMPT}]
+        answer = await llm.chat(messages, "extract_graph")
+        results += answer
+        if i == max_gleanings - 1:
+            break
+        check = messages + [{"role": "assistant", "content": answer}, {"role": "user", "content": LOOP_PROMPT}]
+        if (await llm.chat(check, "extract_graph", max_tokens=1)).strip().upper() != "Y":
+            break
+    return parse_records(results)
+
+
+async def summarize_descriptions(llm, prompt, name, descriptions, max_length=500):
+    """
+    One description from several: the only one as it is, otherwise the
+    summarize prompt over the sorted list, folding in batches of
+    SUMMARY_MAX_INPUT_TOKENS when they don't fit in one call.
+
+    Args:
+        name: entity title, or (source, target) for a relationship
+    """
+    if len(descriptions) <= 1:
+        return descriptions[0] if descriptions else ""
+
+    async def summarize(batch):
+        return await llm.chat([{"role": "user", "content": prompt.format(
+            entity_name=json.dumps(name, ensure_ascii=False),
+            description_list=json.dumps(sorted(batch), ensure_ascii=False),
+        )}], "summarize_descriptions", max_tokens=max_length)
+
+    budget = SUMMARY_MAX_INPUT_TOKENS - num_tokens(prompt)
+    batch, tokens, result = [], 0, ""
+    for i, description in enumerate(sorted(descriptions)):
+        batch.append(description)
+        tokens += num_tokens(description)
+        if (tokens > budget and len(batch) > 1) or i == len(descriptions) - 1:
+            result = await summarize(batch)
+            batch, tokens = [result], num_tokens(result)
+    return result
@@ -0,0 +1,427 @@
+"""Incremental indexing: only the input that changed goes through the LLM.
+
+Brings the index output up to date with the input folder without re-running
+the whole graphrag pipeline:
+
+1. Documents are diffed by content hash. New and changed ones are chunked
+   the way graphrag chunks them, and their text units diffed by text
+   against text_units.parquet: a unit whose text is already indexed takes
+   over its extraction results; the units of removed and changed documents go.
+2. Entities and relationships are extracted from the new texts only.
+3. They are merged into entities and relationships: new descriptions are
+   summarized together with the current one, weights added up, degrees
+   recomputed.
+4. Communities keep their clustering (see indexing.communities), and only
+   the communities whose entities or relationships changed get a new report.
+5. New and changed entities, text units and reports are embedded into LanceDB.
+
+Each step writes the rows it changed as <table>.parquet, and the ids it
+removed as <table>_deleted.parquet, into a new folder of
+INCREMENTAL_DELTA_DIR, with a manifest.json of counts and timings (the
+steps and LLM calls also go to a run log, see profiling.compare). The
+merged tables then replace the ones in the output folder (not with
+--dry-run). Communities are never re-clustered, so run a full
+`graphrag index` once new material makes up a large part of the graph.
+
+    python -m indexing.incremental --dry-run
+    python -m indexing.incremental
+    GRAPHRAG_API_BASE=http://127.0.0.1:8011/v1 python -m indexing.incremental
+"""
+import argparse
+import asyncio
+import copy
+import datetime
+import itertools
+import json
+import os
+import uuid
+from collections import Counter, defaultdict
+import lancedb
+import pyarrow as pa
+import pyarrow.parquet as pq
+from cache_store.packed_cache import PackedCache
+from config.settings import (
+    GRAPHRAG_API_BASE, GRAPHRAG_ROOT, INCREMENTAL_DELTA_DIR, OUTPUT_DIR, lancedb_uri, load_graphrag_settings,
+)
+from indexing.chunking import chunk_document, get_encoding, read_documents, sha512
+from indexing.communities import assign_entities, generate_report, report_row, update_membership
+from indexing.extraction import extract_graph, summarize_descriptions
+from indexing.llm import LLMClient
+from profiling.run_log import RunLog
+
+TABLES = ["documents", "text_units", "entities", "relationships", "communities", "community_reports"]
+# LanceDB table (after the container name) -> output table and the text embedded for each row
+EMBEDDINGS = {
+    "entity-description": ("entities", lambda e: f"{e['title']}:{e['description']}"),
+    "text_unit-text": ("text_units", lambda u: u["text"]),
+    "community-full_content": ("community_reports", lambda r: r["full_content"]),
+}
+
+
+def load_table(output_dir, name):
+    """(schema, rows by id) of an output table."""
+    table = pq.read_table(os.path.join(output_dir, f"{name}.parquet"))
+    return table.schema.remove_metadata(), {row["id"]: row for row in table.to_pylist()}
+
+
+def write_table(path, schema, rows):
+    """Writes rows through a temporary file, so readers never see half a table."""
+    pq.write_table(pa.Table.from_pylist(rows, schema=schema), f"{path}.tmp")
+    os.replace(f"{path}.tmp", path)
+
+
+def diff_rows(before, after):
+    """(rows of after that are new or changed, ids of before that are gone); both by id."""
+    return [row for row_id, row in after.items() if before.get(row_id) != row], [i for i in before if i not in after]
+
+
+def next_id(rows, start=0):
+    return max((row["human_readable_id"] for row in rows.values()), default=start - 1) + 1
+
+
+def compute_degrees(relationships):
+    """Node degrees of the graph the relationships make (undirected, a self-loop counting twice, like networkx)."""
+    neighbors = defaultdict(set)
+    for r in relationships:
+        neighbors[r["source"]].add(r["target"])
+        neighbors[r["target"]].add(r["source"])
+    return {title: len(others) + (title in others) for title, others in neighbors.items()}
+
+
+class IncrementalIndexer:
+    """
+    Index output plus the graphrag settings needed to extend it.
+
+    self.before holds the tables as loaded and self.after the updated ones
+    (both {table: {id: row}}); run() fills self.after and the delta folder,
+    apply() writes self.after to the output folder. Each step is a workflow
+    of self.run_log, which also gets every LLM call.
+    """
+
+    def __init__(self, settings=None, output_dir=OUTPUT_DIR, input_dir=None, db_uri=None,
+                 cache=None, api_base=GRAPHRAG_API_BASE, run_log=None):
+        self.settings = settings or load_graphrag_settings()
+        self.output_dir = output_dir
+        self.input_dir = input_dir or os.path.join(GRAPHRAG_ROOT, self.settings["input"]["base_dir"])
+        self.db_uri = db_uri or lancedb_uri(self.settings)
+        self.cache = cache
+        self.api_base = api_base
+        self.run_log = run_log or RunLog("indexing.incremental", trace_memory=False)
+        self.schemas, self.before = {}, {}
+        for name in TABLES:
+            self.schemas[name], self.before[name] = load_table(output_dir, name)
+        self.after = copy.deepcopy(self.before)
+        self.prompts = {}
+        for step, key in [("extract_graph", "prompt"), ("summarize_descriptions", "prompt"),
+                          ("community_reports", "graph_prompt")]:
+            with open(os.path.join(GRAPHRAG_ROOT, self.settings[step][key]), encoding="utf-8") as f:
+                self.prompts[step] = f.read()
+
+    def _write_delta(self, delta_dir, names, manifest):
+        for name in names:
+            upserted, deleted = diff_rows(self.before[name], self.after[name])
+            write_table(os.path.join(delta_dir, f"{name}.parquet"), self.schemas[name], upserted)
+            pq.write_table(pa.table({"id": pa.array(deleted, pa.string())}),
+                           os.path.join(delta_dir, f"{name}_deleted.parquet"))
+            manifest["tables"][name] = {"upserted": len(upserted), "deleted": len(deleted)}
+
+    def diff_input(self):
+        """
+        Step 1: new and removed documents and text units (self.after's
+        documents and text_units are updated).
+
+        Returns:
+            (units to extract, old unit id -> ids of new units with the same text,
+             ids of the removed units, manifest entries)
+        """
+        documents, text_units = self.after["documents"], self.after["text_units"]
+        chunks = self.settings.get("chunks", {})
+        current = read_documents(self.input_dir, self.settings["input"].get("file_pattern", r".*\.txt$"),
+                                 self.settings["input"].get("encoding", "utf-8"))
+        current_ids = {d["id"] for d in current}
+        added = [d for d in current if d["id"] not in documents]
+        removed = {i for i in documents if i not in current_ids}
+        removed_units = {i for i, u in text_units.items() if set(u["document_ids"]) <= removed}
+        summary = {"documents": {"added": [d["title"] for d in added],
+                                 "removed": sorted(documents[i]["title"] for i in removed)}}
+        for document_id in removed:
+            del documents[document_id]
+        for unit_id in removed_units:
+            del text_units[unit_id]
+
+        known = {sha512(u["text"]): u for u in self.before["text_units"].values()}
+        to_extract, renamed = [], defaultdict(list)
+        encoding = get_encoding(chunks.get("encoding_model", "cl100k_base")) if added else None
+        unit_numbers, document_numbers = itertools.count(next_id(self.before["text_units"], 1)), itertools.count(
+            next_id(self.before["documents"], 1))
+        for document in added:
+            unit_ids = []
+            for unit in chunk_document(document, encoding, chunks.get("size", 1200), chunks.get("overlap", 100)):
+                same = known.get(sha512(unit["text"]))
+                row = {**unit, "human_readable_id": next(unit_numbers),
+                       "entity_ids": list(same["entity_ids"] or []) if same else [],
+                       "relationship_ids": list(same["relationship_ids"] or []) if same else [],
+                       "covariate_ids": []}
+                text_units[row["id"]] = row
+                unit_ids.append(row["id"])
+                if same:
+                    renamed[same["id"]].append(row["id"])
+                else:
+                    to_extract.append(row)
+            documents[document["id"]] = {
+                "id": document["id"], "human_readable_id": next(document_numbers), "title": document["title"],
+                "text": document["text"], "text_unit_ids": unit_ids,
+                "creation_date": document["creation_date"], "metadata": None,
+            }
+        summary["text_units"] = {"extracted": len(to_extract), "reused": sum(map(len, renamed.values())),
+                                 "removed": len(removed_units)}
+        return to_extract, renamed, removed_units, summary
+
+    async def merge_graph(self, llm, units, results, renamed, removed_units):
+        """
+        Step 3: merges the extraction results of units into entities and
+        relationships, moves the references of renamed units and drops those
+        of removed units (and what is left without any unit).
+        """
+        entities, relationships = self.after["entities"], self.after["relationships"]
+        summarize = self.settings["summarize_descriptions"]
+        max_length = summarize.get("max_length", 500)
+        by_title = {e["title"]: e for e in entities.values()}
+        by_pair = {(r["source"], r["target"]): r for r in relationships.values()}
+        entity_numbers, relationship_numbers = itertools.count(next_id(entities)), itertools.count(next_id(relationships))
+
+        found = defaultdict(lambda: {"descriptions": [], "text_unit_ids": [], "types": Counter(), "weight": 0.0})
+        for unit, (unit_entities, unit_relationships) in zip(units, results):
+            for title, entity_type, description in unit_entities:
+                found[title]["descriptions"].append(description)
+                found[title]["text_unit_ids"].append(unit["id"])
+                found[title]["types"][entity_type] += 1
+            for source, target, description, weight in unit_relationships:
+                found[source, target]["descriptions"].append(description)
+                found[source, target]["text_unit_ids"].append(unit["id"])
+                found[source, target]["weight"] += weight
+
+        def merge(key, existing):
+            new = found[key]
+            if existing is not None:
+                existing["text_unit_ids"] = existing["text_unit_ids"] + new["text_unit_ids"]
+                if isinstance(key, tuple):
+                    existing["weight"] += new["weight"]
+                return existing, [existing["description"], *new["descriptions"]]
+            if isinstance(key, tuple):
+                row = {"id": str(uuid.uuid4()), "human_readable_id": next(relationship_numbers), "source": key[0],
+                       "target": key[1], "description": "", "weight": new["weight"], "combined_degree": 0,
+                       "text_unit_ids": new["text_unit_ids"]}
+                relationships[row["id"]] = by_pair[key] = row
+            else:
+                row = {"id": str(uuid.uuid4()), "human_readable_id": next(entity_numbers), "title": key,
+                       "type": new["types"].most_common(1)[0][0], "description": "",
+                       "text_unit_ids": new["text_unit_ids"], "frequency": 0, "degree": 0, "x": 0.0, "y": 0.0}
+                entities[row["id"]] = by_title[key] = row
+            return row, new["descriptions"]
+
+        merged = [merge(key, (by_pair if isinstance(key, tuple) else by_title).get(key)) for key in list(found)]
+        descriptions = await asyncio.gather(*(
+            summarize_descriptions(llm, self.prompts["summarize_descriptions"],
+                                   [row["source"], row["target"]] if "source" in row else row["title"],
+                                   texts, max_length)
+            for row, texts in merged
+        ))
+        for (row, _), description in zip(merged, descriptions):
+            row["description"] = description
+
+        def moved(unit_ids):
+            return [new_id for unit_id in unit_ids
+                    for new_id in ([] if unit_id in removed_units else [unit_id]) + renamed.get(unit_id, [])]
+
+        for e in list(entities.values()):
+            e["text_unit_ids"] = moved(e["text_unit_ids"])
+            e["frequency"] = len(e["text_unit_ids"])
+            if not e["text_unit_ids"]:
+                del entities[e["id"]]
+        titles = {e["title"] for e in entities.values()}
+        for r in list(relationships.values()):
+            r["text_unit_ids"] = moved(r["text_unit_ids"])
+            # relationships to names that were never extracted as entities are left out, like graphrag does
+            if not r["text_unit_ids"] or r["source"] not in titles or r["target"] not in titles:
+                del relationships[r["id"]]
+
+        degrees = compute_degrees(relationships.values())
+        for e in entities.values():
+            e["degree"] = degrees.get(e["title"], 0)
+        for r in relationships.values():
+            r["combined_degree"] = degrees[r["source"]] + degrees[r["target"]]
+
+        entity_ids = {e["title"]: e["id"] for e in entities.values()}
+        relationship_ids = {(r["source"], r["target"]): r["id"] for r in relationships.values()}
+        for unit, (unit_entities, unit_relationships) in zip(units, results):
+            unit["entity_ids"] = list(dict.fromkeys(entity_ids[t] for t, _, _ in unit_entities if t in entity_ids))
+            unit["relationship_ids"] = list(dict.fromkeys(
+                relationship_ids[s, t] for s, t, _, _ in unit_relationships if (s, t) in relationship_ids
+            ))
+
+    async def update_communities(self, llm, period):
+        """
+        Step 4: places new entities into communities, recomputes membership
+        and regenerates the reports of the communities that changed.
+
+        Returns:
+            manifest entries
+        """
+        config = self.settings["community_reports"]
+        entities = self.after["entities"]
+        relationships = list(self.after["relationships"].values())
+        previous = {c["community"]: c for c in self.before["communities"].values()}
+        communities = {c["community"]: c for c in self.after["communities"].values()}
+        placed = assign_entities(communities, entities, relationships)
+        changed = sorted(update_membership(communities, previous, entities, relationships, period))
+        self.after["communities"] = {c["id"]: c for c in communities.values()}
+
+        reports = {r["community"]: r for r in self.after["community_reports"].values() if r["community"] in communities}
+        for number, report in reports.items():
+            report["children"] = list(communities[number]["children"])
+        generated = await asyncio.gather(*(
+            generate_report(llm, self.prompts["community_reports"], communities[number], entities, relationships,
+                            config.get("max_input_length", 8000), config.get("max_length", 2000))
+            for number in changed
+        ))
+        failed = 0
+        for number, report in zip(changed, generated):
+            if report is None:  # keep the previous report rather than none
+                failed += 1
+                continue
+            old = reports.get(number)
+            reports[number] = report_row(communities[number], report, old["id"] if old else None)
+        self.after["community_reports"] = {r["id"]: r for r in reports.values()}
+        return {"communities": {"entities_placed": len(placed), "changed": len(changed)},
+                "reports": {"regenerated": len(changed) - failed, "failed": failed}}
+
+    async def update_embeddings(self, llm):
+        """Step 5: embeds new and changed rows into the LanceDB tables and removes deleted ones."""
+        container = self.settings["vector_store"]["default_vector_store"].get("container_name", "default")
+        db = lancedb.connect(self.db_uri)
+        counts = {}
+        for suffix, (name, text_of) in EMBEDDINGS.items():
+            table_name = f"{container}-{suffix}"
+            try:
+                table = db.open_table(table_name)
+            except ValueError:  # embedding not enabled in the index
+                continue
+            before = self.before[name]
+            rows = [row for row_id, row in self.after[name].items()
+                    if row_id not in before or text_of(before[row_id]) != text_of(row)]
+            deleted = [i for i in before if i not in self.after[name]]
+            if deleted:
+                table.delete("id IN ({})".format(", ".join("'{}'".format(i.replace("'", "''")) for i in deleted)))
+            if rows:
+                texts = [text_of(row) for row in rows]
+                vectors = await llm.embed(texts)
+                table.merge_insert("id").when_matched_update_all().when_not_matched_insert_all().execute(pa.table({
+                    "id": [row["id"] for row in rows],
+                    "text": texts,
+                    "vector": pa.array(vectors, table.schema.field("vector").type),
+                    "attributes": [json.dumps({"title": text}) for text in texts],
+                }))
+            counts[table_name] = {"upserted": len(rows), "deleted": len(deleted)}
+        return counts
+
+    async def arun(self, delta_dir, embed=True):
+        """
+        Steps 1-5 (5 only with embed), writing each step's delta into
+        delta_dir; returns the manifest (saved there as manifest.json unless
+        the input had no changes).
+        """
+        manifest = {"created": datetime.datetime.now().astimezone().isoformat(timespec="seconds"),
+                    "tables": {}}
+        log = self.run_log
+
+        with log.workflow("diff"):
+            units, renamed, removed_units, summary = self.diff_input()
+        manifest.update(summary)
+        if not summary["documents"]["added"] and not summary["documents"]["removed"]:
+            manifest["seconds"] = {"diff": log.workflows["diff"]["seconds"]}
+            return manifest
+        os.makedirs(delta_dir, exist_ok=True)
+        config = self.settings["extract_graph"]
+        async with LLMClient(self.settings, config["model_id"],
+                             self.settings.get("embed_text", {}).get("model_id", "default_embedding_model"),
+                             self.cache, self.api_base, log) as llm:
+            with log.workflow("extract_graph"):
+                results = await asyncio.gather(*(
+                    extract_graph(llm, self.prompts["extract_graph"], unit["text"], config["entity_types"],
+                                  config.get("max_gleanings", 1))
+                    for unit in units
+                ))
+
+            with log.workflow("merge_graph"):
+                await self.merge_graph(llm, units, results, renamed, removed_units)
+                self._write_delta(delta_dir, ["documents", "text_units", "entities", "relationships"], manifest)
+
+            with log.workflow("community_reports"):
+                manifest.update(await self.update_communities(llm, datetime.date.today().isoformat()))
+                self._write_delta(delta_dir, ["communities", "community_reports"], manifest)
+
+            if embed:
+                with log.workflow("embeddings"):
+                    manifest["embeddings"] = await self.update_embeddings(llm)
+            manifest["llm"] = dict(llm.usage)
+        seconds = manifest["seconds"] = {name: w["seconds"] for name, w in log.workflows.items()}
+        seconds["total"] = sum(seconds.values())
+        with open(os.path.join(delta_dir, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        return manifest
+
+    def run(self, delta_dir, embed=True):
+        return asyncio.run(self.arun(delta_dir, embed))
+
+    def apply(self):
+        """Replaces the output tables that changed with their updated version."""
+        for name in TABLES:
+            if self.before[name] != self.after[name]:
+                write_table(os.path.join(self.output_dir, f"{name}.parquet"), self.schemas[name],
+                            list(self.after[name].values()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--input-dir", help="default: input.base_dir of settings.yaml")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--delta-dir", default=INCREMENTAL_DELTA_DIR)
+    parser.add_argument("--db-uri", help="LanceDB folder (default: the vector store of settings.yaml)")
+    parser.add_argument("--api-base", default=GRAPHRAG_API_BASE, help="OpenAI-compatible endpoint (e.g. benchmarks.fake_llm)")
+    parser.add_argument("--dry-run", action="store_true", help="write the delta only, leave the output and LanceDB as they are")
+    parser.add_argument("--no-cache", action="store_true", help="don't read or write LLM answers in the packed cache")
+    args = parser.parse_args()
+
+    cache = None if args.no_cache else PackedCache()
+    run_log = RunLog("indexing.incremental" + (" --dry-run" if args.dry_run else ""))
+    try:
+        indexer = IncrementalIndexer(output_dir=args.output_dir, input_dir=args.input_dir, db_uri=args.db_uri,
+                                     cache=cache, api_base=args.api_base, run_log=run_log)
+        delta_dir = os.path.join(args.delta_dir, datetime.datetime.now().strftime("%Y%m%d-%H%M%S"))
+        manifest = indexer.run(delta_dir, embed=not args.dry_run)
+        if not args.dry_run:
+            indexer.apply()
+    finally:
+        if cache is not None:
+            cache.close()
+    log_path = run_log.save()
+
+    documents = manifest["documents"]
+    print(f"📄 Documents: {len(documents['added'])} added, {len(documents['removed'])} removed")
+    if not documents["added"] and not documents["removed"]:
+        print("✅ The index is up to date")
+        return
+    units = manifest["text_units"]
+    print(f"📊 Text units: {units['extracted']} extracted, {units['reused']} reused, {units['removed']} removed | "
+          f"LLM calls: {manifest['llm'].get('calls', 0)} ({manifest['llm'].get('cached', 0)} cached)")
+    for name, counts in manifest["tables"].items():
+        print(f"   {name:<18} {counts['upserted']:5d} upserted {counts['deleted']:5d} deleted")
+    print(f"   reports: {manifest['reports']['regenerated']} regenerated, {manifest['reports']['failed']} failed")
+    print("⏱️ " + " | ".join(f"{step} {s:.2f} s" for step, s in manifest["seconds"].items()))
+    print(f"✅ Delta written to {delta_dir}" + (" (dry run: output unchanged)" if args.dry_run else ", output updated"))
+    print(f"📄 Run log: {log_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Chat and embedding calls of the indexing tools.
+
+Models, JSON mode and concurrent_requests come from settings.yaml. Each
+response is cached by its request (through PackedPipelineCache, under
+"incremental/"), so re-running after a failure or an interrupted run only
+pays for the calls that did not complete. With a RunLog, every call is
+recorded in it (latency, tokens, cache hit or error).
+"""
+import asyncio
+import hashlib
+import json
+import time
+from collections import Counter
+from openai import AsyncOpenAI
+from cache_store.graphrag_cache import PackedPipelineCache
+from config.settings import GRAPHRAG_API_BASE, GRAPHRAG_API_KEY
+
+EMBEDDING_BATCH_SIZE = 16  # graphrag's text_embed batch_size
+
+
+def request_key(name, request):
+    return f"{name}/{hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest()}"
+
+
+class LLMClient:
+    """
+    Chat model and embedding model of settings.yaml behind one request
+    semaphore each. usage counts calls, cache hits and tokens.
+
+        async with LLMClient(settings, "default_chat_model", "default_embedding_model", cache) as llm:
+            answer = await llm.chat([{"role": "user", "content": prompt}], "extract_graph")
+    """
+
+    def __init__(self, settings, chat_model_id, embedding_model_id=None, cache=None, api_base=GRAPHRAG_API_BASE,
+                 run_log=None):
+        chat = settings["models"][chat_model_id]
+        embedding = settings["models"][embedding_model_id] if embedding_model_id else {}
+        self.chat_model = chat["model"]
+        self.json_mode = chat.get("model_supports_json", False)
+        self.embedding_model = embedding.get("model")
+        self._chat_slots = asyncio.Semaphore(chat.get("concurrent_requests", 25))
+        self._embedding_slots = asyncio.Semaphore(embedding.get("concurrent_requests", 25))
+        self._client = AsyncOpenAI(api_key=GRAPHRAG_API_KEY or "none", base_url=api_base or chat.get("api_base"))
+        self._cache = PackedPipelineCache(cache).child("incremental") if cache is not None else None
+        self.usage = Counter()
+        self.run_log = run_log
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._client.close()
+
+    async def _cached(self, kind, name, request, call):
+        """Cached value of request, or call() -> (value, prompt tokens, completion tokens, seconds in the model)."""
+        key = request_key(name, request)
+        start = time.perf_counter()
+        if self._cache is not None:
+            value = await self._cache.get(key)
+            if value is not None:
+                self.usage.update(calls=1, cached=1)
+                if self.run_log is not None:
+                    self.run_log.record_call(kind, name, time.perf_counter() - start, cached=True)
+                return value
+        try:
+            value, prompt_tokens, completion_tokens, seconds = await call()
+        except Exception as e:
+            if self.run_log is not None:
+                self.run_log.record_call(kind, name, time.perf_counter() - start, error=e)
+            raise
+        self.usage.update(calls=1, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        if self.run_log is not None:
+            self.run_log.record_call(kind, name, seconds, prompt_tokens, completion_tokens)
+        if self._cache is not None:
+            await self._cache.set(key, value)
+        return value
+
+    async def chat(self, messages, name, json_answer=False, **params):
+        """Content of the answer to messages; name is the cache folder (the workflow step)."""
+        request = {"model": self.chat_model, "temperature": 0, "messages": messages, **params}
+        if json_answer and self.json_mode:
+            request["response_format"] = {"type": "json_object"}
+
+        async def call():
+            async with self._chat_slots:
+                start = time.perf_counter()
+                response = await self._client.chat.completions.create(**request)
+                seconds = time.perf_counter() - start
+            content = response.choices[0].message.content or ""
+            return content, response.usage.prompt_tokens, response.usage.completion_tokens, seconds
+
+        return await self._cached("chat", name, request, call)
+
+    async def embed(self, texts, name="text_embedding"):
+        """Embedding vectors of texts, in order, EMBEDDING_BATCH_SIZE texts per request."""
+
+        async def batch(chunk):
+            request = {"model": self.embedding_model, "input": chunk}
+
+            async def call():
+                async with self._embedding_slots:
+                    start = time.perf_counter()
+                    response = await self._client.embeddings.create(**request)
+                    seconds = time.perf_counter() - start
+                vectors = [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+                return vectors, response.usage.prompt_tokens, 0, seconds
+
+            return await self._cached("embedding", name, request, call)
+
+        batches = [texts[i:i + EMBEDDING_BATCH_SIZE] for i in range(0, len(texts), EMBEDDING_BATCH_SIZE)]
+        return [vector for vectors in await asyncio.gather(*map(batch, batches)) for vector in vectors]
@@ -0,0 +1,162 @@
+"""Per-workflow comparison of two indexing runs, with regressions flagged.
+
+Runs are run logs (see profiling.run_log) or graphrag stats.json files. A
+workflow has regressed when:
+
+- it took REGRESSION_THRESHOLD longer, and at least REGRESSION_MIN_SECONDS more;
+- its cache hit ratio dropped by more than REGRESSION_MAX_CACHE_DROP;
+- its median model call grew by more than REGRESSION_THRESHOLD and at least
+  REGRESSION_MIN_CALL_SECONDS, over REGRESSION_MIN_CALLS calls or more in both runs;
+- its tokens grew by more than REGRESSION_THRESHOLD;
+- its memory peak did, and by at least REGRESSION_MIN_MB;
+- it had more failed calls.
+
+Each flagged workflow lists all of these that apply, so a slow run can be
+traced to a workflow and to cache misses, slower calls or more tokens. The
+exit status is 1 when something regressed. With a single run, its
+workflows are listed instead.
+
+    python -m profiling.compare previous latest
+    python -m profiling.compare stats latest --threshold 0.1
+    python -m profiling.compare latest
+"""
+import argparse
+import sys
+from config.settings import (
+    REGRESSION_MAX_CACHE_DROP, REGRESSION_MIN_CALL_SECONDS, REGRESSION_MIN_CALLS, REGRESSION_MIN_MB,
+    REGRESSION_MIN_SECONDS, REGRESSION_THRESHOLD, RUN_LOG_DIR,
+)
+from profiling.run_log import load_run
+
+
+def hit_ratio(workflow):
+    return workflow["cached"] / workflow["calls"] if workflow.get("calls") else None
+
+
+def tokens(workflow):
+    """Tokens sent and received, None if no call reached the model (cache hits have no token counts)."""
+    if not workflow.get("calls") or workflow["calls"] == workflow["cached"]:
+        return None
+    return workflow["prompt_tokens"] + workflow["completion_tokens"]
+
+
+def model_calls(workflow):
+    """Calls that reached the model (the ones call_p50 and call_p95 are taken over)."""
+    return workflow.get("calls", 0) - workflow.get("cached", 0) - workflow.get("errors", 0)
+
+
+def grew(base, new, threshold):
+    return base is not None and new is not None and new > base * (1 + threshold)
+
+
+def compare_workflow(base, new, threshold=REGRESSION_THRESHOLD, min_seconds=REGRESSION_MIN_SECONDS,
+                     max_cache_drop=REGRESSION_MAX_CACHE_DROP, min_mb=REGRESSION_MIN_MB,
+                     min_call_seconds=REGRESSION_MIN_CALL_SECONDS, min_calls=REGRESSION_MIN_CALLS):
+    """What regressed from base to new in one workflow, as short descriptions ([] if nothing did)."""
+    findings = []
+    if grew(base["seconds"], new["seconds"], threshold) and new["seconds"] - base["seconds"] >= min_seconds:
+        change = f" ({new['seconds'] / base['seconds'] - 1:+.0%})" if base["seconds"] else ""
+        findings.append(f"time {base['seconds']:.2f} s → {new['seconds']:.2f} s{change}")
+    base_hits, new_hits = hit_ratio(base), hit_ratio(new)
+    if base_hits is not None and new_hits is not None and base_hits - new_hits > max_cache_drop:
+        misses = (new["calls"] - new["cached"]) - (base["calls"] - base["cached"])
+        findings.append(f"cache hits {base_hits:.0%} → {new_hits:.0%} ({misses:+d} calls to the model)")
+    if (grew(base.get("call_p50"), new.get("call_p50"), threshold)
+            and new["call_p50"] - base["call_p50"] >= min_call_seconds
+            and min(model_calls(base), model_calls(new)) >= min_calls):
+        findings.append(f"median call {base['call_p50']:.2f} s → {new['call_p50']:.2f} s "
+                        f"(p95 {base['call_p95']:.2f} s → {new['call_p95']:.2f} s)")
+    if grew(tokens(base), tokens(new), threshold):
+        findings.append(f"tokens {tokens(base):,} → {tokens(new):,}")
+    if (grew(base["memory_peak_mb"], new["memory_peak_mb"], threshold)
+            and new["memory_peak_mb"] - base["memory_peak_mb"] >= min_mb):
+        findings.append(f"memory peak {base['memory_peak_mb']:.0f} MB → {new['memory_peak_mb']:.0f} MB")
+    if new.get("errors", 0) > base.get("errors", 0) and "errors" in base:
+        findings.append(f"failed calls {base['errors']} → {new['errors']}")
+    return findings
+
+
+def compare_runs(base, new, **limits):
+    """
+    Returns:
+        {"workflows": [(name, base figures or None, new figures or None,
+                        findings)] in run order, "regressed": number of
+                        workflows with findings}
+    """
+    names = list(new["workflows"]) + [w for w in base["workflows"] if w not in new["workflows"]]
+    rows = []
+    for name in names:
+        b, n = base["workflows"].get(name), new["workflows"].get(name)
+        rows.append((name, b, n, compare_workflow(b, n, **limits) if b and n else []))
+    return {"workflows": rows, "regressed": sum(bool(findings) for *_, findings in rows)}
+
+
+def _seconds(value):
+    return "-" if value is None else f"{value:.2f}"
+
+
+def _calls(workflow):
+    if not workflow or not workflow.get("calls"):
+        return "-"
+    return f"{workflow['calls']} ({hit_ratio(workflow):.0%} cached)"
+
+
+def print_run(run):
+    print(f"📊 Run {run['run_id']} ({run['command']}): {_seconds(run['total_seconds'])} s"
+          + (f", peak RSS {run['peak_rss_mb']:.0f} MB" if run.get("peak_rss_mb") else ""))
+    print(f"   {'workflow':<28} {'seconds':>8} {'calls':>18} {'p50 s':>7} {'p95 s':>7} {'tokens':>10} {'mem MB':>7}")
+    for name, w in run["workflows"].items():
+        memory = "-" if w["memory_peak_mb"] is None else f"{w['memory_peak_mb']:.0f}"
+        print(f"   {name:<28} {_seconds(w['seconds']):>8} {_calls(w):>18} {_seconds(w.get('call_p50')):>7} "
+              f"{_seconds(w.get('call_p95')):>7} {tokens(w) or '-':>10} {memory:>7}")
+
+
+def print_comparison(base, new, result):
+    print(f"📊 {base['run_id']} → {new['run_id']}: "
+          f"{_seconds(base['total_seconds'])} s → {_seconds(new['total_seconds'])} s")
+    print(f"   {'workflow':<28} {'base s':>8} {'new s':>8} {'change':>7}   {'calls':>18} → {'calls':<18}")
+    for name, b, n, findings in result["workflows"]:
+        change = (f"{n['seconds'] / b['seconds'] - 1:+.0%}"
+                  if b and n and b["seconds"] and n["seconds"] is not None else "")
+        flag = " ⚠️" if findings else ""
+        print(f"   {name:<28} {_seconds(b and b['seconds']):>8} {_seconds(n and n['seconds']):>8} {change:>7}   "
+              f"{_calls(b):>18} → {_calls(n):<18}{flag}")
+    for name, b, n, findings in result["workflows"]:
+        if not b or not n:
+            print(f"   {name}: only in the {'new' if n else 'base'} run")
+    if not result["regressed"]:
+        print("✅ No regressions")
+        return
+    print(f"⚠️ {result['regressed']} workflow(s) regressed:")
+    for name, _, _, findings in result["workflows"]:
+        if findings:
+            print(f"   {name}: " + "; ".join(findings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base", help='run log path or id, "latest", "previous" or "stats" (output/stats.json)')
+    parser.add_argument("new", nargs="?", help="run to compare with base (omit to list base's workflows)")
+    parser.add_argument("--dir", default=RUN_LOG_DIR, help="folder of the run logs")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument("--min-seconds", type=float, default=REGRESSION_MIN_SECONDS)
+    parser.add_argument("--max-cache-drop", type=float, default=REGRESSION_MAX_CACHE_DROP)
+    parser.add_argument("--min-mb", type=float, default=REGRESSION_MIN_MB)
+    parser.add_argument("--min-call-seconds", type=float, default=REGRESSION_MIN_CALL_SECONDS)
+    parser.add_argument("--min-calls", type=int, default=REGRESSION_MIN_CALLS)
+    args = parser.parse_args()
+
+    base = load_run(args.base, args.dir)
+    if args.new is None:
+        print_run(base)
+        return
+    new = load_run(args.new, args.dir)
+    result = compare_runs(base, new, threshold=args.threshold, min_seconds=args.min_seconds,
+                          max_cache_drop=args.max_cache_drop, min_mb=args.min_mb,
+                          min_call_seconds=args.min_call_seconds, min_calls=args.min_calls)
+    print_comparison(base, new, result)
+    sys.exit(1 if result["regressed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
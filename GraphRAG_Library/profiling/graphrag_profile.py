@@ -0,0 +1,153 @@
+"""Run `graphrag index` with a run log of its workflows and model calls.
+
+Workflow times and memory peaks come from graphrag's workflow callbacks,
+model calls from wrapping the models graphrag registers: chat calls with
+latency, tokens and cache hits (fnllm's), embedding calls with latency only
+(graphrag keeps nothing else of them). The log is saved in RUN_LOG_DIR
+for profiling.compare.
+
+    python -m profiling.graphrag_profile --root .
+    python -m profiling.graphrag_profile --root . --packed-cache
+    python -m profiling.compare previous latest
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from config.settings import GRAPHRAG_ROOT, RUN_LOG_DIR
+from profiling.compare import print_run
+from profiling.run_log import RunLog
+
+try:
+    from graphrag.callbacks.noop_workflow_callbacks import NoopWorkflowCallbacks
+except ImportError:  # only needed to run the pipeline
+    NoopWorkflowCallbacks = object
+
+
+class ProfilingCallbacks(NoopWorkflowCallbacks):
+    """graphrag workflow callbacks that time each workflow into a RunLog."""
+
+    def __init__(self, run_log):
+        self.run_log = run_log
+
+    def workflow_start(self, name, instance):
+        self.run_log.start_workflow(name)
+
+    def workflow_end(self, name, instance):
+        self.run_log.end_workflow(name)
+
+    def error(self, message, cause=None, stack=None, details=None):
+        # a failing workflow never reaches workflow_end
+        if self.run_log.current is not None:
+            self.run_log.end_workflow(self.run_log.current)
+
+
+def _usage(response):
+    usage = getattr(getattr(response, "metrics", None), "usage", None)
+    return getattr(usage, "input_tokens", 0) or 0, getattr(usage, "output_tokens", 0) or 0
+
+
+class ProfiledModel:
+    """A graphrag chat or embedding model that records its async calls in a RunLog; anything else is passed through."""
+
+    def __init__(self, model, run_log, default_name):
+        self._model = model
+        self._run_log = run_log
+        self._default_name = default_name
+
+    def __getattr__(self, attribute):
+        return getattr(self._model, attribute)
+
+    async def _timed(self, kind, method, *args, **kwargs):
+        name = kwargs.get("name") or self._default_name
+        start = time.perf_counter()
+        try:
+            result = await getattr(self._model, method)(*args, **kwargs)
+        except Exception as e:
+            self._run_log.record_call(kind, name, time.perf_counter() - start, error=e)
+            raise
+        seconds = time.perf_counter() - start
+        if kind == "chat" and result.cache_hit:
+            self._run_log.record_call(kind, name, seconds, cached=True)
+        elif kind == "chat":
+            self._run_log.record_call(kind, name, seconds, *_usage(result))
+        else:
+            self._run_log.record_call(kind, name, seconds)
+        return result
+
+    async def achat(self, prompt, history=None, **kwargs):
+        return await self._timed("chat", "achat", prompt, history, **kwargs)
+
+    async def aembed_batch(self, text_list, **kwargs):
+        return await self._timed("embedding", "aembed_batch", text_list, **kwargs)
+
+    async def aembed(self, text, **kwargs):
+        return await self._timed("embedding", "aembed", text, **kwargs)
+
+
+def profile_models(run_log):
+    """Makes graphrag's ModelManager hand out ProfiledModels from now on."""
+    from graphrag.language_model.manager import ModelManager
+
+    manager = ModelManager.get_instance()
+    register_chat, register_embedding = manager.register_chat, manager.register_embedding
+
+    def chat(name, model_type, **kwargs):
+        manager.chat_models[name] = ProfiledModel(register_chat(name, model_type, **kwargs), run_log, name)
+        return manager.chat_models[name]
+
+    def embedding(name, model_type, **kwargs):
+        manager.embedding_models[name] = ProfiledModel(register_embedding(name, model_type, **kwargs), run_log, name)
+        return manager.embedding_models[name]
+
+    manager.register_chat, manager.register_embedding = chat, embedding
+
+
+async def index(root, config_path, run_log, method="standard"):
+    """Runs graphrag's pipeline with the callbacks and models of run_log; returns the workflows that failed."""
+    import graphrag.api as api
+    from graphrag.config.enums import IndexingMethod
+    from graphrag.config.load_config import load_config
+
+    config = load_config(Path(root), Path(config_path) if config_path else None)
+    profile_models(run_log)
+    results = await api.build_index(config, method=IndexingMethod(method), callbacks=[ProfilingCallbacks(run_log)])
+    return [result.workflow for result in results if result.errors]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--root", default=GRAPHRAG_ROOT, help="graphrag project folder")
+    parser.add_argument("--config", help="settings file (default: settings.yaml of the root)")
+    parser.add_argument("--method", default="standard", choices=["standard", "fast"])
+    parser.add_argument("--packed-cache", action="store_true", help="use the packed cache (see cache_store.graphrag_cache)")
+    parser.add_argument("--dir", default=RUN_LOG_DIR, help="folder of the run logs")
+    args = parser.parse_args()
+
+    cache = None
+    if args.packed_cache:
+        import graphrag.index.run.run_pipeline as run_pipeline
+        from cache_store.graphrag_cache import PackedPipelineCache
+        from cache_store.packed_cache import PackedCache
+
+        cache = PackedCache()
+        run_pipeline.create_cache_from_config = lambda config, root_dir: PackedPipelineCache(cache)
+
+    run_log = RunLog("graphrag index" + (" --packed-cache" if args.packed_cache else ""))
+    try:
+        failed = asyncio.run(index(args.root, args.config, run_log, args.method))
+    finally:
+        if cache is not None:
+            cache.close()
+        path = run_log.save(args.dir)
+
+    print_run(run_log.summary())
+    print(f"📄 Run log: {path}")
+    if failed:
+        print(f"⚠️ Failed workflows: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
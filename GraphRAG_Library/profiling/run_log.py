@@ -0,0 +1,179 @@
+"""
+Run logs: what each workflow of an indexing run cost, saved as JSON in RUN_LOG_DIR.
+
+Per workflow a run log records wall time, the peak of Python memory
+allocated while it ran (tracemalloc) and its LLM calls: count, cache hits,
+errors, tokens and latency percentiles. Every call is kept as well, with the
+workflow it belongs to. from_stats() reads graphrag's stats.json as a run
+log with workflow times only, so runs made before instrumentation can be
+compared too.
+"""
+import datetime
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from config.settings import OUTPUT_DIR, RUN_LOG_DIR
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def percentile(values, q):
+    """q-th percentile of values (nearest rank), None if there are none."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+
+def peak_rss_mb():
+    """Peak resident memory of the process so far, None where the resource module is missing."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10  # bytes on macOS, KiB elsewhere
+
+
+class RunLog:
+    """
+    Measurements of one run. Workflows run one after the other; calls are
+    attributed to the workflow running when they complete.
+
+        log = RunLog("incremental")
+        with log.workflow("extract_graph"):
+            ...
+            log.record_call("chat", "extract_graph", seconds, prompt_tokens=1200, completion_tokens=300)
+        log.save()
+    """
+
+    def __init__(self, command="", trace_memory=True):
+        self.command = command
+        self.started = datetime.datetime.now().astimezone()
+        self.run_id = self.started.strftime("%Y%m%d-%H%M%S-%f")[:-3]  # sorts by start time
+        self.trace_memory = trace_memory
+        self.workflows = {}
+        self.calls = []
+        self.current = None
+        self._start = time.perf_counter()
+        self._workflow_start = None
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def start_workflow(self, name):
+        self.current = name
+        self._workflow_start = time.perf_counter()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+
+    def end_workflow(self, name):
+        entry = self.workflows.setdefault(name, {"seconds": 0.0, "memory_peak_mb": None})
+        entry["seconds"] += time.perf_counter() - self._workflow_start
+        if self.trace_memory:
+            peak = tracemalloc.get_traced_memory()[1] / 2**20
+            entry["memory_peak_mb"] = max(entry["memory_peak_mb"] or 0.0, peak)
+        self.current = None
+
+    @contextmanager
+    def workflow(self, name):
+        self.start_workflow(name)
+        try:
+            yield
+        finally:
+            self.end_workflow(name)
+
+    def record_call(self, kind, name, seconds, prompt_tokens=0, completion_tokens=0, cached=False, error=None):
+        """One model call: kind is "chat" or "embedding", name the prompt or step it is for."""
+        self.calls.append({
+            "workflow": self.current,
+            "kind": kind,
+            "name": name,
+            "seconds": seconds,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cached": cached,
+            "error": None if error is None else f"{type(error).__name__}: {error}",
+        })
+
+    def summary(self):
+        """The run log as saved: run metadata, per-workflow figures and the calls."""
+        calls = defaultdict(list)
+        for call in self.calls:
+            calls[call["workflow"] or "(no workflow)"].append(call)
+        workflows = {}
+        for name in list(self.workflows) + [w for w in calls if w not in self.workflows]:
+            workflows[name] = {**self.workflows.get(name, {"seconds": None, "memory_peak_mb": None}),
+                               **call_stats(calls.get(name, []))}
+        return {
+            "run_id": self.run_id,
+            "command": self.command,
+            "started": self.started.isoformat(timespec="seconds"),
+            "total_seconds": time.perf_counter() - self._start,
+            "peak_rss_mb": peak_rss_mb(),
+            "workflows": workflows,
+            "calls": self.calls,
+        }
+
+    def save(self, directory=RUN_LOG_DIR):
+        """Writes <run id>.json into directory; returns its path."""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.run_id}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2, ensure_ascii=False)
+        return path
+
+
+def call_stats(calls):
+    """Totals and latency percentiles of calls (latency of the calls that reached the model)."""
+    made = [c["seconds"] for c in calls if not c["cached"] and not c["error"]]
+    return {
+        "calls": len(calls),
+        "cached": sum(c["cached"] for c in calls),
+        "errors": sum(bool(c["error"]) for c in calls),
+        "prompt_tokens": sum(c["prompt_tokens"] for c in calls),
+        "completion_tokens": sum(c["completion_tokens"] for c in calls),
+        "call_seconds": sum(made),
+        "call_p50": statistics.median(made) if made else None,
+        "call_p95": percentile(made, 95),
+    }
+
+
+def from_stats(stats, name="stats.json"):
+    """A run log with the workflow times of a graphrag stats.json (nothing is known about calls or memory)."""
+    return {
+        "run_id": name,
+        "command": "graphrag index",
+        "started": None,
+        "total_seconds": stats.get("total_runtime"),
+        "peak_rss_mb": None,
+        "workflows": {workflow: {"seconds": figures.get("overall"), "memory_peak_mb": None}
+                      for workflow, figures in stats.get("workflows", {}).items()},
+        "calls": [],
+    }
+
+
+def load_run(ref, directory=RUN_LOG_DIR):
+    """
+    A saved run log, or a stats.json as one. ref is a path, a run id of
+    directory, "latest", "previous" (the run before the latest) or "stats"
+    (OUTPUT_DIR/stats.json).
+    """
+    runs = sorted(f for f in os.listdir(directory) if f.endswith(".json")) if os.path.isdir(directory) else []
+    if ref in ("latest", "previous"):
+        index = -1 if ref == "latest" else -2
+        if len(runs) < -index:
+            raise FileNotFoundError(f"no {ref} run log in {directory}")
+        ref = os.path.join(directory, runs[index])
+    elif ref == "stats":
+        ref = os.path.join(OUTPUT_DIR, "stats.json")
+    elif not os.path.exists(ref) and f"{ref}.json" in runs:
+        ref = os.path.join(directory, f"{ref}.json")
+    with open(ref, encoding="utf-8") as f:
+        data = json.load(f)
+    return data if "run_id" in data else from_stats(data, ref)
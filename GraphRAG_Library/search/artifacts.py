@@ -0,0 +1,153 @@
+import os
+import time
+import lancedb
+import numpy as np
+import pyarrow.parquet as pq
+from config.settings import OUTPUT_DIR, lancedb_uri, load_graphrag_settings
+
+# Only the columns search reads; the rest (x/y, covariates, findings, full_content_json...) are never loaded
+ENTITY_COLUMNS = ["id", "human_readable_id", "title", "description", "text_unit_ids", "degree"]
+RELATIONSHIP_COLUMNS = ["id", "human_readable_id", "source", "target", "description", "weight", "combined_degree"]
+TEXT_UNIT_COLUMNS = ["id", "human_readable_id", "text", "n_tokens", "relationship_ids"]
+COMMUNITY_COLUMNS = ["community", "entity_ids"]
+REPORT_COLUMNS = ["community", "level", "title", "full_content", "rank"]
+
+
+def read_parquet(output_dir, name, columns):
+    """Memory-mapped Arrow table of output/<name>.parquet with only the given columns."""
+    return pq.read_table(os.path.join(output_dir, f"{name}.parquet"), columns=columns, memory_map=True)
+
+
+def take(table, name, rows):
+    """Values of one column for the given rows, read from the memory-mapped table."""
+    return table.column(name).take(rows).to_pylist()
+
+
+def row_index(column):
+    """value -> row number, for an id or title column."""
+    return {value: i for i, value in enumerate(column.to_pylist())}
+
+
+class Adjacency:
+    """
+    Row -> related rows of another table, stored as CSR arrays.
+
+    Row i's related rows are indices[indptr[i]:indptr[i + 1]], so an
+    expansion step is an array slice instead of a scan of the other table.
+    """
+
+    def __init__(self, indptr, indices):
+        self.indptr = indptr
+        self.indices = indices
+
+    @classmethod
+    def from_id_lists(cls, column, index):
+        """From a list<string> column of ids; ids missing from index are dropped."""
+        column = column.combine_chunks()
+        offsets = column.offsets.to_numpy()
+        rows = np.array([index.get(value, -1) for value in column.flatten().to_pylist()], dtype=np.int64)
+        kept = np.concatenate([[0], np.cumsum(rows >= 0)])
+        return cls(kept[offsets - offsets[0]], rows[rows >= 0])
+
+    @classmethod
+    def from_endpoints(cls, source, target, size):
+        """Entity -> relationships, from the relationships' endpoint rows (-1 ends are skipped)."""
+        ends = np.stack([source, target], axis=1).ravel()
+        relationships = np.repeat(np.arange(len(source), dtype=np.int64), 2)[ends >= 0]
+        ends = ends[ends >= 0]
+        indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(ends, minlength=size), out=indptr[1:])
+        return cls(indptr, relationships[np.argsort(ends, kind="stable")])
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def __getitem__(self, i):
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def inverted(self, size):
+        """Adjacency from the related rows back to these rows (size = rows in the other table)."""
+        sources = np.repeat(np.arange(len(self), dtype=np.int64), np.diff(self.indptr))
+        order = np.argsort(self.indices, kind="stable")
+        indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.indices, minlength=size), out=indptr[1:])
+        return Adjacency(indptr, sources[order])
+
+
+def load_vectors(db_uri, table_name, index, size):
+    """
+    Unit-length vectors of a LanceDB table as a (size, dim) float32 matrix,
+    row i holding the vector of index row i (zeros where there is none).
+    """
+    table = lancedb.connect(db_uri).open_table(table_name)
+    data = table.search().select(["id", "vector"]).limit(None).to_arrow()
+    vectors = data.column("vector").combine_chunks()
+    dim = vectors.type.list_size
+    values = vectors.values.to_numpy().reshape(-1, dim).astype(np.float32)
+    rows = np.array([index.get(value, -1) for value in data.column("id").to_pylist()], dtype=np.int64)
+    matrix = np.zeros((size, dim), dtype=np.float32)
+    matrix[rows[rows >= 0]] = values[rows >= 0]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+class GraphArtifacts:
+    """
+    The output of `graphrag index`, loaded once for querying.
+
+    Tables stay memory-mapped Arrow (text columns are only read for the rows
+    a query selects). At load time, ids are resolved to row numbers once:
+    relationships to their source/target entities, entities to their
+    relationships, text units and community reports, and text units to
+    their relationships.
+    """
+
+    def __init__(self, output_dir=OUTPUT_DIR, db_uri=None, settings=None):
+        start = time.perf_counter()
+        settings = settings or load_graphrag_settings()
+        self.entities = read_parquet(output_dir, "entities", ENTITY_COLUMNS)
+        self.relationships = read_parquet(output_dir, "relationships", RELATIONSHIP_COLUMNS)
+        self.text_units = read_parquet(output_dir, "text_units", TEXT_UNIT_COLUMNS)
+        communities = read_parquet(output_dir, "communities", COMMUNITY_COLUMNS)
+        self.reports = read_parquet(output_dir, "community_reports", REPORT_COLUMNS)
+        self.load_seconds = {"parquet": time.perf_counter() - start}
+
+        # ID -> row indexes
+        start = time.perf_counter()
+        self.entity_row = row_index(self.entities.column("id"))
+        self.title_row = row_index(self.entities.column("title"))  # relationships name entities by title
+        relationship_row = row_index(self.relationships.column("id"))
+        text_unit_row = row_index(self.text_units.column("id"))
+        report_row = row_index(self.reports.column("community"))
+
+        # Relationship endpoints as entity rows, and the reverse: entity -> relationships
+        self.source = np.array([self.title_row.get(t, -1) for t in self.relationships.column("source").to_pylist()], dtype=np.int64)
+        self.target = np.array([self.title_row.get(t, -1) for t in self.relationships.column("target").to_pylist()], dtype=np.int64)
+        self.entity_relationships = Adjacency.from_endpoints(self.source, self.target, self.entities.num_rows)
+        self.weight = self.relationships.column("weight").to_numpy()
+        self.combined_degree = self.relationships.column("combined_degree").to_numpy()
+
+        self.entity_text_units = Adjacency.from_id_lists(self.entities.column("text_unit_ids"), text_unit_row)
+        self.text_unit_relationships = Adjacency.from_id_lists(
+            self.text_units.column("relationship_ids"), relationship_row
+        )
+        self.text_unit_tokens = self.text_units.column("n_tokens").to_numpy()
+
+        # entity -> community reports (one per level the entity belongs to)
+        community_entities = Adjacency.from_id_lists(communities.column("entity_ids"), self.entity_row)
+        community_report = np.array([report_row.get(c, -1) for c in communities.column("community").to_pylist()], dtype=np.int64)
+        entity_communities = community_entities.inverted(self.entities.num_rows)
+        reports = community_report[entity_communities.indices]
+        kept = np.concatenate([[0], np.cumsum(reports >= 0)])
+        self.entity_reports = Adjacency(kept[entity_communities.indptr], reports[reports >= 0])
+        self.report_rank = self.reports.column("rank").to_numpy()
+        self.load_seconds["indexes"] = time.perf_counter() - start
+
+        # Entity description embeddings, aligned with entity rows
+        start = time.perf_counter()
+        container = settings["vector_store"]["default_vector_store"].get("container_name", "default")
+        self.entity_vectors = load_vectors(
+            db_uri or lancedb_uri(settings), f"{container}-entity-description", self.entity_row, self.entities.num_rows
+        )
+        self.load_seconds["vectors"] = time.perf_counter() - start
@@ -0,0 +1,282 @@
+"""Global search: map-reduce over the community reports.
+
+Reports of the chosen community level are pruned by rank and packed into
+token-budgeted batches per level. One map call per batch extracts scored
+key points (at most concurrent_requests calls in flight, from
+settings.yaml). The points are added to the reduce context as each map call
+returns, so the reduce call starts as soon as the last one does.
+
+    python -m search.global_search "What are the main themes?"
+    GRAPHRAG_API_BASE=http://127.0.0.1:8011/v1 python -m search.global_search "What are the main themes?" --min-rank 7.5
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import os
+import re
+import statistics
+import time
+from collections import Counter
+from openai import AsyncOpenAI
+from config.settings import (
+    GLOBAL_SEARCH_COMMUNITY_LEVEL, GLOBAL_SEARCH_MAP_MAX_TOKENS, GLOBAL_SEARCH_MAP_TIMEOUT, GLOBAL_SEARCH_MIN_RANK,
+    GLOBAL_SEARCH_REDUCE_MAX_TOKENS, GRAPHRAG_API_BASE, GRAPHRAG_API_KEY, GRAPHRAG_ROOT, OUTPUT_DIR,
+    load_graphrag_settings,
+)
+from search.artifacts import read_parquet
+from search.tokens import num_tokens
+
+REPORT_COLUMNS = ["community", "level", "children", "title", "full_content", "rank"]
+NO_DATA_ANSWER = "I am sorry but I am unable to answer this question given the provided data."
+
+
+def load_reports(output_dir=OUTPUT_DIR):
+    """Community reports as dicts, with their token count."""
+    reports = read_parquet(output_dir, "community_reports", REPORT_COLUMNS).to_pylist()
+    for report in reports:
+        report["tokens"] = num_tokens(report["full_content"])
+    return reports
+
+
+def select_reports(reports, level, min_rank):
+    """
+    Reports of the communities at level, plus those of lower-level
+    communities that are not split any further, without the ones ranked
+    below min_rank.
+
+    Returns:
+        (selected reports, number pruned by rank)
+    """
+    candidates = [r for r in reports if r["level"] == level or (r["level"] < level and not r["children"])]
+    selected = [r for r in candidates if r["rank"] >= min_rank]
+    return selected, len(candidates) - len(selected)
+
+
+def shard_reports(reports, max_tokens):
+    """
+    Batches of reports from the same level, best ranked first, each holding
+    at most max_tokens of report content (a larger report gets its own batch).
+    """
+    batches = []
+    for level in sorted({r["level"] for r in reports}):
+        batch, tokens = [], 0
+        for report in sorted((r for r in reports if r["level"] == level), key=lambda r: -r["rank"]):
+            if batch and tokens + report["tokens"] > max_tokens:
+                batches.append(batch)
+                batch, tokens = [], 0
+            batch.append(report)
+            tokens += report["tokens"]
+        if batch:
+            batches.append(batch)
+    return batches
+
+
+def batch_context(batch):
+    """Data table of a map call ({context_data})."""
+    lines = ["-----Reports-----", "id|title|content|rank"]
+    lines += [f"{r['community']}|{r['title']}|{r['full_content']}|{r['rank']}" for r in batch]
+    return "\n".join(lines)
+
+
+def parse_points(text):
+    """Key points of a map answer, as (score, description); [] if it isn't the requested JSON."""
+    match = re.search(r"\{.*\}", text or "", re.DOTALL)  # models sometimes wrap the JSON in prose
+    try:
+        data = json.loads(match.group(0)) if match else {}
+    except json.JSONDecodeError:
+        return []
+    points = []
+    for point in data.get("points", []) if isinstance(data, dict) else []:
+        try:
+            points.append((int(point["score"]), str(point["description"])))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return points
+
+
+class ReduceContext:
+    """
+    Key points of the map answers, kept sorted by score as they arrive, so
+    the reduce prompt is ready when the last map call returns.
+    """
+
+    def __init__(self):
+        self.points = []  # (-score, arrival, text, tokens)
+
+    def __len__(self):
+        return len(self.points)
+
+    def add(self, points):
+        for score, description in points:
+            if score > 0:  # "I don't know" answers
+                text = f"Importance Score: {score}\n{description}"
+                bisect.insort(self.points, (-score, len(self.points), text, num_tokens(text)))
+
+    def text(self, max_tokens):
+        """{report_data} of the reduce prompt: the best points that fit in max_tokens."""
+        blocks, tokens = [], 0
+        for i, (_, _, text, text_tokens) in enumerate(self.points, 1):
+            if tokens + text_tokens > max_tokens:
+                break
+            blocks.append(f"----Analyst {i}----\n{text}")
+            tokens += text_tokens
+        return "\n\n".join(blocks)
+
+
+class GlobalSearch:
+    """
+    Map-reduce global search over loaded community reports.
+
+    Model, JSON mode and concurrent_requests are read from the chat model
+    global_search uses in settings.yaml; the map and reduce prompts from the
+    files it names.
+    """
+
+    def __init__(self, reports, settings=None, api_base=GRAPHRAG_API_BASE, concurrency=None,
+                 level=GLOBAL_SEARCH_COMMUNITY_LEVEL, min_rank=GLOBAL_SEARCH_MIN_RANK,
+                 map_max_tokens=GLOBAL_SEARCH_MAP_MAX_TOKENS, reduce_max_tokens=GLOBAL_SEARCH_REDUCE_MAX_TOKENS,
+                 map_timeout=GLOBAL_SEARCH_MAP_TIMEOUT):
+        settings = settings or load_graphrag_settings()
+        config = settings["global_search"]
+        model = settings["models"][config["chat_model_id"]]
+        self.reports = reports
+        self.model = model["model"]
+        self.json_mode = model.get("model_supports_json", False)
+        self.concurrency = concurrency or model.get("concurrent_requests", 25)
+        self.api_base = api_base or model.get("api_base")
+        self.level = level
+        self.min_rank = min_rank
+        self.map_max_tokens = map_max_tokens
+        self.reduce_max_tokens = reduce_max_tokens
+        self.map_timeout = map_timeout
+        with open(os.path.join(GRAPHRAG_ROOT, config["map_prompt"]), encoding="utf-8") as f:
+            self.map_prompt = f.read()
+        with open(os.path.join(GRAPHRAG_ROOT, config["reduce_prompt"]), encoding="utf-8") as f:
+            self.reduce_prompt = f.read()
+
+    async def _chat(self, client, semaphore, system, query, **kwargs):
+        """One chat call once a request slot is free; returns (content, usage, seconds in the call)."""
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.chat.completions.create(
+                model=self.model, temperature=0,
+                messages=[{"role": "system", "content": system}, {"role": "user", "content": query}], **kwargs
+            )
+            return response.choices[0].message.content, response.usage, time.perf_counter() - start
+
+    async def _map(self, client, semaphore, query, batch):
+        try:
+            kwargs = {"response_format": {"type": "json_object"}} if self.json_mode else {}
+            content, usage, seconds = await self._chat(
+                client, semaphore, self.map_prompt.format(context_data=batch_context(batch)), query,
+                max_tokens=1000, **kwargs
+            )
+            return parse_points(content), usage, seconds, None
+        except Exception as e:  # one failed batch shouldn't fail the search
+            return [], None, None, e
+
+    async def asearch(self, query, response_type="Multiple Paragraphs"):
+        """
+        Answers a question over the whole dataset.
+
+        Returns:
+            dict with "answer", "batches", "reports" (sent to the map step),
+            "pruned", "points", "map_errors", "map_timed_out", "usage" (tokens
+            of the calls that reported them), "map_call_p50" and "seconds"
+            per phase (prepare, first map result, map, reduce, total)
+        """
+        seconds = {}
+        start = time.perf_counter()
+        reports, pruned = select_reports(self.reports, self.level, self.min_rank)
+        batches = shard_reports(reports, self.map_max_tokens)
+        seconds["prepare"] = time.perf_counter() - start
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        context = ReduceContext()
+        usage = Counter()
+        calls, errors, timed_out = [], [], 0
+        async with AsyncOpenAI(api_key=GRAPHRAG_API_KEY or "none", base_url=self.api_base) as client:
+            map_start = time.perf_counter()
+            tasks = [asyncio.create_task(self._map(client, semaphore, query, batch)) for batch in batches]
+            try:
+                for next_result in asyncio.as_completed(tasks, timeout=self.map_timeout):
+                    points, call_usage, call_seconds, error = await next_result
+                    if error is not None:
+                        errors.append(error)
+                        continue
+                    seconds.setdefault("first_map", time.perf_counter() - map_start)
+                    context.add(points)
+                    calls.append(call_seconds)
+                    # OpenAI-compatible servers may not report usage
+                    if call_usage is not None:
+                        usage.update(prompt=call_usage.prompt_tokens or 0, completion=call_usage.completion_tokens or 0)
+            except TimeoutError:
+                # Reduce with the points received so far
+                timed_out = sum(not task.done() for task in tasks)
+                for task in tasks:
+                    task.cancel()
+            seconds["map"] = time.perf_counter() - map_start
+
+            start = time.perf_counter()
+            if len(context):
+                system = self.reduce_prompt.format(
+                    report_data=context.text(self.reduce_max_tokens), response_type=response_type
+                )
+                answer, call_usage, _ = await self._chat(client, semaphore, system, query, max_tokens=2000)
+                if call_usage is not None:
+                    usage.update(prompt=call_usage.prompt_tokens or 0, completion=call_usage.completion_tokens or 0)
+            else:
+                answer = NO_DATA_ANSWER
+            seconds["reduce"] = time.perf_counter() - start
+        seconds["total"] = sum(seconds[phase] for phase in ("prepare", "map", "reduce"))
+
+        return {
+            "answer": answer,
+            "batches": len(batches),
+            "reports": len(reports),
+            "pruned": pruned,
+            "points": len(context),
+            "map_errors": errors,
+            "map_timed_out": timed_out,
+            "usage": dict(usage),
+            "map_call_p50": statistics.median(calls) if calls else None,
+            "seconds": seconds,
+        }
+
+    def search(self, query, response_type="Multiple Paragraphs"):
+        return asyncio.run(self.asearch(query, response_type))
+
+
+def format_seconds(result):
+    """One-line summary of a search's phases, e.g. for the CLI and benchmarks."""
+    s = result["seconds"]
+    first = f", first result {s['first_map']:.2f} s" if "first_map" in s else ""
+    return (f"⏱️ Prepare {s['prepare'] * 1000:.1f} ms | Map {s['map']:.2f} s ({result['batches']} calls{first}) "
+            f"| Reduce {s['reduce']:.2f} s | Total {s['total']:.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("question")
+    parser.add_argument("--api-base", default=GRAPHRAG_API_BASE, help="OpenAI-compatible endpoint (e.g. benchmarks.fake_llm)")
+    parser.add_argument("--concurrency", type=int, help="map calls in flight (default: concurrent_requests)")
+    parser.add_argument("--level", type=int, default=GLOBAL_SEARCH_COMMUNITY_LEVEL)
+    parser.add_argument("--min-rank", type=float, default=GLOBAL_SEARCH_MIN_RANK)
+    parser.add_argument("--response-type", default="Multiple Paragraphs")
+    args = parser.parse_args()
+
+    engine = GlobalSearch(
+        load_reports(), api_base=args.api_base, concurrency=args.concurrency, level=args.level, min_rank=args.min_rank
+    )
+    result = engine.search(args.question, args.response_type)
+    print(result["answer"])
+    print(f"\n📊 Reports: {result['reports']} mapped, {result['pruned']} pruned by rank | "
+          f"points: {result['points']} | tokens: {result['usage']}")
+    if result["map_errors"] or result["map_timed_out"]:
+        print(f"⚠️ Map calls failed: {len(result['map_errors'])}, timed out: {result['map_timed_out']}")
+    print(format_seconds(result))
+
+
+if __name__ == "__main__":
+    main()
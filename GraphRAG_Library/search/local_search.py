@@ -0,0 +1,233 @@
+"""Local search over the graphrag output, without an LLM.
+
+Builds the context graphrag's local search sends to the chat model: the
+entities closest to the question, their relationships, community reports
+and source text units, within a token budget.
+
+    python -m search.local_search "Who is Irene Adler?"      # embeds the question (GRAPHRAG_API_KEY)
+    python -m search.local_search --entity "IRENE ADLER"     # offline: queries with that entity's vector
+    python -m search.local_search "Who is Irene Adler?" --prompt   # full system prompt for the chat model
+"""
+import argparse
+import time
+import numpy as np
+from config.settings import (
+    GRAPHRAG_API_KEY, LOCAL_SEARCH_COMMUNITY_PROP, LOCAL_SEARCH_MAX_TOKENS, LOCAL_SEARCH_TEXT_UNIT_PROP,
+    LOCAL_SEARCH_TOP_K_ENTITIES, LOCAL_SEARCH_TOP_K_RELATIONSHIPS, load_graphrag_settings,
+)
+from search.artifacts import GraphArtifacts, take
+from search.tokens import num_tokens
+
+
+def add_rows(header, rows, budget):
+    """
+    Section "-----header-----" with one "|"-joined line per row, in order,
+    until the next row would go over budget tokens.
+
+    Returns:
+        (text, number of rows added, tokens used)
+    """
+    lines = [f"-----{header[0]}-----", "|".join(header[1])]
+    tokens = num_tokens("\n".join(lines))
+    added = 0
+    for row, row_tokens in rows:
+        line = "|".join(str(value) for value in row)
+        row_tokens = row_tokens if row_tokens is not None else num_tokens(line)
+        if tokens + row_tokens > budget:
+            break
+        lines.append(line)
+        tokens += row_tokens
+        added += 1
+    return ("\n".join(lines), added, tokens) if added else ("", 0, 0)
+
+
+class LocalSearchEngine:
+    """
+    Answers local-search context requests from a loaded GraphArtifacts.
+
+    Every step after the entity lookup follows precomputed row indexes, so
+    a request only reads the text of the rows that end up in the context.
+    """
+
+    def __init__(self, artifacts, max_tokens=LOCAL_SEARCH_MAX_TOKENS, top_k_entities=LOCAL_SEARCH_TOP_K_ENTITIES,
+                 top_k_relationships=LOCAL_SEARCH_TOP_K_RELATIONSHIPS, community_prop=LOCAL_SEARCH_COMMUNITY_PROP,
+                 text_unit_prop=LOCAL_SEARCH_TEXT_UNIT_PROP):
+        self.artifacts = artifacts
+        self.max_tokens = max_tokens
+        self.top_k_entities = top_k_entities
+        self.top_k_relationships = top_k_relationships
+        self.community_prop = community_prop
+        self.text_unit_prop = text_unit_prop
+
+    def entity_vector(self, title):
+        """Stored description embedding of an entity, to query offline."""
+        return self.artifacts.entity_vectors[self.artifacts.title_row[title]]
+
+    def map_entities(self, query_vector, k):
+        """Rows of the k entities whose description embeddings are closest to query_vector, best first."""
+        query = np.asarray(query_vector, dtype=np.float32)
+        scores = self.artifacts.entity_vectors @ (query / (np.linalg.norm(query) or 1.0))
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top], kind="stable")]
+
+    def select_relationships(self, entities):
+        """
+        Relationships of the selected entities: those between two of them
+        first, then those to other entities (entities linked to more of the
+        selection first), at most top_k_relationships per selected entity.
+        """
+        a = self.artifacts
+        selected = np.zeros(a.entities.num_rows, dtype=bool)
+        selected[entities] = True
+        candidates = np.unique(np.concatenate([a.entity_relationships[e] for e in entities]))
+        source, target = a.source[candidates], a.target[candidates]
+        inside = (source >= 0) & (target >= 0) & selected[np.maximum(source, 0)] & selected[np.maximum(target, 0)]
+
+        # In-network: by rank (combined degree), then weight
+        in_network = candidates[inside]
+        in_network = in_network[np.lexsort((-a.weight[in_network], -a.combined_degree[in_network]))]
+
+        # Out-of-network: the end outside the selection, counted over all candidates
+        out_network = candidates[~inside]
+        other = np.where(selected[np.maximum(a.source[out_network], 0)], a.target[out_network], a.source[out_network])
+        values, counts = np.unique(other, return_counts=True)
+        links = counts[np.searchsorted(values, other)] if len(other) else other
+        order = np.lexsort((-a.weight[out_network], -a.combined_degree[out_network], -links))
+        out_network = out_network[order][:self.top_k_relationships * len(entities)]
+        return np.concatenate([in_network, out_network]).astype(np.int64)
+
+    def select_text_units(self, entities, relationships):
+        """Text units of the selected entities, in entity order, those holding more selected relationships first."""
+        a = self.artifacts
+        wanted = set(relationships.tolist())
+        seen = set()
+        units = []
+        for rank, entity in enumerate(entities):
+            for unit in a.entity_text_units[entity]:
+                if unit not in seen:
+                    seen.add(unit)
+                    shared = sum(r in wanted for r in a.text_unit_relationships[unit].tolist())
+                    units.append((rank, -shared, unit))
+        units.sort()
+        return np.array([unit for _, _, unit in units], dtype=np.int64)
+
+    def select_reports(self, entities):
+        """Community reports of the selected entities' communities, by number of selected members, then rank."""
+        a = self.artifacts
+        reports, counts = np.unique(np.concatenate([a.entity_reports[e] for e in entities]), return_counts=True)
+        return reports[np.lexsort((-a.report_rank[reports], -counts))]
+
+    def search(self, query_vector):
+        """
+        Builds the local-search context for an embedded question.
+
+        Args:
+            query_vector: Embedding of the question (same model as the entity descriptions)
+
+        Returns:
+            dict with "context" (text for {context_data}), "entities" (titles,
+            best first), "rows" and "tokens" per section, and "seconds" per step
+        """
+        a = self.artifacts
+        seconds = {}
+        start = time.perf_counter()
+        entities = self.map_entities(query_vector, self.top_k_entities)
+        seconds["entities"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        relationships = self.select_relationships(entities)
+        text_units = self.select_text_units(entities, relationships)
+        reports = self.select_reports(entities)
+        seconds["expand"] = time.perf_counter() - start
+
+        # Token budget: reports and sources get their share, entities and relationships the rest
+        start = time.perf_counter()
+        report_budget = int(self.max_tokens * self.community_prop)
+        text_unit_budget = int(self.max_tokens * self.text_unit_prop)
+        local_budget = self.max_tokens - report_budget - text_unit_budget
+        sections = {}
+
+        sections["reports"] = add_rows(
+            ("Reports", ["id", "title", "content"]),
+            ((row, None) for row in zip(
+                take(a.reports, "community", reports), take(a.reports, "title", reports),
+                take(a.reports, "full_content", reports))),
+            report_budget,
+        )
+        sections["entities"] = add_rows(
+            ("Entities", ["id", "entity", "description", "number of relationships"]),
+            ((row, None) for row in zip(
+                take(a.entities, "human_readable_id", entities), take(a.entities, "title", entities),
+                take(a.entities, "description", entities), take(a.entities, "degree", entities))),
+            local_budget,
+        )
+        sections["relationships"] = add_rows(
+            ("Relationships", ["id", "source", "target", "description", "weight", "links"]),
+            ((row, None) for row in zip(
+                take(a.relationships, "human_readable_id", relationships),
+                take(a.relationships, "source", relationships), take(a.relationships, "target", relationships),
+                take(a.relationships, "description", relationships), a.weight[relationships].tolist(),
+                a.combined_degree[relationships].tolist())),
+            local_budget - sections["entities"][2],
+        )
+        # n_tokens from indexing, so source texts are never re-tokenized
+        sections["sources"] = add_rows(
+            ("Sources", ["id", "text"]),
+            (((hid, text), int(tokens) + 2) for hid, text, tokens in zip(
+                take(a.text_units, "human_readable_id", text_units), take(a.text_units, "text", text_units),
+                a.text_unit_tokens[text_units])),
+            text_unit_budget,
+        )
+        seconds["context"] = time.perf_counter() - start
+
+        return {
+            "context": "\n\n".join(text for text, _, _ in sections.values() if text),
+            "entities": take(a.entities, "title", entities),
+            "rows": {name: rows for name, (_, rows, _) in sections.items()},
+            "tokens": {name: tokens for name, (_, _, tokens) in sections.items()},
+            "seconds": seconds,
+        }
+
+
+def embed_query(question, settings=None):
+    """Embedding of the question with the embedding model from settings.yaml (needs GRAPHRAG_API_KEY)."""
+    from openai import OpenAI
+    settings = settings or load_graphrag_settings()
+    model = settings["models"]["default_embedding_model"]["model"]
+    response = OpenAI(api_key=GRAPHRAG_API_KEY).embeddings.create(model=model, input=[question])
+    return response.data[0].embedding
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("question", nargs="?")
+    parser.add_argument("--entity", help="query with this entity's stored vector instead of embedding the question")
+    parser.add_argument("--max-tokens", type=int, default=LOCAL_SEARCH_MAX_TOKENS)
+    parser.add_argument("--prompt", action="store_true", help="print the system prompt with the context filled in")
+    parser.add_argument("--response-type", default="Multiple Paragraphs")
+    args = parser.parse_args()
+    if not args.question and not args.entity:
+        parser.error("give a question or --entity")
+
+    settings = load_graphrag_settings()
+    artifacts = GraphArtifacts(settings=settings)
+    engine = LocalSearchEngine(artifacts, max_tokens=args.max_tokens)
+    query_vector = engine.entity_vector(args.entity) if args.entity else embed_query(args.question, settings)
+    result = engine.search(query_vector)
+
+    if args.prompt:
+        with open(settings["local_search"]["prompt"], encoding="utf-8") as f:
+            template = f.read()
+        print(template.format(context_data=result["context"], response_type=args.response_type))
+    else:
+        print(result["context"])
+    print(f"\n📊 Entities: {', '.join(result['entities'])}")
+    print(f"📊 Rows: {result['rows']}  tokens: {result['tokens']}")
+    load = ", ".join(f"{name} {s * 1000:.1f} ms" for name, s in artifacts.load_seconds.items())
+    query = ", ".join(f"{name} {s * 1000:.2f} ms" for name, s in result["seconds"].items())
+    print(f"⏱️ Load: {load} | Query: {query}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")  # encoding of gpt-3.5-turbo / text-embedding-3-small
+except ImportError:  # estimate instead of failing where tiktoken isn't installed
+    _encoding = None
+
+
+def num_tokens(text):
+    """Token count of text for the chat model (about 4 characters per token without tiktoken)."""
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return (len(text) + 3) // 4
@@ -0,0 +1,120 @@
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """On-disk embedding cache keyed by model name + text hash, with an in-memory LRU in front.
+
+    Embeddings are stored as raw float32 blobs in SQLite (WAL mode), so
+    several processes can share one cache file. Only texts missing from both
+    layers are sent to the encoder, in a single batch.
+    """
+
+    def __init__(self, path, model_name, max_memory_items=10000):
+        self.path = path
+        self.model_name = model_name
+        self.max_memory_items = max_memory_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )"""
+        )
+        self._conn.commit()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def get_many(self, hashes):
+        """Returns {hash: vector} for the hashes found in memory or on disk."""
+        found = {}
+        with self._lock:
+            missing = []
+            for h in hashes:
+                vector = self._memory.get(h)
+                if vector is not None:
+                    self._memory.move_to_end(h)
+                    found[h] = vector
+                else:
+                    missing.append(h)
+            self.memory_hits += len(found)
+
+            # SQLite caps the number of bound parameters, so look up in slices
+            for start in range(0, len(missing), 500):
+                part = missing[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? "
+                    f"AND text_hash IN ({','.join('?' * len(part))})",
+                    [self.model_name, *part],
+                ).fetchall()
+                for h, blob in rows:
+                    vector = np.frombuffer(blob, dtype="float32")
+                    found[h] = vector
+                    self._remember(h, vector)
+                self.disk_hits += len(rows)
+        return found
+
+    def put_many(self, items):
+        """Stores {hash: vector} in both layers."""
+        with self._lock:
+            rows = []
+            for h, vector in items.items():
+                vector = np.asarray(vector, dtype="float32")
+                self._remember(h, vector)
+                rows.append((self.model_name, h, vector.tobytes()))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def encode(self, model, texts, **encode_kwargs):
+        """Drop-in for model.encode(texts): returns a float32 matrix, encoding only cache misses."""
+        hashes = [text_hash(t) for t in texts]
+        found = self.get_many(list(dict.fromkeys(hashes)))
+
+        pending = {}
+        for h, t in zip(hashes, texts):
+            if h not in found and h not in pending:
+                pending[h] = t
+        with self._lock:
+            self.misses += len(pending)
+
+        if pending:
+            vectors = model.encode(list(pending.values()), **encode_kwargs)
+            computed = dict(zip(pending.keys(), np.asarray(vectors, dtype="float32")))
+            self.put_many(computed)
+            found.update(computed)
+
+        if not texts:
+            return np.zeros((0, model.get_sentence_embedding_dimension()), dtype="float32")
+        return np.vstack([found[h] for h in hashes])
+
+    def stats(self):
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_items": len(self._memory),
+        }
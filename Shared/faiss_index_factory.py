@@ -0,0 +1,106 @@
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+# FAISS wants roughly 39 training points per IVF list and 2^nbits per PQ codebook
+MIN_POINTS_PER_LIST = 39
+
+
+def _metric(metric):
+    if metric == "ip":
+        return faiss.METRIC_INNER_PRODUCT
+    if metric == "l2":
+        return faiss.METRIC_L2
+    raise ValueError(f"Unknown metric '{metric}', expected 'ip' or 'l2'")
+
+
+def _training_sample(embeddings, train_sample, seed=0):
+    """Returns at most train_sample rows, drawn uniformly without replacement."""
+    if train_sample is None or len(embeddings) <= train_sample:
+        return embeddings
+    rng = np.random.default_rng(seed)
+    rows = np.sort(rng.choice(len(embeddings), size=train_sample, replace=False))
+    return embeddings[rows]
+
+
+def create_index(dimension, index_type="flat", metric="ip", n_train=None,
+                 nlist=1024, pq_m=48, pq_nbits=8, hnsw_m=32, ef_construction=200):
+    """Creates an empty (untrained) index of the requested type.
+
+    When n_train is given, nlist is capped so every list still gets enough
+    training points, and IVF-PQ falls back to IVF-Flat if there are too few
+    points to train the PQ codebooks.
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{index_type}', expected one of {INDEX_TYPES}")
+    faiss_metric = _metric(metric)
+
+    if index_type == "flat":
+        return faiss.IndexFlatIP(dimension) if metric == "ip" else faiss.IndexFlatL2(dimension)
+
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, hnsw_m, faiss_metric)
+        index.hnsw.efConstruction = ef_construction
+        return index
+
+    if n_train is not None:
+        capped = max(1, min(nlist, n_train // MIN_POINTS_PER_LIST))
+        if capped != nlist:
+            print(f"Only {n_train} training vectors: using nlist={capped} instead of {nlist}")
+            nlist = capped
+        if index_type == "ivf_pq" and n_train < 2 ** pq_nbits:
+            print(f"Only {n_train} training vectors: too few for IVF-PQ, using IVF-Flat")
+            index_type = "ivf_flat"
+
+    quantizer = faiss.IndexFlatIP(dimension) if metric == "ip" else faiss.IndexFlatL2(dimension)
+    if index_type == "ivf_flat":
+        return faiss.IndexIVFFlat(quantizer, dimension, nlist, faiss_metric)
+
+    if dimension % pq_m != 0:
+        raise ValueError(f"pq_m={pq_m} must divide the embedding dimension {dimension}")
+    return faiss.IndexIVFPQ(quantizer, dimension, nlist, pq_m, pq_nbits, faiss_metric)
+
+
+def build_index(embeddings, index_type="flat", metric="ip", train_sample=100_000,
+                nlist=1024, nprobe=16, pq_m=48, pq_nbits=8, hnsw_m=32,
+                ef_construction=200, ef_search=64, ids=None):
+    """Builds, trains and fills an index over float32 embeddings.
+
+    When ids are given, the index is wrapped in an IndexIDMap so searches
+    return those ids and rows can later be replaced with add_with_ids/remove_ids.
+    """
+    embeddings = np.ascontiguousarray(embeddings, dtype="float32")
+    sample = _training_sample(embeddings, train_sample)
+
+    index = create_index(
+        embeddings.shape[1], index_type, metric, n_train=len(sample),
+        nlist=nlist, pq_m=pq_m, pq_nbits=pq_nbits, hnsw_m=hnsw_m,
+        ef_construction=ef_construction,
+    )
+    if not index.is_trained:
+        index.train(sample)
+    if ids is not None:
+        index = faiss.IndexIDMap(index)
+        index.add_with_ids(embeddings, np.asarray(ids, dtype="int64"))
+    else:
+        index.add(embeddings)
+
+    set_search_params(index, nprobe=nprobe, ef_search=ef_search)
+    return index
+
+
+def set_search_params(index, nprobe=None, ef_search=None):
+    """Applies query-time knobs (IVF nprobe, HNSW efSearch); other index types ignore them."""
+    base = index
+    if isinstance(base, faiss.IndexIDMap):
+        base = faiss.downcast_index(base.index)
+
+    if nprobe is not None:
+        try:
+            faiss.extract_index_ivf(base).nprobe = nprobe
+        except RuntimeError:
+            pass  # not an IVF index
+    if ef_search is not None and hasattr(base, "hnsw"):
+        base.hnsw.efSearch = ef_search
+    return index
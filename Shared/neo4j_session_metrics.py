@@ -0,0 +1,59 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class SessionMetrics:
+    """
+    Neo4j sessions the app has open at once, per driver ("sync" / "async"), and the time spent in them.
+
+    Only the app's own sessions are counted, not the driver's connection
+    pool: a session holds a pooled connection while its transaction runs, so
+    peak_share_of_pool shows how close the app came to max_pool_size, but
+    idle connections and those of other processes are not seen.
+    """
+
+    def __init__(self, max_pool_size):
+        self.max_pool_size = max_pool_size
+        self._lock = threading.Lock()
+        self.open_sessions = {"sync": 0, "async": 0}
+        self.peak_sessions = {"sync": 0, "async": 0}
+        self.queries = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+
+    def opened(self, kind):
+        with self._lock:
+            self.open_sessions[kind] += 1
+            self.peak_sessions[kind] = max(self.peak_sessions[kind], self.open_sessions[kind])
+
+    def closed(self, kind, seconds, failed):
+        with self._lock:
+            self.open_sessions[kind] -= 1
+            self.queries += 1
+            self.errors += int(failed)
+            self.total_seconds += seconds
+
+    @contextmanager
+    def track(self, kind):
+        """Counts the session opened inside the block."""
+        self.opened(kind)
+        start = time.perf_counter()
+        failed = True
+        try:
+            yield
+            failed = False
+        finally:
+            self.closed(kind, time.perf_counter() - start, failed)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "max_pool_size": self.max_pool_size,
+                "open_sessions": dict(self.open_sessions),
+                "peak_sessions": dict(self.peak_sessions),
+                "peak_share_of_pool": {k: v / self.max_pool_size for k, v in self.peak_sessions.items()},
+                "queries": self.queries,
+                "errors": self.errors,
+                "avg_query_ms": 1000 * self.total_seconds / self.queries if self.queries else 0.0,
+            }
@@ -0,0 +1,83 @@
+import asyncio
+
+
+class QueryBatcher:
+    """Coalesces concurrent requests into batches for a batch function.
+
+    Requests that arrive within window_ms of the first one (up to
+    max_batch_size) are handed to process_batch together, and each caller
+    gets back the result at its own position. process_batch may be a plain
+    function (run in a worker thread) or a coroutine function. A batch is
+    dispatched as soon as it is collected, so the next one can fill up while
+    the previous one is still running.
+    """
+
+    def __init__(self, process_batch, window_ms=5, max_batch_size=32):
+        self.process_batch = process_batch
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._queue = None
+        self._worker = None
+        self._loop = None
+        self._in_flight = set()
+        self.batches = 0
+        self.items = 0
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, item):
+        """Queues one item and waits for its result."""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.window
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            self.batches += 1
+            self.items += len(batch)
+            task = self._loop.create_task(self._process(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _process(self, batch):
+        items = [item for item, _ in batch]
+        try:
+            if asyncio.iscoroutinefunction(self.process_batch):
+                results = await self.process_batch(items)
+            else:
+                results = await asyncio.to_thread(self.process_batch, items)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+        }